@@ -1,9 +1,7 @@
 import modal
 import os
 import asyncio
-import tempfile
 import pathlib
-import shutil
 
 app = modal.App("discord-100doc-bot")
 cpu_request = 0.125
@@ -27,11 +25,15 @@ image = (
 LOGS_DIR = "/logs"
 LOGS_FILENAME = "resource_metrics.json"
 LOGS_PATH = pathlib.Path(LOGS_DIR) / LOGS_FILENAME
+# Time-series store that replaced the JSON-lines file above
+METRICS_DB_PATH = pathlib.Path(LOGS_DIR) / "resource_metrics.db"
+# Samples of the bot process itself, written by its in-process sampler
+BOT_METRICS_DB_PATH = pathlib.Path(LOGS_DIR) / "bot_metrics.db"
 
 
 @app.function(
     image=image,
-    volumes={"/data": db_volume},
+    volumes={"/data": db_volume, LOGS_DIR: logs_volume},
     cpu=(cpu_request, cpu_limit),
     secrets=[modal.Secret.from_name("discord-secret")],
     timeout=60 * 60 * 24,  # 24 hours
@@ -47,9 +49,16 @@ def run_bot():
     except Exception as e:
         print(f"Warning: Failed to reload database volume: {e}")
         print("Continuing with local database")
+    try:
+        logs_volume.reload()
+    except Exception as e:
+        print(f"Warning: Failed to reload logs volume: {e}")
 
     os.makedirs("/data", exist_ok=True)
+    os.makedirs(LOGS_DIR, exist_ok=True)
     os.environ["DB_PATH"] = "/data/streaks.db"
+    os.environ.setdefault("RESOURCE_METRICS_DB", str(BOT_METRICS_DB_PATH))
+    os.environ.setdefault("RESOURCE_METRICS_VOLUME", "discord-bot-logs")
     os.environ["DISCORD_BOT_TOKEN"] = os.environ["DISCORD_BOT_TOKEN"]
 
     from bot.bot_core import HundredDoCBot
@@ -89,16 +98,19 @@ def init_db():
         return "Database already exists at /data/streaks.db"
 
 
+# Not scheduled: it runs in its own container, so these are that container's
+# numbers, not the bot's. The bot samples itself into BOT_METRICS_DB_PATH.
 @app.function(
     image=image,
-    schedule=modal.Period(hours=1),
     volumes={LOGS_DIR: logs_volume},
     timeout=900,
 )
 def log_resource_usage():
+    """One container-level sample into METRICS_DB_PATH, importing the old
+    resource_metrics.json history on first run"""
     import psutil
-    import json
     from datetime import datetime
+    from bot.metrics_store import MetricsStore
 
     try:
         logs_volume.reload()
@@ -108,23 +120,22 @@ def log_resource_usage():
     os.makedirs(LOGS_DIR, exist_ok=True)
 
     metrics = {
-        "timestamp": datetime.now().isoformat(),
         "cpu_percent": psutil.cpu_percent(interval=1),
         "memory_mb": psutil.Process().memory_info().rss / (1024 * 1024),
         "threads": len(psutil.Process().threads()),
     }
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp_logs_path = pathlib.Path(tmpdir) / LOGS_FILENAME
-        # Copy existing logs if present
+    # Appends to the store cost the same however long the history is; old
+    # samples are rolled up instead of rewriting the whole file every hour
+    store = MetricsStore(str(METRICS_DB_PATH))
+    try:
         if LOGS_PATH.exists():
-            shutil.copyfile(LOGS_PATH, tmp_logs_path)
-        # Append new metrics
-        with open(tmp_logs_path, "a") as f:
-            f.write(json.dumps(metrics) + "\n")
-        # Ensure logs dir exists and copy back
-        pathlib.Path(LOGS_DIR).mkdir(parents=True, exist_ok=True)
-        shutil.copyfile(tmp_logs_path, LOGS_PATH)
+            imported = store.import_jsonl(str(LOGS_PATH))
+            LOGS_PATH.rename(LOGS_PATH.with_name(LOGS_FILENAME + ".imported"))
+            print(f"Imported {imported} samples from {LOGS_FILENAME}")
+        store.record(metrics)
+    finally:
+        store.close()
 
     try:
         logs_volume.commit()
@@ -132,7 +143,28 @@ def log_resource_usage():
     except Exception as e:
         print(f"Warning: Failed to commit logs to volume: {e}")
 
-    return metrics
+    return {"timestamp": datetime.now().isoformat(), **metrics}
+
+
+@app.function(
+    image=image,
+    volumes={LOGS_DIR: logs_volume},
+)
+def resource_summary(hours: float = 24, source: str = "bot"):
+    """min/avg/max of every recorded metric over the last ``hours``, from the
+    bot's own sampler (``source="bot"``) or from log_resource_usage's
+    container-level samples (any other ``source``)"""
+    import time
+    from bot.metrics_store import MetricsStore
+
+    logs_volume.reload()
+    path = BOT_METRICS_DB_PATH if source == "bot" else METRICS_DB_PATH
+    store = MetricsStore(str(path))
+    try:
+        start = time.time() - hours * 3600
+        return {name: store.summary(name, start) for name in store.names()}
+    finally:
+        store.close()
 
 
 @app.local_entrypoint()
@@ -142,5 +174,3 @@ def main():
     print(result)
     print("Starting Discord bot...")
     run_bot.remote()
-    print("Bot is running. Monitoring resource usage...")
-    log_resource_usage.remote()
@@ -0,0 +1,102 @@
+# bench_db_pool.py: posts/second with per-call connections vs the pool
+#
+# Usage: python -m benchmarks.bench_db_pool [users] [posts]
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from bot.database import DatabaseManager
+
+GUILD_ID = 1
+
+
+def seed(
+    db: DatabaseManager, users: int, guild_id: int = GUILD_ID, max_age: int = 13
+) -> None:
+    db.init_database()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with db._pool.writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO user_streaks
+            (guild_id, user_id, username, current_day, last_post_timestamp, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (
+                    guild_id,
+                    uid,
+                    f"user{uid}",
+                    random.randint(1, 99),
+                    (now - datetime.timedelta(days=random.randint(1, max_age))).isoformat(),
+                    now.isoformat(),
+                )
+                for uid in range(1, users + 1)
+            ),
+        )
+
+
+def legacy_post(db_path: str, user_id: int) -> None:
+    """One post as handled before pooling: a connection per call"""
+    conn = sqlite3.connect(db_path)
+    row = conn.execute(
+        "SELECT current_day FROM user_streaks WHERE guild_id = ? AND user_id = ?",
+        (GUILD_ID, user_id),
+    ).fetchone()
+    conn.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        UPDATE user_streaks
+        SET username = ?, current_day = ?, last_post_timestamp = ?, completed_at = ?
+        WHERE guild_id = ? AND user_id = ?
+        """,
+        (
+            f"user{user_id}",
+            row[0] + 1,
+            datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            None,
+            GUILD_ID,
+            user_id,
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def pooled_post(db: DatabaseManager, user_id: int) -> None:
+    data = db.get_user_data(GUILD_ID, user_id)
+    db.update_user_progress(
+        GUILD_ID, user_id, f"user{user_id}", data["current_day"] + 1
+    )
+
+
+def main(users: int = 50_000, posts: int = 5_000) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        db = DatabaseManager(db_path)
+        seed(db, users)
+        ids = [random.randint(1, users) for _ in range(posts)]
+
+        start = time.perf_counter()
+        for uid in ids:
+            legacy_post(db_path, uid)
+        legacy = posts / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for uid in ids:
+            pooled_post(db, uid)
+        pooled = posts / (time.perf_counter() - start)
+        db.close()
+
+    print(f"users={users} posts={posts}")
+    print(f"per-call connections: {legacy:,.0f} posts/s")
+    print(f"pooled connections:   {pooled:,.0f} posts/s ({pooled / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,271 @@
+# bench_e2e.py: end-to-end throughput and latency through a fake gateway
+#
+# Drives a real HundredDoCBot (cogs, database, executor, volume scheduler)
+# with synthetic Discord traffic; see fake_gateway.py for what is faked.
+# Every workload gets a fresh bot and database:
+#
+#   morning      a burst of progress posts, one per user, with a few new
+#                users and rejected posts mixed in
+#   leaderboard  !leaderboard spam with some progress posts interleaved
+#   reminders    one daily_reminder_check over the seeded users
+#
+# Latency is from dispatch to the bot's first response (reaction, reply or
+# command output). --json writes the results for regression tracking.
+# Usage: python -m benchmarks.bench_e2e [--workloads ...] [--users N] [--json PATH]
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from bot import bot_core, metrics
+from bot.commands.admin import AdminCommands
+from bot.commands.general import GeneralCommands
+from bot.config import ChannelConfig, ReminderConfig
+from bot.dispatch import MessageDispatcher
+from benchmarks.bench_db_pool import GUILD_ID, seed
+from benchmarks.fake_gateway import FakeGateway
+
+
+class UnthrottledDispatcher(MessageDispatcher):
+    """Dispatcher without Discord's rate limits, to time the bot itself"""
+
+    DEFAULT_ROUTE_LIMITS = {"dm": (1e9, 1e9), "channel": (1e9, 1e9)}
+
+    def __init__(self, concurrency: int = 5, **kwargs):
+        kwargs.setdefault("global_rate", 1e9)
+        super().__init__(concurrency, **kwargs)
+
+
+def current_days(gateway: FakeGateway) -> Dict[int, int]:
+    with gateway.bot.db.manager._pool.reader() as conn:
+        return dict(
+            conn.execute(
+                "SELECT user_id, current_day FROM user_streaks WHERE guild_id = ?",
+                (GUILD_ID,),
+            )
+        )
+
+
+def progress_posts(gateway: FakeGateway, count: int, users: int) -> list:
+    """One post per user: mostly the next day, some new users, some rejects"""
+    days = current_days(gateway)
+    log_channel = gateway.channel(ChannelConfig.LOGGING_CHANNEL)
+    messages = []
+    new_user = users
+    for user_id in random.sample(range(1, users + 1), min(count, users)):
+        r = random.random()
+        if r < 0.05:
+            new_user += 1
+            user_id, content = new_user, "[1/100] First day, set up the AWS CLI"
+        elif r < 0.08:
+            content = f"[{days[user_id] + 2}/100] Skipped a day"
+        else:
+            content = f"[{days[user_id] + 1}/100] Deployed a Lambda behind API Gateway"
+        messages.append(gateway.message(content, gateway.user(user_id), log_channel))
+    return messages
+
+
+async def feed(gateway: FakeGateway, messages: list, rate: float) -> None:
+    """Dispatch messages all at once (rate 0) or paced at ``rate`` per second"""
+    start = time.perf_counter()
+    for i, message in enumerate(messages):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        gateway.dispatch_message(message)
+    await gateway.drain()
+
+
+async def morning(gateway: FakeGateway, args) -> int:
+    messages = progress_posts(gateway, args.events, args.users)
+    await feed(gateway, messages, args.rate)
+    return len(messages)
+
+
+async def leaderboard(gateway: FakeGateway, args) -> int:
+    posts = iter(progress_posts(gateway, args.events // 10, args.users))
+    command_channel = gateway.channel(ChannelConfig.ALLOWED_COMMAND_CHANNELS[0])
+    messages = []
+    for i in range(args.events):
+        message = next(posts, None) if i % 10 == 0 else None
+        if message is None:
+            message = gateway.message(
+                "!leaderboard",
+                gateway.user(random.randint(1, args.users)),
+                command_channel,
+            )
+        messages.append(message)
+    await feed(gateway, messages, args.rate)
+    return len(messages)
+
+
+async def reminders(gateway: FakeGateway, args) -> int:
+    for user_id in range(1, args.users + 1):
+        gateway.user(user_id)
+    if not args.rate_limits:
+        bot_core.MessageDispatcher = UnthrottledDispatcher
+    try:
+        await gateway.bot.daily_reminder_check()
+    finally:
+        bot_core.MessageDispatcher = MessageDispatcher
+    return sum(gateway.sends.values())
+
+
+WORKLOADS = {
+    "morning": morning,
+    "leaderboard": leaderboard,
+    "reminders": reminders,
+}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_summary(latencies: List[float]) -> Optional[Dict[str, float]]:
+    if not latencies:
+        return None
+    ordered = sorted(latencies)
+    return {
+        "p50": round(percentile(ordered, 0.50) * 1e3, 3),
+        "p90": round(percentile(ordered, 0.90) * 1e3, 3),
+        "p99": round(percentile(ordered, 0.99) * 1e3, 3),
+        "max": round(ordered[-1] * 1e3, 3),
+        "mean": round(sum(ordered) / len(ordered) * 1e3, 3),
+    }
+
+
+async def run_workload(name: str, args) -> Dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gateway = FakeGateway(
+            os.path.join(tmpdir, "bench.db"),
+            send_latency=args.send_latency / 1e3,
+            commit_latency=args.commit_latency / 1e3,
+        )
+        # Reminder runs need every tier, up to and past removal
+        max_age = ReminderConfig.REMOVE_DAYS + 2 if name == "reminders" else 13
+        seed(gateway.bot.db.manager, args.users, max_age=max_age)
+        await gateway.start()
+        await gateway.add_cog(GeneralCommands)
+        await gateway.add_cog(AdminCommands)
+        gateway.reset_counters()
+        commits = gateway.volume.commits
+        # Hot-path instrumentation only; no endpoint or snapshot task
+        metrics.REGISTRY.reset()
+        metrics.REGISTRY.enabled = args.metrics
+
+        start = time.perf_counter()
+        events = await WORKLOADS[name](gateway, args)
+        duration = time.perf_counter() - start
+        metrics.REGISTRY.enabled = False
+
+        result = {
+            "events": events,
+            "duration_s": round(duration, 4),
+            "throughput_per_s": round(events / duration, 1) if duration else None,
+            "latency_ms": latency_summary(gateway.latencies),
+            "responses": len(gateway.latencies),
+            "unanswered": gateway.unanswered,
+            "errors": gateway.errors,
+            "db_calls_per_event": round(gateway.db_calls / max(1, events), 3),
+            "sql_statements_per_event": round(
+                gateway.sql_statements / max(1, events), 3
+            ),
+            "volume_commits": gateway.volume.commits - commits,
+            "sends": dict(sorted(gateway.sends.items())),
+        }
+        if args.metrics:
+            result["metrics"] = {
+                name: metric["values"]
+                for name, metric in metrics.REGISTRY.snapshot()["metrics"].items()
+                if metric["values"]
+            }
+        await gateway.close()
+    return result
+
+
+async def run(args) -> Dict:
+    results = {}
+    for name in args.workloads:
+        random.seed(args.seed)
+        results[name] = await run_workload(name, args)
+    return results
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="End-to-end bot benchmarks through a fake gateway"
+    )
+    parser.add_argument(
+        "--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS)
+    )
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument(
+        "--events", type=int, default=2_000, help="messages per workload"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0, help="messages/s, 0 for one burst"
+    )
+    parser.add_argument(
+        "--send-latency", type=float, default=0, help="simulated REST ms"
+    )
+    parser.add_argument(
+        "--commit-latency", type=float, default=0, help="simulated volume commit ms"
+    )
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="keep the dispatcher's Discord rate limits in the reminder run",
+    )
+    parser.add_argument(
+        "--metrics", action="store_true", help="enable and report bot metrics"
+    )
+    parser.add_argument("--seed", type=int, default=100)
+    parser.add_argument("--json", metavar="PATH", help="write results ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    report = {
+        "benchmark": "bench_e2e",
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"users={args.users:,} events={args.events:,} rate={args.rate or 'burst'}")
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        latency_text = (
+            f"p50 {latency['p50']:7.2f} ms  p99 {latency['p99']:7.2f} ms"
+            if latency
+            else "(no per-message latency)"
+        )
+        print(
+            f"{name:12} {result['throughput_per_s']:9,.0f} ev/s  {latency_text}  "
+            f"db {result['db_calls_per_event']:.2f} calls "
+            f"{result['sql_statements_per_event']:.1f} stmts/ev  "
+            f"errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench_event_replay.py: post_events insert batching and replay speed
+#
+# Writes a synthetic history (mostly daily progress, some resets, admin
+# actions and rejected posts) through the batched event buffer, then
+# rebuilds user_streaks from it.
+# Usage: python -m benchmarks.bench_event_replay [events] [users]
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot import events
+from bot.database import DatabaseManager
+from bot.volume import NullVolumeBackend
+
+GUILD_ID = 1
+
+
+def history(count: int, users: int):
+    """Plausible event stream; days only move forward except on resets"""
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    days = {}
+    for i in range(count):
+        at = (start + datetime.timedelta(seconds=i * 7)).isoformat()
+        user_id = random.randint(1, users)
+        day = days.get(user_id)
+        r = random.random()
+        if day is None:
+            days[user_id] = 1
+            yield (GUILD_ID, user_id, events.CREATE, at, 1, f"user{user_id}", i, None)
+        elif r < 0.85:
+            days[user_id] = day = min(day + 1, 99)
+            yield (GUILD_ID, user_id, events.PROGRESS, at, day, f"user{user_id}", i, None)
+        elif r < 0.93:
+            yield (GUILD_ID, user_id, events.REJECTED, at, day + 2, None, i, "skipped days")
+        elif r < 0.96:
+            days[user_id] = 1
+            yield (GUILD_ID, user_id, events.RESET, at, None, None, None, None)
+        elif r < 0.98:
+            yield (GUILD_ID, user_id, events.REMINDERS, at, None, None, None, "off")
+        else:
+            yield (GUILD_ID, user_id, events.DEACTIVATE, at, None, None, None, None)
+
+
+def main(count: int = 1_000_000, users: int = 20_000) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DatabaseManager(
+            os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+        )
+        db.init_database()
+
+        stream = list(history(count, users))
+        start = time.perf_counter()
+        for guild_id, user_id, kind, at, day, username, message_id, detail in stream:
+            if db.events.add(
+                guild_id,
+                user_id,
+                kind,
+                at,
+                day=day,
+                username=username,
+                message_id=message_id,
+                detail=detail,
+            ):
+                db.flush_events()
+        db.flush_events()
+        insert_time = time.perf_counter() - start
+        del stream
+
+        # For contrast: one transaction per event, as an unbatched log would do
+        sample = list(history(5_000, users))
+        start = time.perf_counter()
+        for guild_id, user_id, kind, at, day, username, message_id, detail in sample:
+            db.events.add(guild_id, user_id, kind, at, day, username, message_id, detail)
+            db.flush_events()
+        single_time = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        rows = db.replay_events()
+        replay_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = db.restore_from_events()
+        restore_time = time.perf_counter() - start
+        assert restored == len(rows)
+        db.close()
+
+    total = count + len(sample)
+    print(f"events={total:,} users={len(rows):,} batch={db.events.batch_size}")
+    print(
+        f"batched insert: {insert_time / count * 1e6:6.2f} us/event "
+        f"(one transaction per event: {single_time * 1e6:.1f} us)"
+    )
+    print(f"replay:         {replay_time:6.2f} s ({total / replay_time:,.0f} events/s)")
+    print(f"restore:        {restore_time:6.2f} s (replay + table swap)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,112 @@
+# bench_guilds.py: per-guild query latency as the number of guilds grows
+#
+# Fills one database with guilds of equal size in steps and times the
+# per-guild queries after each step. With the (guild_id, ...) indexes the
+# latency should stay flat whether the table holds 10 or 500 guilds.
+#
+# Usage: python -m benchmarks.bench_guilds [guilds] [users_per_guild]
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot.database import DatabaseManager
+from bot.volume import NullVolumeBackend
+
+
+def seed_guilds(db: DatabaseManager, first: int, last: int, users: int) -> None:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with db._pool.writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO user_streaks
+            (guild_id, user_id, username, current_day, last_post_timestamp, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (
+                    guild_id,
+                    uid,
+                    f"user{uid}",
+                    random.randint(1, 99),
+                    (now - datetime.timedelta(minutes=random.randint(0, 20 * 1440))).isoformat(),
+                    now.isoformat(),
+                )
+                for guild_id in range(first, last + 1)
+                # Members overlap between guilds, as they do on Discord
+                for uid in random.sample(range(1, users * 4), users)
+            ),
+        )
+
+
+def time_guild_queries(db: DatabaseManager, guilds: int, samples: int = 200):
+    """Mean ms per call for each per-guild query over random guilds"""
+    picks = [random.randint(1, guilds) for _ in range(samples)]
+    with db._pool.reader() as conn:
+        user_ids = {
+            guild_id: [
+                row[0]
+                for row in conn.execute(
+                    "SELECT user_id FROM user_streaks WHERE guild_id = ? LIMIT 50",
+                    (guild_id,),
+                )
+            ]
+            for guild_id in set(picks)
+        }
+    timings = {}
+
+    def measure(name, call):
+        start = time.perf_counter()
+        for guild_id in picks:
+            call(guild_id)
+        timings[name] = (time.perf_counter() - start) / samples * 1e3
+
+    measure("leaderboard", lambda g: db.get_leaderboard(g, 5))
+    measure("inactive_7d", lambda g: db.get_inactive_users(g, 7))
+    measure(
+        "user_data",
+        lambda g: db.get_user_data(g, random.choice(user_ids[g])),
+    )
+
+    def rank_cold(guild_id):
+        db.ranks[guild_id].reset()  # Time the per-guild load every call
+        db.get_user_rank(guild_id, user_ids[guild_id][0])
+
+    measure("rank_load", rank_cold)
+    measure(
+        "reminder_plan",
+        lambda g: db.get_reminder_plan([], 14, guild_id=g),
+    )
+    return timings
+
+
+def main(guilds: int = 500, users: int = 1_000) -> None:
+    os.environ["USER_CACHE_SIZE"] = "0"  # Time the queries, not the cache
+    steps = sorted({s for s in (10, 100, guilds) if s <= guilds})
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DatabaseManager(
+            os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+        )
+        db.init_database()
+        seeded = 0
+        results = []
+        for step in steps:
+            seed_guilds(db, seeded + 1, step, users)
+            seeded = step
+            results.append((step, time_guild_queries(db, step)))
+        db.close()
+
+    names = list(results[0][1])
+    print(f"users_per_guild={users:,} (ms per call)")
+    print(f"{'guilds':>7} {'rows':>9} " + " ".join(f"{n:>13}" for n in names))
+    for step, timings in results:
+        print(
+            f"{step:>7} {step * users:>9,} "
+            + " ".join(f"{timings[n]:>13.3f}" for n in names)
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,72 @@
+# bench_indexes.py: query plans and timings for the user_streaks indexes
+#
+# Prints the query plans of the leaderboard and inactivity queries, then
+# times them with and without the indexes at several table sizes. That the
+# plans use the covering indexes is checked by tests/test_indexes.py.
+#
+# Usage: python -m benchmarks.bench_indexes [rows ...]
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from bot.database import INACTIVE_USERS_QUERY, LEADERBOARD_QUERY, DatabaseManager
+from bot.volume import NullVolumeBackend
+from benchmarks.bench_db_pool import GUILD_ID, seed
+
+INDEXES = (
+    "idx_user_streaks_guild_leaderboard",
+    "idx_user_streaks_guild_inactivity",
+    "idx_user_streaks_inactivity",
+)
+
+
+def print_plans(db: DatabaseManager, threshold: str) -> None:
+    plans = {
+        "leaderboard": db.explain_query_plan(LEADERBOARD_QUERY, (GUILD_ID, 5)),
+        "inactive": db.explain_query_plan(INACTIVE_USERS_QUERY, (GUILD_ID, threshold)),
+    }
+    for name, plan in plans.items():
+        print(f"  plan[{name}]: {' | '.join(plan)}")
+
+
+def time_queries(db: DatabaseManager, threshold: str, repeat: int = 20):
+    with db._pool.reader() as conn:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(LEADERBOARD_QUERY, (GUILD_ID, 5)).fetchall()
+        leaderboard = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(max(1, repeat // 4)):
+            conn.execute(INACTIVE_USERS_QUERY, (GUILD_ID, threshold)).fetchall()
+        inactive = (time.perf_counter() - start) / max(1, repeat // 4)
+    return leaderboard * 1e3, inactive * 1e3
+
+
+def main(sizes=(10_000, 100_000, 1_000_000)) -> None:
+    threshold = (
+        datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=12)
+    ).isoformat()
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(
+                os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+            )
+            seed(db, rows)
+            print(f"rows={rows:,}")
+            print_plans(db, threshold)
+            indexed = time_queries(db, threshold)
+            with db._pool.writer() as conn:
+                for index in INDEXES:
+                    conn.execute(f"DROP INDEX {index}")
+            scanned = time_queries(db, threshold)
+            db.close()
+        print(
+            f"  leaderboard: {scanned[0]:8.2f} ms -> {indexed[0]:6.3f} ms indexed\n"
+            f"  inactive:    {scanned[1]:8.2f} ms -> {indexed[1]:6.3f} ms indexed"
+        )
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (10_000, 100_000, 1_000_000))
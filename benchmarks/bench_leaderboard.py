@@ -0,0 +1,66 @@
+# bench_leaderboard.py: !leaderboard reads, ORDER BY query vs the snapshot
+#
+# Interleaves progress posts with leaderboard reads (people spam the
+# command at peak times) and checks every snapshot answer against SQL.
+# Usage: python -m benchmarks.bench_leaderboard [users] [reads]
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot.database import LEADERBOARD_QUERY, DatabaseManager
+from bot.volume import NullVolumeBackend
+from benchmarks.bench_db_pool import GUILD_ID, pooled_post, seed
+
+
+def query_leaderboard(db: DatabaseManager, limit: int = 5):
+    """get_leaderboard as it was: query and build dicts on every call"""
+    with db._pool.reader() as conn:
+        rows = conn.execute(LEADERBOARD_QUERY, (GUILD_ID, limit)).fetchall()
+    return [
+        {
+            "user_id": row[0],
+            "username": row[1],
+            "current_day": row[2],
+            "last_post_timestamp": datetime.datetime.fromisoformat(row[3]),
+        }
+        for row in rows
+    ]
+
+
+def main(users: int = 100_000, reads: int = 20_000) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DatabaseManager(
+            os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+        )
+        seed(db, users)
+        # One post for every ten reads, some from the top of the board
+        leaders = [u["user_id"] for u in query_leaderboard(db, 50)]
+        posters = [
+            random.choice(leaders) if random.random() < 0.3 else random.randint(1, users)
+            for _ in range(reads // 10)
+        ]
+
+        def run(read):
+            start = time.perf_counter()
+            for i in range(reads):
+                if i % 10 == 0:
+                    pooled_post(db, posters[i // 10])
+                read()
+            return (time.perf_counter() - start) / reads * 1e6
+
+        queried = run(lambda: query_leaderboard(db))
+        snapshot = run(lambda: db.get_leaderboard(GUILD_ID, 5))
+        assert db.get_leaderboard(GUILD_ID, 5) == query_leaderboard(db)
+        stats = db.leaderboards.stats()
+        db.close()
+
+    print(f"users={users:,} reads={reads:,} posts={len(posters):,}")
+    print(f"query:    {queried:8.1f} us/read (incl. posts)")
+    print(f"snapshot: {snapshot:8.1f} us/read (incl. posts) {stats}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,108 @@
+# bench_metrics_store.py: per-sample write cost as metrics history grows
+#
+# Simulates months of samples in fast-forward through MetricsStore and
+# prints the write cost and table sizes per stretch of history; the bounds
+# and summary accuracy are checked by tests/test_metrics_store.py. For
+# contrast it times the old log_resource_usage approach
+# (copy the whole JSONL file out, append a line, copy it back) at the file
+# sizes hourly sampling reaches over time.
+# Usage: python -m benchmarks.bench_metrics_store [days] [interval_seconds]
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+
+from bot.metrics_store import MetricsStore
+
+METRICS = (
+    "rss_mb",
+    "cpu_percent",
+    "threads",
+    "loop_lag_ms",
+    "tasks",
+    "gc_gen0",
+    "gc_gen1",
+    "gc_gen2",
+)
+START = 1_750_000_000 - 1_750_000_000 % 3600
+
+
+def legacy_append(logs_path: pathlib.Path, sample: dict) -> None:
+    """log_resource_usage's write path before MetricsStore"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = pathlib.Path(tmpdir) / logs_path.name
+        if logs_path.exists():
+            shutil.copyfile(logs_path, tmp_path)
+        with open(tmp_path, "a") as f:
+            f.write(json.dumps(sample) + "\n")
+        shutil.copyfile(tmp_path, logs_path)
+
+
+def legacy_cost(tmpdir: str, hours: int, trials: int = 20) -> float:
+    path = pathlib.Path(tmpdir) / "resource_metrics.json"
+    line = json.dumps(
+        {"timestamp": "2025-01-01T00:00:00", "cpu_percent": 1.5, "memory_mb": 80.2, "threads": 9}
+    )
+    path.write_text((line + "\n") * hours)
+    start = time.perf_counter()
+    for _ in range(trials):
+        legacy_append(path, json.loads(line))
+    return (time.perf_counter() - start) / trials
+
+
+def main(days: int = 90, interval: int = 300) -> None:
+    steps_per_day = 86400 // interval
+    windows = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = MetricsStore(os.path.join(tmpdir, "metrics.db"))
+        window_days = max(1, days // 6)
+        for window in range(0, days, window_days):
+            start = time.perf_counter()
+            steps = 0
+            for day in range(window, min(days, window + window_days)):
+                for step in range(steps_per_day):
+                    ts = START + day * 86400 + step * interval
+                    store.record(
+                        {name: (ts / 7 + i) % 100 for i, name in enumerate(METRICS)},
+                        ts,
+                    )
+                    steps += 1
+            elapsed = time.perf_counter() - start
+            with store._pool.reader() as conn:
+                raw = conn.execute("SELECT COUNT(*) FROM metric_samples").fetchone()[0]
+                rollups = conn.execute(
+                    "SELECT COUNT(*) FROM metric_rollups"
+                ).fetchone()[0]
+            windows.append((window, elapsed / steps, raw, rollups))
+
+        end = START + days * 86400
+        start = time.perf_counter()
+        summary = store.summary("rss_mb", end - 30 * 86400, end)
+        summary_time = time.perf_counter() - start
+        store.close()
+        size = os.path.getsize(os.path.join(tmpdir, "metrics.db"))
+
+        legacy = [
+            (label, legacy_cost(tmpdir, hours))
+            for label, hours in (("1 month", 720), ("1 year", 8760), ("5 years", 43800))
+        ]
+
+    print(f"days={days} interval={interval}s metrics/sample={len(METRICS)}")
+    print("from day   us/write   raw rows   rollup rows")
+    for window, cost, raw, rollups in windows:
+        print(f"{window:8} {cost * 1e6:10.1f} {raw:10,} {rollups:13,}")
+    first, last = windows[0][1], windows[-1][1]
+    print(
+        f"last/first write cost: {last / first:.2f}x, file {size / 1e6:.1f} MB, "
+        f"30-day summary {summary_time * 1e3:.1f} ms {summary}, "
+        f"{store.compactions} compactions"
+    )
+    for label, cost in legacy:
+        print(f"legacy copy-append-copy at {label:8} of hourly samples: {cost * 1e6:8.0f} us/write")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
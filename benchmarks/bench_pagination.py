@@ -0,0 +1,72 @@
+# bench_pagination.py: admin listings, OFFSET pages vs keyset pages vs CSV
+#
+# Usage: python -m benchmarks.bench_pagination [users] [page_size]
+import os
+import sys
+import tempfile
+import time
+
+from bot.database import DatabaseManager
+from bot.pagination import build_csv
+from bot.volume import NullVolumeBackend
+from benchmarks.bench_db_pool import GUILD_ID, seed
+
+OFFSET_QUERY = """
+    SELECT user_id, username, current_day, last_post_timestamp
+    FROM user_streaks
+    WHERE guild_id = ? AND is_active = 1
+    ORDER BY current_day DESC, last_post_timestamp ASC, user_id ASC
+    LIMIT ? OFFSET ?
+"""
+
+
+def main(users: int = 100_000, page_size: int = 10) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DatabaseManager(
+            os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+        )
+        seed(db, users)
+
+        # Walk the whole listing page by page, as an admin clicking Next would
+        start = time.perf_counter()
+        offset_ids = []
+        with db._pool.reader() as conn:
+            for offset in range(0, users, page_size):
+                offset_ids += [
+                    row[0]
+                    for row in conn.execute(
+                        OFFSET_QUERY, (GUILD_ID, page_size, offset)
+                    )
+                ]
+        offset_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        keyset_ids, cursor = [], None
+        while True:
+            rows, cursor = db.get_leaderboard_page(GUILD_ID, page_size, cursor)
+            keyset_ids += [row["user_id"] for row in rows]
+            if cursor is None:
+                break
+        keyset_time = time.perf_counter() - start
+        assert keyset_ids == offset_ids
+
+        start = time.perf_counter()
+        data = build_csv(
+            db.iter_leaderboard(GUILD_ID),
+            ("user_id", "username", "current_day", "last_post_timestamp"),
+        )
+        csv_time = time.perf_counter() - start
+        db.close()
+
+    pages = -(-users // page_size)
+    print(f"users={users:,} pages={pages:,}")
+    print(f"OFFSET pages: {offset_time / pages * 1e3:8.3f} ms/page")
+    print(
+        f"keyset pages: {keyset_time / pages * 1e3:8.3f} ms/page "
+        f"({offset_time / keyset_time:.0f}x)"
+    )
+    print(f"CSV export:   {csv_time:8.2f} s for {len(data) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
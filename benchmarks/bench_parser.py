@@ -0,0 +1,77 @@
+# bench_parser.py: log-message parser vs the original regex-per-call version
+#
+# Usage: python -m benchmarks.bench_parser [messages]
+import random
+import re
+import sys
+import time
+
+from bot.validators import StreakValidator
+
+
+def legacy_parse(content: str):
+    """parse_log_message as it was: uncompiled pattern, strip() every call"""
+    pattern = r"^\[(\d+)/100\]"
+    match = re.match(pattern, content.strip())
+    if match:
+        day = int(match.group(1))
+        if 1 <= day <= 100:
+            return day
+    return None
+
+
+def corpus(size: int):
+    words = "aws iam lambda terraform k8s docs python vpc s3 fixed learned today".split()
+    chatter = [
+        "gm everyone!",
+        "Anyone tried the new AWS free tier?",
+        "lol same",
+        "Great job 🎉",
+        "https://github.com/someone/repo",
+        "@mod can you check this",
+    ]
+    messages = []
+    for _ in range(size):
+        r = random.random()
+        text = " ".join(random.choices(words, k=random.randint(3, 40)))
+        if r < 0.35:
+            messages.append(f"[{random.randint(1, 100)}/100] {text}")
+        elif r < 0.40:
+            messages.append(f"  [{random.randint(1, 100)}/100] {text}\n")
+        elif r < 0.43:
+            messages.append(f"[{random.randint(1, 100)}/75] {text}")
+        elif r < 0.45:
+            messages.append(f"[{random.randint(101, 200)}/100] {text}")
+        else:
+            messages.append(random.choice(chatter) + " " + text)
+    return messages
+
+
+def main(size: int = 1_000_000) -> None:
+    messages = corpus(size)
+    validator = StreakValidator()
+
+    # The bot drops each result right away, so don't keep a million
+    # objects alive here either (that would mostly benchmark the GC)
+    start = time.perf_counter()
+    legacy_accepted = sum(legacy_parse(m) is not None for m in messages)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    accepted = sum(validator.parse_log_entry(m) is not None for m in messages)
+    parser_time = time.perf_counter() - start
+
+    assert legacy_accepted == accepted
+    for m in messages[:10_000]:
+        entry = validator.parse_log_entry(m)
+        assert legacy_parse(m) == (entry.day if entry else None), m
+    print(f"messages={size:,} accepted={accepted:,}")
+    print(f"legacy: {legacy_time / size * 1e9:7.0f} ns/message")
+    print(
+        f"parser: {parser_time / size * 1e9:7.0f} ns/message "
+        f"({legacy_time / parser_time:.1f}x, with structured output)"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,61 @@
+# bench_rank.py: !myrank via full leaderboard scan vs the rank index
+#
+# Usage: python -m benchmarks.bench_rank [users] [lookups]
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot.database import DatabaseManager
+from bot.volume import NullVolumeBackend
+from benchmarks.bench_db_pool import GUILD_ID, seed
+
+
+def scan_rank(db: DatabaseManager, user_id: int, users: int):
+    """The old approach, with the limit raised so it is at least correct"""
+    leaderboard = db.get_leaderboard(GUILD_ID, limit=users)
+    return next(
+        (i for i, u in enumerate(leaderboard, 1) if u["user_id"] == user_id),
+        None,
+    )
+
+
+def main(users: int = 100_000, lookups: int = 1_000) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DatabaseManager(
+            os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+        )
+        seed(db, users)
+        ids = [random.randint(1, users) for _ in range(lookups)]
+
+        scans = max(1, lookups // 100)
+        start = time.perf_counter()
+        for uid in ids[:scans]:
+            expected = scan_rank(db, uid, users)
+            assert db.get_user_rank(GUILD_ID, uid) == expected
+        scan = (time.perf_counter() - start) / scans
+
+        start = time.perf_counter()
+        db.ranks.reset()
+        db.get_user_rank(GUILD_ID, ids[0])
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for uid in ids:
+            db.get_user_rank(GUILD_ID, uid)
+            # Interleave progress writes so the index is exercised too
+            db.update_user_progress(
+                GUILD_ID, uid, f"user{uid}", random.randint(1, 99)
+            )
+        indexed = (time.perf_counter() - start) / lookups
+        db.close()
+
+    print(f"users={users}")
+    print(f"leaderboard scan:     {scan * 1e3:9.2f} ms/lookup")
+    print(f"rank index (load):    {load * 1e3:9.2f} ms once")
+    print(f"rank index + update:  {indexed * 1e3:9.3f} ms/lookup")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,89 @@
+# bench_reminder_plan.py: single-query reminder plan vs four inactivity queries
+#
+# Times both approaches; tests/test_reminder_plan.py checks they bucket the
+# same users.
+# Usage: python -m benchmarks.bench_reminder_plan [users]
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot.database import DatabaseManager
+from bot.reminders import ReminderPlan, ReminderTier
+from bot.volume import NullVolumeBackend
+from benchmarks.bench_db_pool import GUILD_ID
+
+TIERS = [
+    ReminderTier("gentle", 3, ""),
+    ReminderTier("firm", 5, ""),
+    ReminderTier("warning", 7, "", public=True),
+]
+REMOVE_DAYS = 14
+
+
+def seed(db: DatabaseManager, users: int) -> None:
+    db.init_database()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with db._pool.writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO user_streaks
+            (guild_id, user_id, username, current_day, last_post_timestamp, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (
+                    GUILD_ID,
+                    uid,
+                    f"user{uid}",
+                    random.randint(1, 99),
+                    (now - datetime.timedelta(minutes=random.randint(0, 20 * 1440))).isoformat(),
+                    now.isoformat(),
+                )
+                for uid in range(1, users + 1)
+            ),
+        )
+
+
+def legacy_plan(db: DatabaseManager):
+    """The old daily_reminder_check selection logic"""
+    buckets = {}
+    for tier in TIERS:
+        for user_data in db.get_inactive_users(GUILD_ID, tier.days):
+            days_inactive = (
+                datetime.datetime.now(datetime.timezone.utc)
+                - user_data["last_post_timestamp"]
+            ).days
+            if days_inactive == tier.days:
+                buckets.setdefault(tier.name, set()).add(user_data["user_id"])
+    buckets[ReminderPlan.REMOVE] = {
+        u["user_id"] for u in db.get_inactive_users(GUILD_ID, REMOVE_DAYS)
+    }
+    return buckets
+
+
+def main(users: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = DatabaseManager(
+            os.path.join(tmpdir, "bench.db"), volume_backend=NullVolumeBackend()
+        )
+        seed(db, users)
+
+        start = time.perf_counter()
+        legacy_plan(db)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plan = db.get_reminder_plan(TIERS, REMOVE_DAYS)
+        plan_time = time.perf_counter() - start
+        db.close()
+
+    print(f"users={users} plan={plan.counts()}")
+    print(f"four queries: {legacy_time * 1e3:8.1f} ms")
+    print(f"single plan:  {plan_time * 1e3:8.1f} ms ({legacy_time / plan_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
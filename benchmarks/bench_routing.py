@@ -0,0 +1,114 @@
+# bench_routing.py: per-message on_message overhead, name vs ID routing
+#
+# Usage: python -m benchmarks.bench_routing [messages]
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DB_PATH", ":memory:")
+
+from bot.bot_core import HundredDoCBot  # noqa: E402
+from bot.config import ChannelConfig  # noqa: E402
+
+
+def fake_guild(guild_id: int, extra_channels: int = 50):
+    names = [ChannelConfig.LOGGING_CHANNEL, *ChannelConfig.ALLOWED_COMMAND_CHANNELS]
+    names += [f"channel-{i}" for i in range(extra_channels)]
+    channels = [
+        SimpleNamespace(id=guild_id * 1000 + i, name=name, guild=None)
+        for i, name in enumerate(names)
+    ]
+    guild = SimpleNamespace(id=guild_id, channels=channels)
+    for channel in channels:
+        channel.guild = guild
+    return guild
+
+
+def corpus(state, channels, size: int):
+    human = SimpleNamespace(id=1, bot=False)
+    bot_user = SimpleNamespace(id=2, bot=True)
+    messages = []
+    for _ in range(size):
+        r = random.random()
+        author = human
+        if r < 0.05:
+            content = "!status"
+        elif r < 0.08:
+            content, author = "beep", bot_user
+        else:
+            content = "just chatting about lambda cold starts"
+        messages.append(
+            SimpleNamespace(
+                content=content,
+                author=author,
+                channel=random.choice(channels),
+                guild=None,
+                id=0,
+                _state=state,
+            )
+        )
+    return messages
+
+
+async def legacy_on_message(bot, message):
+    """on_message as it was: channel name compare, always process_commands"""
+    if message.author.bot:
+        return
+    if message.channel.name == ChannelConfig.LOGGING_CHANNEL:
+        await bot.handle_log_message(message)
+    await bot.process_commands(message)
+
+
+async def run(size: int) -> None:
+    bot = HundredDoCBot()
+    bot._connection.user = SimpleNamespace(id=0)
+    routed = {"log": 0, "command": 0}
+
+    async def handle_log_message(message):
+        routed["log"] += 1
+
+    async def invoke(ctx):
+        if ctx.prefix is not None:
+            routed["command"] += 1
+
+    bot.handle_log_message = handle_log_message
+    bot.invoke = invoke
+
+    guilds = [fake_guild(g) for g in range(1, 6)]
+    for guild in guilds:
+        ChannelConfig.resolve_guild(guild)
+    messages = corpus(
+        bot._connection, [c for g in guilds for c in g.channels], size
+    )
+
+    start = time.perf_counter()
+    for message in messages:
+        await legacy_on_message(bot, message)
+    legacy_time = time.perf_counter() - start
+    legacy_routed = dict(routed)
+
+    routed.update(log=0, command=0)
+    start = time.perf_counter()
+    for message in messages:
+        await bot.on_message(message)
+    routed_time = time.perf_counter() - start
+
+    assert routed == legacy_routed
+    print(f"messages={size:,} log_posts={routed['log']:,}")
+    print(f"legacy: {legacy_time / size * 1e9:7.0f} ns/message")
+    print(
+        f"routed: {routed_time / size * 1e9:7.0f} ns/message "
+        f"({legacy_time / routed_time:.1f}x)"
+    )
+    bot.db.close()
+
+
+def main(size: int = 200_000) -> None:
+    asyncio.run(run(size))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,48 @@
+# bench_user_cache.py: per-post latency with and without the user-state cache
+#
+# Usage: python -m benchmarks.bench_user_cache [users] [posts]
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot.database import DatabaseManager
+from bot.volume import NullVolumeBackend
+from benchmarks.bench_db_pool import GUILD_ID, pooled_post, seed
+
+
+def run(db_path: str, cache_size: int, ids) -> float:
+    os.environ["USER_CACHE_SIZE"] = str(cache_size)
+    db = DatabaseManager(db_path, volume_backend=NullVolumeBackend())
+    # Warm up: the first post from each user is always a miss
+    for uid in set(ids):
+        db.get_user_data(GUILD_ID, uid)
+    start = time.perf_counter()
+    for uid in ids:
+        pooled_post(db, uid)
+        # !status / !myrank style re-read of the same row
+        db.get_user_data(GUILD_ID, uid)
+    elapsed = time.perf_counter() - start
+    print(f"cache_size={cache_size:<6} {db.cache.stats()}")
+    db.close()
+    return elapsed / len(ids) * 1e6
+
+
+def main(users: int = 50_000, posts: int = 5_000) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        db = DatabaseManager(db_path, volume_backend=NullVolumeBackend())
+        seed(db, users)
+        db.close()
+        # A realistic day: a few thousand active posters, some of them chatty
+        active = random.sample(range(1, users + 1), min(users, 2_000))
+        ids = [random.choice(active) for _ in range(posts)]
+        uncached = run(db_path, 0, ids)
+        cached = run(db_path, 10_000, ids)
+    print(f"uncached: {uncached:.1f} us/post")
+    print(f"cached:   {cached:.1f} us/post ({uncached / cached:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,282 @@
+# fake_gateway.py: offline stand-ins for the Discord gateway and REST objects
+#
+# FakeGateway feeds events into a real HundredDoCBot through
+# ``Client.dispatch``, the same entry point the websocket uses, so every
+# event runs as its own task exactly as in production. Channels, users and
+# messages only implement what the bot and its cogs call; their REST
+# methods record the response (optionally after a simulated round-trip)
+# instead of talking to Discord.
+import asyncio
+import functools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from discord.ext import commands
+
+from bot.async_database import AsyncDatabaseManager
+from bot.bot_core import HundredDoCBot
+from bot.config import ChannelConfig
+from bot.database import DatabaseManager
+from bot.volume import NullVolumeBackend
+
+
+class SlowVolumeBackend(NullVolumeBackend):
+    """Null backend whose commits take ``latency`` seconds, like a real volume"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+
+    def commit(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        super().commit()
+
+
+class FakeUser:
+    def __init__(self, gateway: "FakeGateway", user_id: int, name: str, bot=False):
+        self._gateway = gateway
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self) -> str:
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        return await self._gateway.deliver("dm", None, content, kwargs)
+
+
+class FakeChannel:
+    def __init__(self, gateway: "FakeGateway", channel_id: int, name: str, guild):
+        self._gateway = gateway
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, content=None, *, reference=None, **kwargs):
+        return await self._gateway.deliver(
+            f"channel:{self.id}", reference, content, kwargs
+        )
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.channels: List[FakeChannel] = []
+        self.members: Dict[int, FakeUser] = {}
+
+    def get_member(self, user_id: int) -> Optional[FakeUser]:
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        for channel in self.channels:
+            if channel.id == channel_id:
+                return channel
+        return None
+
+
+class FakeMessage:
+    def __init__(self, gateway, message_id, content, author, channel):
+        self._gateway = gateway
+        self._state = gateway.bot._connection
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.attachments = []
+        self.reactions: List[str] = []
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, reference=self, **kwargs)
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+        return await self._gateway.deliver("reaction", self, emoji, {})
+
+
+class FakeContext(commands.Context):
+    """Context whose ``send`` posts to the fake channel, tagged with the
+    invoking message so the gateway can time the response"""
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, reference=self.message, **kwargs)
+
+
+class FakeGateway:
+    """A HundredDoCBot wired to fake guilds, users and a private database
+
+    ``dispatch_message`` stamps the message and hands it to the bot; the
+    first REST call that references it (reply, reaction or command output)
+    completes it, and its latency is recorded. ``db_calls`` counts hops to
+    the database executor and ``sql_statements`` every statement SQLite ran.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        guilds: int = 1,
+        send_latency: float = 0.0,
+        commit_latency: float = 0.0,
+        manager_class=DatabaseManager,
+    ):
+        self.send_latency = send_latency
+        self.volume = SlowVolumeBackend(commit_latency)
+        self.bot = HundredDoCBot()
+        self.bot.db = AsyncDatabaseManager(
+            manager_class(db_path, volume_backend=self.volume)
+        )
+        self.bot.github_poller.db = self.bot.db
+        self.bot.get_context = functools.partial(
+            HundredDoCBot.get_context, self.bot, cls=FakeContext
+        )
+        self.bot.on_error = self._on_error
+        self.bot_user = FakeUser(self, 10**15, "100DoC-bot", bot=True)
+        self.bot._connection.user = self.bot_user
+        self.guilds = [self._make_guild(g) for g in range(1, guilds + 1)]
+        # Strong references: the client's user cache only holds weak ones
+        self.users: Dict[int, FakeUser] = {}
+        self._next_id = 10**12
+        self._dispatched: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self.sends: Dict[str, int] = {}
+        # (kind, referenced message, content) of every REST call
+        self.sent: List[Tuple[str, object, object]] = []
+        self.errors = 0
+        self.db_calls = 0
+        self._statements = 0
+        self._statement_lock = threading.Lock()
+        self._count_calls()
+
+    def _make_guild(self, guild_id: int) -> FakeGuild:
+        guild = FakeGuild(guild_id)
+        names = [ChannelConfig.LOGGING_CHANNEL, *ChannelConfig.ALLOWED_COMMAND_CHANNELS]
+        guild.channels = [
+            FakeChannel(self, guild_id * 1000 + i, name, guild)
+            for i, name in enumerate(names)
+        ]
+        return guild
+
+    def _count_calls(self) -> None:
+        db = self.bot.db
+        run = db.run
+
+        async def counted_run(func, *args, **kwargs):
+            self.db_calls += 1
+            return await run(func, *args, **kwargs)
+
+        # AsyncDatabaseManager.__getattr__ looks ``run`` up on the instance
+        db.run = counted_run
+        pool = db.manager._pool
+        connect = pool.connect
+
+        def traced_connect():
+            conn = connect()
+            conn.set_trace_callback(self._trace)
+            return conn
+
+        pool.connect = traced_connect
+
+    def _trace(self, statement: str) -> None:
+        with self._statement_lock:
+            self._statements += 1
+
+    @property
+    def sql_statements(self) -> int:
+        return self._statements
+
+    async def _on_error(self, event_method, *args, **kwargs):
+        self.errors += 1
+
+    async def start(self) -> None:
+        """Run the bot's startup path, minus the websocket"""
+        await self.bot._async_setup_hook()
+        await self.bot.setup_hook()
+        for guild in self.guilds:
+            self.bot._connection._guilds[guild.id] = guild
+            await self.bot.on_guild_join(guild)
+
+    async def close(self) -> None:
+        for guild in self.guilds:
+            ChannelConfig.forget_guild(guild.id)
+        if self.bot.watchdog is not None:
+            await self.bot.watchdog.stop()
+        if self.bot.sampler is not None:
+            await self.bot.sampler.stop()
+        await self.bot.github.close()
+        await asyncio.get_running_loop().run_in_executor(None, self.bot.db.close)
+
+    def add_cog(self, cog_class):
+        return self.bot.add_cog(cog_class(self.bot))
+
+    def user(self, user_id: int, guild: Optional[FakeGuild] = None) -> FakeUser:
+        """A cached user (and member of ``guild``, default the first)"""
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = FakeUser(self, user_id, f"user{user_id}")
+            self.bot._connection._users[user_id] = user
+            (guild or self.guilds[0]).members[user_id] = user
+        return user
+
+    def channel(self, name: str, guild: Optional[FakeGuild] = None) -> FakeChannel:
+        for channel in (guild or self.guilds[0]).channels:
+            if channel.name == name:
+                return channel
+        raise KeyError(name)
+
+    def message(self, content: str, author: FakeUser, channel: FakeChannel):
+        self._next_id += 1
+        return FakeMessage(self, self._next_id, content, author, channel)
+
+    def dispatch_message(self, message: FakeMessage) -> None:
+        self._dispatched[message.id] = time.perf_counter()
+        self.bot.dispatch("message", message)
+
+    async def deliver(self, route: str, reference, content, kwargs):
+        """A REST call from the bot: wait out the round-trip, record it"""
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        kind = route.split(":", 1)[0]
+        self.sends[kind] = self.sends.get(kind, 0) + 1
+        self.sent.append((kind, reference, content))
+        if reference is not None:
+            started = self._dispatched.pop(reference.id, None)
+            if started is not None:
+                self.latencies.append(time.perf_counter() - started)
+        return reference
+
+    @property
+    def unanswered(self) -> int:
+        """Dispatched messages the bot has not responded to (yet)"""
+        return len(self._dispatched)
+
+    async def drain(self) -> None:
+        """Wait until every dispatched event handler has finished"""
+        current = asyncio.current_task()
+        while True:
+            pending = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not current
+                and not task.done()
+                and task.get_name().startswith("discord.py:")
+            ]
+            if not pending:
+                return
+            await asyncio.wait(pending)
+
+    def reset_counters(self) -> None:
+        self._dispatched.clear()
+        self.latencies = []
+        self.sends = {}
+        self.sent = []
+        self.errors = 0
+        self.db_calls = 0
+        with self._statement_lock:
+            self._statements = 0
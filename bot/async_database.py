@@ -0,0 +1,77 @@
+# async_database.py: AsyncDatabaseManager class
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from . import metrics
+from .database import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    """Awaitable facade over DatabaseManager that keeps SQLite off the event loop
+
+    Every public DatabaseManager method is available under the same name and
+    signature, but returns a coroutine. Calls run on a dedicated thread pool;
+    at most ``max_pending`` calls may be queued or running at once, further
+    callers wait on the event loop instead of piling up work in the executor.
+    """
+
+    def __init__(
+        self,
+        manager: Optional[DatabaseManager] = None,
+        max_workers: Optional[int] = None,
+        max_pending: int = 256,
+    ):
+        self.manager = manager if manager is not None else DatabaseManager()
+        if max_workers is None:
+            # One thread per pooled reader plus one for the writer
+            max_workers = self.manager._pool.max_readers + 1
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+        self._slots = asyncio.Semaphore(max_pending)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database executor"""
+        call = functools.partial(func, *args, **kwargs)
+        if metrics.REGISTRY.enabled:
+            # Queue time starts here, so it includes waiting for a slot
+            call = functools.partial(
+                _timed_call,
+                call,
+                getattr(func, "__name__", "call"),
+                time.perf_counter(),
+            )
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, call)
+
+    def __getattr__(self, name):
+        attr = getattr(self.manager, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    def close(self):
+        """Wait for queued calls to finish, then close the connection pool"""
+        self._executor.shutdown(wait=True)
+        self.manager.close()
+
+
+def _timed_call(call, method: str, submitted: float):
+    """Runs on the executor thread: queue wait and run time of one call"""
+    start = time.perf_counter()
+    metrics.DB_QUEUE_SECONDS.observe(start - submitted, method)
+    try:
+        return call()
+    except Exception:
+        metrics.DB_ERRORS.inc(method)
+        raise
+    finally:
+        metrics.DB_CALL_SECONDS.observe(time.perf_counter() - start, method)
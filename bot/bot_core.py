@@ -1,12 +1,35 @@
 # bot_core.py: HundredDoCBot class
+import asyncio
 import discord
 from discord.ext import commands, tasks
 import datetime
+import functools
 import logging
 import os
-from .config import ChannelConfig
+import time
+import weakref
+from . import metrics
+from .config import (
+    ChallengeConfig,
+    ChannelConfig,
+    GitHubConfig,
+    MetricsConfig,
+    ReminderConfig,
+    WatchdogConfig,
+)
 from .database import DatabaseManager
+from .async_database import AsyncDatabaseManager
+from .dispatch import MessageDispatcher
+from .metrics_store import MetricsStore
+from .migrations import UNASSIGNED_GUILD_ID
+from .github import GitHubClient
+from .github_poller import RepoActivityPoller
+from .leaderboard import RenderCache
+from .sampler import ResourceSampler
+from .users import UserResolver
 from .validators import StreakValidator
+from .volume import default_backend
+from .watchdog import LoopWatchdog
 
 logger = logging.getLogger(__name__)
 
@@ -19,35 +42,235 @@ class HundredDoCBot(commands.Bot):
         intents.message_content = True
         super().__init__(command_prefix="!", intents=intents)
         # Use the DB_PATH environment variable which is set in run_bot()
-        self.db = DatabaseManager(os.environ.get("DB_PATH", "/data/streaks.db"))
-        self.validator = StreakValidator()
+        # Database calls run on a worker thread so a slow disk or a locked
+        # database never stalls the gateway heartbeat
+        self.db = AsyncDatabaseManager(
+            DatabaseManager(os.environ.get("DB_PATH", "/data/streaks.db"))
+        )
+        self.validator = StreakValidator(ChallengeConfig.LENGTHS)
+        # Per-user locks; entries disappear once no handler holds them
+        self._user_locks = weakref.WeakValueDictionary()
+        self.user_resolver = UserResolver(self)
+        # Rendered !leaderboard embeds, reused until the top rows change
+        self.leaderboard_embeds = RenderCache()
+        # Shared HTTP session and response cache for GitHub API calls
+        self.github = GitHubClient(token=GitHubConfig.TOKEN)
+        self.github_poller = RepoActivityPoller(
+            self.db, self.github, concurrency=GitHubConfig.POLL_CONCURRENCY
+        )
+        self.metrics_server = None
+        self.sampler = None
+        self.watchdog = None
         self.remove_command("help")
 
+    async def setup_hook(self):
+        # Idempotent: creates missing tables and applies migrations
+        await self.db.init_database()
+        await self.github.start()
+        if WatchdogConfig.STALL_MS > 0:
+            # Synchronous work in handlers shows up here as stalls
+            self.watchdog = LoopWatchdog(
+                threshold=WatchdogConfig.STALL_MS / 1e3,
+                interval=WatchdogConfig.INTERVAL_MS / 1e3,
+                asyncio_debug=WatchdogConfig.ASYNCIO_DEBUG,
+            )
+            self.watchdog.start()
+        if MetricsConfig.SAMPLE_SECONDS > 0 and (
+            MetricsConfig.STORE_PATH or metrics.REGISTRY.enabled
+        ):
+            self._start_sampler()
+        if metrics.REGISTRY.enabled:
+            await self._start_metrics()
+
+    def _start_sampler(self):
+        store = volume = None
+        if MetricsConfig.STORE_PATH:
+            store = MetricsStore(MetricsConfig.STORE_PATH)
+        if MetricsConfig.STORE_VOLUME:
+            volume = default_backend(MetricsConfig.STORE_VOLUME)
+        self.sampler = ResourceSampler(
+            store,
+            interval=MetricsConfig.SAMPLE_SECONDS,
+            flush_every=MetricsConfig.SAMPLE_FLUSH,
+            volume_backend=volume,
+        )
+        self.sampler.start()
+
+    async def _start_metrics(self):
+        self._instrument_http()
+        registry = metrics.REGISTRY
+        # Components that already keep stats are read at scrape time
+        registry.gauge(
+            "bot_volume_commits", "Volume commit scheduler stats", self.db.volume.stats
+        )
+        registry.gauge("bot_user_cache", "User state cache stats", self.db.cache.stats)
+        registry.gauge(
+            "bot_leaderboard_snapshots",
+            "Leaderboard snapshot stats",
+            self.db.leaderboards.stats,
+        )
+        registry.gauge(
+            "bot_leaderboard_embeds",
+            "Rendered !leaderboard embed cache stats",
+            self.leaderboard_embeds.stats,
+        )
+        registry.gauge("bot_event_log", "post_events buffer stats", self.db.events.stats)
+        registry.gauge("bot_github_client", "GitHub client stats", self.github.stats)
+        registry.gauge(
+            "bot_user_locks", "Per-user locks held", lambda: len(self._user_locks)
+        )
+        if self.sampler is not None:
+            registry.gauge(
+                "bot_process",
+                "Latest resource sample of the bot process",
+                lambda: self.sampler.latest,
+            )
+        if self.watchdog is not None:
+            registry.gauge(
+                "bot_loop_watchdog", "Loop watchdog stats", self.watchdog.stats
+            )
+        if MetricsConfig.PORT:
+            self.metrics_server = metrics.MetricsServer(
+                registry, MetricsConfig.HOST, MetricsConfig.PORT
+            )
+            await self.metrics_server.start()
+        if MetricsConfig.SNAPSHOT_PATH:
+            self.write_metrics_snapshot.start()
+
+    def _instrument_http(self):
+        """Time every Discord REST call (sends, replies, reactions, fetches)"""
+        request = self.http.request
+
+        async def timed_request(route, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await request(route, **kwargs)
+            except Exception as e:
+                metrics.DISCORD_REQUEST_ERRORS.inc(
+                    route.path, str(getattr(e, "status", "error"))
+                )
+                raise
+            finally:
+                metrics.DISCORD_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start, route.method, route.path
+                )
+
+        self.http.request = timed_request
+
     async def on_ready(self):
         logger.info(f"{self.user} has connected to Discord!")
+        for guild in self.guilds:
+            ChannelConfig.resolve_guild(guild)
+        if len(self.guilds) == 1:
+            # Data from before per-guild partitioning belongs to this guild
+            adopted = await self.db.adopt_unassigned_rows(self.guilds[0].id)
+            if adopted:
+                logger.info(
+                    f"Adopted {adopted} unassigned rows into guild "
+                    f"{self.guilds[0].id}"
+                )
         if not self.daily_reminder_check.is_running():
             self.daily_reminder_check.start()
+        if not self.poll_github_activity.is_running():
+            self.poll_github_activity.start()
 
     async def on_message(self, message):
         if message.author.bot:
             return
-        if ChannelConfig.is_logging_channel(message.channel.name):
+        if ChannelConfig.is_logging_channel(message.channel):
             await self.handle_log_message(message)
+        elif not message.content.startswith(self.command_prefix):
+            return  # Ordinary chatter in an unrelated channel
         await self.process_commands(message)
 
+    # Keep ChannelConfig's name -> ID maps in step with the guilds' channels
+    async def on_guild_join(self, guild):
+        ChannelConfig.resolve_guild(guild)
+
+    async def on_guild_remove(self, guild):
+        ChannelConfig.forget_guild(guild.id)
+
+    # An outage hides a guild's channels until it is available again
+    async def on_guild_available(self, guild):
+        ChannelConfig.resolve_guild(guild)
+
+    async def on_guild_unavailable(self, guild):
+        ChannelConfig.forget_guild(guild.id)
+
+    async def on_guild_channel_create(self, channel):
+        ChannelConfig.resolve_guild(channel.guild)
+
+    async def on_guild_channel_delete(self, channel):
+        ChannelConfig.resolve_guild(channel.guild)
+
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name:
+            ChannelConfig.resolve_guild(after.guild)
+
+    def guild_key(self, guild) -> int:
+        """Partition key for a command's guild
+
+        DMs map to the bot's only guild, or to the unassigned partition
+        when it is in several and the guild is ambiguous.
+        """
+        if guild is not None:
+            return guild.id
+        if len(self.guilds) == 1:
+            return self.guilds[0].id
+        return UNASSIGNED_GUILD_ID
+
     async def handle_log_message(self, message):
-        day_number = self.validator.parse_log_message(message.content)
-        if day_number is None:
+        entry = self.validator.parse_log_entry(message.content)
+        if entry is None:
+            if metrics.REGISTRY.enabled:
+                metrics.LOG_MESSAGES.inc("ignored")
             return
+        key = (self.guild_key(message.guild), message.author.id)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            # Serialize posts per user so concurrent or redelivered events
+            # can't both read the same current_day; other users proceed in
+            # parallel
+            async with self._user_lock(key):
+                if not await self.db.claim_message(message.id, message.author.id):
+                    outcome = "duplicate"  # E.g. a redelivered event
+                    return
+                await self._process_log_post(message, entry)
+                outcome = "processed"
+        finally:
+            if metrics.REGISTRY.enabled:
+                metrics.LOG_MESSAGES.inc(outcome)
+                metrics.LOG_MESSAGE_SECONDS.observe(time.perf_counter() - start)
+
+    def _user_lock(self, key) -> asyncio.Lock:
+        lock = self._user_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[key] = lock
+        return lock
+
+    async def _process_log_post(self, message, entry):
+        day_number = entry.day
+        guild_id = self.guild_key(message.guild)
         user_id = message.author.id
         username = str(message.author)
-        user_data = self.db.get_user_data(user_id)
+        user_data = await self.db.get_user_data(guild_id, user_id)
         is_new_user = user_data is None
         current_day = 0 if is_new_user else user_data["current_day"]
+        # A user's total is fixed by their [1/N] post, so another accepted
+        # total can't be used to finish early
         is_valid, validation_msg = self.validator.is_valid_progression(
-            current_day, day_number, is_new_user
+            current_day,
+            day_number,
+            is_new_user,
+            total=entry.total,
+            challenge_length=None if is_new_user else user_data["challenge_length"],
         )
         if not is_valid:
+            await self.db.record_rejected_post(
+                guild_id, user_id, day_number, message.id, validation_msg
+            )
             await message.reply(f"❌ {validation_msg}")
             return
         if not is_new_user:
@@ -55,27 +278,41 @@ class HundredDoCBot(commands.Bot):
                 user_data["last_post_timestamp"]
             )
             if not time_valid:
+                await self.db.record_rejected_post(
+                    guild_id, user_id, day_number, message.id, time_msg
+                )
                 await message.reply(f"⏰ {time_msg}")
                 return
         if is_new_user:
-            success = self.db.create_user(user_id, username)
+            success = await self.db.create_user(
+                guild_id,
+                user_id,
+                username,
+                message_id=message.id,
+                challenge_length=entry.total,
+            )
         else:
-            success = self.db.update_user_progress(
-                user_id, username, day_number
+            success = await self.db.update_user_progress(
+                guild_id,
+                user_id,
+                username,
+                day_number,
+                completed=entry.is_final_day,
+                message_id=message.id,
             )
         if success:
-            if day_number == 100:
-                self.db.archive_to_hof(user_id, username)
+            if entry.is_final_day:
+                await self.db.archive_to_hof(guild_id, user_id, username)
 
                 await message.reply(
                     f"🎉 **CONGRATULATIONS {username}!** 🎉\n"
-                    f"You've completed the 100 Days of Cloud challenge! "
+                    f"You've completed the {entry.total} Days of Cloud challenge! "
                     f"What an incredible achievement! ✨"
                     f"Welcome to the Hall of Fame! 🏆"
                 )
             else:
                 await message.add_reaction("✅")
-                if day_number % 10 == 0 and day_number < 100:
+                if day_number % 10 == 0 and day_number < entry.total:
                     await message.reply(
                         f"🔥 Milestone reached! Day {day_number} - Keep going strong! 💪"
                     )
@@ -89,88 +326,188 @@ class HundredDoCBot(commands.Bot):
     )
     async def daily_reminder_check(self):
         try:
-            logging_channel = None
-            for guild in self.guilds:
-                for channel in guild.channels:
-                    if ChannelConfig.is_logging_channel(channel.name):
-                        logging_channel = channel
-                        break
-                if logging_channel:
-                    break
-            if not logging_channel:
+            # Persist any coalesced writes before the job reads and deactivates
+            await self.db.flush_volume()
+            logger.info(f"Volume commit stats: {self.db.volume.stats()}")
+            logger.info(f"User cache stats: {self.db.cache.stats()}")
+            logger.info(
+                f"Leaderboard stats: snapshots {self.db.leaderboards.stats()}, "
+                f"embeds {self.leaderboard_embeds.stats()}"
+            )
+            await self.db.prune_processed_messages(days=7)
+            logging_channels = ChannelConfig.logging_channels()
+            if not logging_channels:
                 logger.warning(
                     "Could not find #100-days-log channel for reminders"
                 )
                 return
-            reminders = [
-                (
-                    3,
-                    "gentle",
-                    "🌟 Hey there! Just a friendly reminder to log your coding progress. Keep up the great work!",
-                ),
-                (
-                    5,
-                    "firm",
-                    "⚠️ You haven't posted in 5 days. Don't break your streak now - you've got this!",
-                ),
-                (
-                    7,
-                    "warning",
-                    "🚨 **7 days without posting!** Your streak is at risk. Please post your progress soon!",
-                ),
-            ]
-            for days, reminder_type, message in reminders:
-                inactive_users = self.db.get_inactive_users(days)
-                for user_data in inactive_users:
-                    if not user_data.get("reminders_enabled", True):
-                        continue  # Skip users with reminders disabled
-                    days_inactive = (
-                        datetime.datetime.now(datetime.timezone.utc)
-                        - user_data["last_post_timestamp"]
-                    ).days
-                    if days_inactive == days:
-                        try:
-                            user = await self.fetch_user(user_data["user_id"])
-                            if reminder_type == "warning":
-                                await logging_channel.send(
-                                    f"{message} {user.mention} - Currently on day {user_data['current_day']}"
-                                )
-                            else:
-                                await user.send(
-                                    f"{message}\n\n"
-                                    f"You're currently on day {user_data['current_day']} of your 100-day challenge. "
-                                    f"Post in #{ChannelConfig.LOGGING_CHANNEL} to continue your streak!"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to send reminder to user {user_data['user_id']}: {e}"
-                            )
-            very_inactive = self.db.get_inactive_users(14)
-            for user_data in very_inactive:
-                self.db.deactivate_user(user_data["user_id"])
-                try:
-                    user = await self.fetch_user(user_data["user_id"])
-                    await logging_channel.send(
-                        f"💔 {user.mention} has been removed from tracking after 14 days of inactivity. "
-                        f"You can restart anytime with [1/100]!"
+            remove_days = ReminderConfig.REMOVE_DAYS
+            plan = await self.db.get_reminder_plan(
+                ReminderConfig.tiers(), remove_days
+            )
+            logger.info(f"Reminder plan: {plan.counts()}")
+            self.user_resolver.reset_stats()
+            await self.user_resolver.prefetch(
+                (user_data["guild_id"], user_data["user_id"])
+                for tier in plan.tiers
+                for user_data in plan.users(tier.name)
+                if user_data["reminders_enabled"]
+            )
+            await self.user_resolver.prefetch(
+                (user_data["guild_id"], user_data["user_id"])
+                for user_data in plan.removals
+            )
+            dispatcher = MessageDispatcher(
+                concurrency=ReminderConfig.SEND_CONCURRENCY
+            )
+            for tier in plan.tiers:
+                for user_data in plan.users(tier.name):
+                    if not user_data["reminders_enabled"]:
+                        dispatcher.skip()  # Users with reminders disabled
+                        continue
+                    logging_channel = self._logging_channel_for(
+                        user_data, logging_channels
+                    )
+                    route = (
+                        f"channel:{logging_channel.id}"
+                        if tier.public and logging_channel is not None
+                        else "dm"
                     )
-                    try:
-                        await user.send(
-                            "💔 You’ve been removed from 100 Days of Code tracking after 14 days of inactivity. This challenge is tough, but every attempt is progress! When you’re ready, you can always start again with [1/100]. We believe in you!"
-                        )
-                    except Exception:
-                        pass
-                except Exception as e:
-                    logger.error(
-                        f"Failed to notify removal of user {user_data['user_id']}: {e}"
+                    dispatcher.submit(
+                        route,
+                        functools.partial(
+                            self.send_reminder, tier, user_data, logging_channel
+                        ),
+                        f"{tier.name} reminder to user {user_data['user_id']}",
                     )
+            stats = await dispatcher.run()
+            logger.info(f"Reminder dispatch: {stats.as_dict()}")
+            removal_start = time.perf_counter()
+            # Users who posted during the dispatch are skipped by the update
+            deactivated = set(
+                await self.db.deactivate_users(
+                    [
+                        (user_data["guild_id"], user_data["user_id"])
+                        for user_data in plan.removals
+                    ],
+                    remove_days,
+                )
+            )
+            notices = MessageDispatcher(
+                concurrency=ReminderConfig.SEND_CONCURRENCY
+            )
+            for user_data in plan.removals:
+                if (user_data["guild_id"], user_data["user_id"]) not in deactivated:
+                    continue
+                logging_channel = self._logging_channel_for(
+                    user_data, logging_channels
+                )
+                notices.submit(
+                    f"channel:{logging_channel.id}" if logging_channel else "dm",
+                    functools.partial(
+                        self.send_removal_notice,
+                        user_data,
+                        logging_channel,
+                        remove_days,
+                    ),
+                    f"removal notice for user {user_data['user_id']}",
+                )
+            stats = await notices.run()
+            logger.info(
+                f"Removal phase: deactivated {len(deactivated)} users, "
+                f"notices {stats.as_dict()}, "
+                f"took {time.perf_counter() - removal_start:.2f}s"
+            )
+            logger.info(f"User resolution: {self.user_resolver.stats()}")
         except Exception as e:
             logger.error(f"Error in daily reminder check: {e}")
 
+    def _logging_channel_for(self, user_data, logging_channels):
+        """Logging channel of the guild a tracked user belongs to
+
+        Uses the row's guild, otherwise (for unassigned rows) the first
+        guild whose prefetched member cache holds the user. None when no
+        guild is known to contain the user; callers then DM instead of
+        posting in an unrelated guild.
+        """
+        channel = logging_channels.get(user_data["guild_id"])
+        if channel is not None:
+            return channel
+        for guild_id, channel in logging_channels.items():
+            guild = self.get_guild(guild_id)
+            if guild is not None and guild.get_member(user_data["user_id"]):
+                return channel
+        return None
+
+    async def send_reminder(self, tier, user_data, logging_channel):
+        message = tier.render()
+        user = await self.user_resolver.resolve(user_data["user_id"])
+        if tier.public and logging_channel is not None:
+            await logging_channel.send(
+                f"{message} {user.mention} - Currently on day {user_data['current_day']}"
+            )
+        else:
+            await user.send(
+                f"{message}\n\n"
+                f"You're currently on day {user_data['current_day']} of your "
+                f"{user_data['challenge_length']}-day challenge. "
+                f"Post in #{ChannelConfig.LOGGING_CHANNEL} to continue your streak!"
+            )
+
+    async def send_removal_notice(self, user_data, logging_channel, days):
+        user = await self.user_resolver.resolve(user_data["user_id"])
+        length = user_data["challenge_length"]
+        if logging_channel is not None:
+            await logging_channel.send(
+                f"💔 {user.mention} has been removed from tracking after {days} days of inactivity. "
+                f"You can restart anytime with [1/{length}]!"
+            )
+        try:
+            await user.send(
+                f"💔 You’ve been removed from {length} Days of Code tracking after {days} days of inactivity. This challenge is tough, but every attempt is progress! When you’re ready, you can always start again with [1/{length}]. We believe in you!"
+            )
+        except Exception:
+            pass
+
     @daily_reminder_check.before_loop
     async def before_reminder_check(self):
         await self.wait_until_ready()
 
+    @tasks.loop(minutes=GitHubConfig.POLL_MINUTES)
+    async def poll_github_activity(self):
+        try:
+            stats = await self.github_poller.poll_once()
+            logger.info(f"GitHub poll: {stats}, client {self.github.stats()}")
+        except Exception as e:
+            logger.error(f"Error in GitHub activity poll: {e}")
+
+    @poll_github_activity.before_loop
+    async def before_github_poll(self):
+        await self.wait_until_ready()
+
+    @tasks.loop(seconds=MetricsConfig.SNAPSHOT_SECONDS)
+    async def write_metrics_snapshot(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, metrics.REGISTRY.write_snapshot, MetricsConfig.SNAPSHOT_PATH
+            )
+        except Exception as e:
+            logger.error(f"Error writing metrics snapshot: {e}")
+
+    async def close(self):
+        await super().close()
+        await self.github.close()
+        if self.write_metrics_snapshot.is_running():
+            self.write_metrics_snapshot.cancel()
+            await self.write_metrics_snapshot()  # Final snapshot
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if self.sampler is not None:
+            await self.sampler.stop()  # Flushes buffered samples
+        if self.watchdog is not None:
+            await self.watchdog.stop()
+        await asyncio.get_running_loop().run_in_executor(None, self.db.close)
+
     async def on_command_error(self, ctx, error):
         if isinstance(error, commands.MissingPermissions):
             await ctx.send("❌ You don't have permission to use this command.")
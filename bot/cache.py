@@ -0,0 +1,124 @@
+# cache.py: UserState records and the UserStateCache LRU
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# (guild_id, user_id)
+UserKey = Tuple[int, int]
+
+
+class UserState:
+    """Cached copy of one user_streaks row"""
+
+    __slots__ = (
+        "guild_id",
+        "user_id",
+        "username",
+        "current_day",
+        "last_post_timestamp",
+        "is_active",
+        "created_at",
+        "completed_at",
+        "reminders_enabled",
+        "challenge_length",
+    )
+
+    def __init__(
+        self,
+        guild_id: int,
+        user_id: int,
+        username: str,
+        current_day: int,
+        last_post_timestamp: datetime.datetime,
+        is_active: bool,
+        created_at: datetime.datetime,
+        completed_at: Optional[datetime.datetime],
+        reminders_enabled: bool,
+        challenge_length: int,
+    ):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.username = username
+        self.current_day = current_day
+        self.last_post_timestamp = last_post_timestamp
+        self.is_active = is_active
+        self.created_at = created_at
+        self.completed_at = completed_at
+        self.reminders_enabled = reminders_enabled
+        self.challenge_length = challenge_length
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class UserStateCache:
+    """Bounded, thread-safe LRU of UserState keyed by (guild_id, user_id)
+
+    Every write bumps a generation counter. Readers that miss take a token
+    with ``generation`` before querying SQLite and pass it to ``put``; if a
+    write happened in between, the possibly stale row is not cached.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max(0, max_size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: UserKey) -> Optional[UserState]:
+        with self._lock:
+            state = self._entries.get(key)
+            if state is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return state
+
+    def put(self, state: UserState, token: Optional[int] = None) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            if token is not None and token != self._generation:
+                return
+            self._generation += 1
+            key = (state.guild_id, state.user_id)
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def update(self, key: UserKey, **fields) -> None:
+        """Write-through: patch a cached record if present"""
+        with self._lock:
+            self._generation += 1
+            state = self._entries.get(key)
+            if state is not None:
+                for name, value in fields.items():
+                    setattr(state, name, value)
+
+    def invalidate(self, key: UserKey) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
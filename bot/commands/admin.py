@@ -1,8 +1,15 @@
 # commands/admin.py: admin commands (reset, force-add)
 import discord
 import datetime
+import io
+from typing import Optional
 from discord.ext import commands
-from ..config import ChannelConfig
+from ..config import ChallengeConfig, ChannelConfig
+from ..pagination import PagedView, build_csv
+
+PAGE_SIZE = 10
+USER_COLUMNS = ("user_id", "username", "current_day", "last_post_timestamp")
+INACTIVE_COLUMNS = USER_COLUMNS + ("reminders_enabled",)
 
 
 class AdminCommands(commands.Cog):
@@ -12,14 +19,16 @@ class AdminCommands(commands.Cog):
     @commands.command(name="reset")
     @commands.has_permissions(administrator=True)
     async def reset_user(self, ctx, member: discord.Member):
-        if not ChannelConfig.is_command_allowed(ctx.channel.name):
+        if not ChannelConfig.is_command_allowed(ctx.channel):
             return
-        success = self.bot.db.reset_user(member.id)
+        success = await self.bot.db.reset_user(ctx.guild.id, member.id)
         if success:
             await ctx.send(f"✅ Reset {member.mention}'s streak back to day 1")
+            user_data = await self.bot.db.get_user_data(ctx.guild.id, member.id)
+            length = user_data["challenge_length"]
             try:
                 await member.send(
-                    "🔄 Your 100 Days of Code streak has been reset to Day 1 by an admin.  Please log your progress again starting with [1/100] or reach out to the admin team if you have questions."
+                    f"🔄 Your {length} Days of Code streak has been reset to Day 1 by an admin.  Please log your progress again starting with [1/{length}] or reach out to the admin team if you have questions."
                 )
             except Exception:
                 pass
@@ -30,56 +39,92 @@ class AdminCommands(commands.Cog):
 
     @commands.command(name="force-add")
     @commands.has_permissions(administrator=True)
-    async def force_add_user(self, ctx, member: discord.Member, day: int):
-        if not ChannelConfig.is_command_allowed(ctx.channel.name):
+    async def force_add_user(
+        self, ctx, member: discord.Member, day: int, total: Optional[int] = None
+    ):
+        """`!force-add @user day [total]`; the total defaults to the user's
+        current challenge length"""
+        if not ChannelConfig.is_command_allowed(ctx.channel):
+            return
+        if total is None:
+            user_data = await self.bot.db.get_user_data(ctx.guild.id, member.id)
+            if user_data is not None:
+                total = user_data["challenge_length"]
+            else:
+                total = ChallengeConfig.LENGTHS[0]
+        elif total not in ChallengeConfig.LENGTHS:
+            lengths = ", ".join(str(n) for n in ChallengeConfig.LENGTHS)
+            await ctx.send(f"❌ Challenge length must be one of: {lengths}")
             return
-        if not (1 <= day <= 100):
-            await ctx.send("❌ Day must be between 1 and 100")
+        if not (1 <= day <= total):
+            await ctx.send(f"❌ Day must be between 1 and {total}")
             return
-        success = self.bot.db.force_set_day(member.id, str(member), day)
+        success = await self.bot.db.force_set_day(
+            ctx.guild.id, member.id, str(member), day, challenge_length=total
+        )
         if success:
-            await ctx.send(f"✅ Set {member.mention} to day {day}")
+            await ctx.send(f"✅ Set {member.mention} to day {day}/{total}")
         else:
             await ctx.send("❌ Error updating user data")
 
+    async def _csv_file(self, rows, columns, filename) -> discord.File:
+        """Build a CSV from a blocking row iterator on the DB executor"""
+        data = await self.bot.db.run(build_csv, rows, columns)
+        return discord.File(io.BytesIO(data), filename=filename)
+
+    async def _send_pages(self, ctx, view, empty_message):
+        embed = await view.first_page()
+        if embed is None:
+            await ctx.send(empty_message)
+            return
+        view.message = await ctx.send(embed=embed, view=view)
+
     @commands.command(name="list-users")
     @commands.has_permissions(administrator=True)
-    async def list_users(self, ctx):
-        all_users = self.bot.db.get_leaderboard(limit=1000)
-        if not all_users:
-            await ctx.send("📋 No tracked users in the database.")
+    async def list_users(self, ctx, export: str = ""):
+        """Paged list of tracked users; `!list-users csv` attaches them all"""
+        guild_id = ctx.guild.id
+        db = self.bot.db
+
+        def csv_rows():
+            return db.manager.iter_leaderboard(guild_id)
+
+        if export.lower() == "csv":
+            await ctx.send(
+                file=await self._csv_file(csv_rows(), USER_COLUMNS, "users.csv")
+            )
             return
 
-        lines = []
-        for i, user in enumerate(all_users, 1):
+        def render_line(i, user):
             days_ago = (
                 datetime.datetime.now(datetime.timezone.utc)
                 - user["last_post_timestamp"]
             ).days
-            lines.append(
-                f"{i}. {user['username']} — Day {user['current_day']} ({days_ago}d ago)"
-            )
+            return f"{i}. {user['username']} — Day {user['current_day']} ({days_ago}d ago)"
 
-        chunks = [lines[i : i + 10] for i in range(0, len(lines), 10)]
-        for chunk in chunks:
-            await ctx.send("\n".join(chunk))
+        view = PagedView(
+            ctx.author.id,
+            "📋 Tracked users",
+            lambda after: db.get_leaderboard_page(guild_id, PAGE_SIZE, after),
+            render_line,
+            export=lambda: self._csv_file(csv_rows(), USER_COLUMNS, "users.csv"),
+        )
+        await self._send_pages(ctx, view, "📋 No tracked users in the database.")
 
     @commands.command(name="drop-user")
     @commands.has_permissions(administrator=True)
     async def drop_user(self, ctx, member: discord.Member):
-        conn = self.bot.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM user_streaks WHERE user_id = ?", (member.id,)
+        user_data = await self.bot.db.get_user_data(ctx.guild.id, member.id)
+        length = (
+            user_data["challenge_length"] if user_data else ChallengeConfig.LENGTHS[0]
         )
-        conn.commit()
-        conn.close()
+        await self.bot.db.delete_user(ctx.guild.id, member.id)
         await ctx.send(
             f"🗑️ {member.display_name} has been removed from tracking."
         )
         try:
             await member.send(
-                "🗑️ You have been removed from 100 Days of Code tracking by an admin. Please log your progress again starting with [1/100] or reach out to the admin team if you have questions."
+                f"🗑️ You have been removed from {length} Days of Code tracking by an admin. Please log your progress again starting with [1/{length}] or reach out to the admin team if you have questions."
             )
         except Exception:
             pass
@@ -87,7 +132,7 @@ class AdminCommands(commands.Cog):
     @commands.command(name="userstatus")
     @commands.has_permissions(administrator=True)
     async def user_status(self, ctx, member: discord.Member):
-        user_data = self.bot.db.get_user_data(member.id)
+        user_data = await self.bot.db.get_user_data(ctx.guild.id, member.id)
         if not user_data:
             await ctx.send(
                 f"❌ {member.mention} is not in the tracking system."
@@ -126,12 +171,32 @@ class AdminCommands(commands.Cog):
 
     @commands.command(name="inactive")
     @commands.has_permissions(administrator=True)
-    async def list_inactive(self, ctx, days: int = 3):
-        users = self.bot.db.get_inactive_users(days_threshold=days)
-        if not users:
-            await ctx.send("✅ No inactive users found.")
-            return
-        for u in users:
+    async def list_inactive(self, ctx, days: int = 3, export: str = ""):
+        """Paged list of users inactive for N days; `!inactive N csv` attaches them all"""
+        guild_id = ctx.guild.id
+        db = self.bot.db
+
+        def csv_rows():
+            return db.manager.iter_inactive_users(guild_id, days)
+
+        if export.lower() == "csv":
             await ctx.send(
-                f"{u['username']} — Day {u['current_day']} (last seen {u['last_post_timestamp'].strftime('%b %d')})"
+                file=await self._csv_file(
+                    csv_rows(), INACTIVE_COLUMNS, f"inactive-{days}d.csv"
+                )
             )
+            return
+
+        view = PagedView(
+            ctx.author.id,
+            f"💤 Inactive for {days}+ days",
+            lambda after: db.get_inactive_page(guild_id, days, PAGE_SIZE, after),
+            lambda i, u: (
+                f"{u['username']} — Day {u['current_day']} "
+                f"(last seen {u['last_post_timestamp'].strftime('%b %d')})"
+            ),
+            export=lambda: self._csv_file(
+                csv_rows(), INACTIVE_COLUMNS, f"inactive-{days}d.csv"
+            ),
+        )
+        await self._send_pages(ctx, view, "✅ No inactive users found.")
@@ -2,47 +2,95 @@
 import discord
 from discord.ext import commands
 import datetime
-from ..config import ChannelConfig
+from ..config import ChannelConfig, ReminderConfig
 
 
 class GeneralCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # guild_id -> (activity_version, user_ids, last commit dates)
+        self._commit_dates = {}
 
     @commands.command(name="leaderboard")
     async def leaderboard(self, ctx):
-        if not ChannelConfig.is_command_allowed(ctx.channel.name):
+        if not ChannelConfig.is_command_allowed(ctx.channel):
             return
-        top_users = self.bot.db.get_leaderboard(5)
+        guild_id = self.bot.guild_key(ctx.guild)
+        db = self.bot.db
+        # The snapshot answers in memory, without a hop to the DB thread
+        snapshot = db.leaderboards.peek(guild_id, 5)
+        if snapshot is None:
+            top_users = await db.get_leaderboard(guild_id, 5, use_snapshot=False)
+            version = None  # Rows may predate the snapshot just loaded
+        else:
+            version, top_users = snapshot
         if not top_users:
             await ctx.send(
                 "📊 No active streaks yet! Start logging with [1/100] in #100-days-log"
             )
             return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        commit_dates = await self._last_commit_dates(guild_id, top_users)
+        # Day counts are all that change between writes, so the rendered
+        # embed is reused until the top rows, repo activity or an age moves
+        ages = tuple(
+            (
+                (now - user["last_post_timestamp"]).days,
+                (now - commit_dates[user["user_id"]]).days
+                if user["user_id"] in commit_dates
+                else None,
+            )
+            for user in top_users
+        )
+        key = (version, db.activity_version, ages)
+        embed = self.bot.leaderboard_embeds.get(guild_id, key)
+        if embed is None:
+            embed = self._leaderboard_embed(top_users, ages)
+            if version is not None:
+                self.bot.leaderboard_embeds.put(guild_id, key, embed)
+        # The cached embed has no timestamp; each send stamps its own copy
+        embed = embed.copy()
+        embed.timestamp = now
+        await ctx.send(embed=embed)
+
+    async def _last_commit_dates(self, guild_id, top_users):
+        # Polled in the background, so this costs no GitHub API call
+        user_ids = tuple(user["user_id"] for user in top_users)
+        activity_version = self.bot.db.activity_version
+        cached = self._commit_dates.get(guild_id)
+        if cached is not None and cached[:2] == (activity_version, user_ids):
+            return cached[2]
+        commit_dates = await self.bot.db.get_last_commit_dates(
+            guild_id, list(user_ids)
+        )
+        self._commit_dates[guild_id] = (activity_version, user_ids, commit_dates)
+        return commit_dates
+
+    @staticmethod
+    def _leaderboard_embed(top_users, ages):
         embed = discord.Embed(
             title="🏆 100 Days of Code Leaderboard",
             color=0x00FF00,
-            timestamp=datetime.datetime.now(datetime.timezone.utc),
         )
         medals = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
-        for i, user in enumerate(top_users):
-            days_ago = (
-                datetime.datetime.now(datetime.timezone.utc)
-                - user["last_post_timestamp"]
-            ).days
+        for i, (user, (days_ago, commit_days_ago)) in enumerate(
+            zip(top_users, ages)
+        ):
             status = f"Day {user['current_day']}"
             if days_ago > 0:
                 status += f" (last post {days_ago} days ago)"
+            if commit_days_ago is not None:
+                status += f" · last commit {commit_days_ago}d ago"
             embed.add_field(
                 name=f"{medals[i]} {user['username']}",
                 value=status,
                 inline=False,
             )
-        await ctx.send(embed=embed)
+        return embed
 
     @commands.command(name="help")
     async def help_command(self, ctx):
-        if not ChannelConfig.is_command_allowed(ctx.channel.name):
+        if not ChannelConfig.is_command_allowed(ctx.channel):
             return
         embed = discord.Embed(
             title="📚 100 Days of Code Bot Help",
@@ -83,21 +131,21 @@ class GeneralCommands(commands.Cog):
                 name="📋 Admin Commands",
                 value=(
                     "• `!reset @user` - Reset user's streak\n"
-                    "• `!force-add @user day` - Set user to specific day\n"
+                    "• `!force-add @user day [total]` - Set user to specific day\n"
                     "• `!userstatus @user` - Check any user's streak status\n"
-                    "• `!list-users` - List all tracked users\n"
+                    "• `!list-users [csv]` - Page through tracked users (or export CSV)\n"
                     "• `!drop-user @user` - Remove a user from tracking\n"
-                    "• `!inactive [days]` - List users inactive for N days (default 3)"
+                    "• `!inactive [days] [csv]` - Page through users inactive for N days (default 3)"
                 ),
                 inline=False,
             )
         embed.add_field(
             name="🔔 Reminders",
             value=(
-                "• 3 days inactive: Gentle reminder\n"
-                "• 5 days inactive: Firmer reminder\n"
-                "• 7 days inactive: Public warning\n"
-                "• 14 days inactive: Removed from tracking"
+                f"• {ReminderConfig.GENTLE_DAYS} days inactive: Gentle reminder\n"
+                f"• {ReminderConfig.FIRM_DAYS} days inactive: Firmer reminder\n"
+                f"• {ReminderConfig.WARNING_DAYS} days inactive: Public warning\n"
+                f"• {ReminderConfig.REMOVE_DAYS} days inactive: Removed from tracking"
             ),
             inline=False,
         )
@@ -105,8 +153,9 @@ class GeneralCommands(commands.Cog):
 
     @commands.command(name="remind-toggle")
     async def remind_toggle(self, ctx):
+        guild_id = self.bot.guild_key(ctx.guild)
         user_id = ctx.author.id
-        user_data = self.bot.db.get_user_data(user_id)
+        user_data = await self.bot.db.get_user_data(guild_id, user_id)
         if not user_data:
             await ctx.send(
                 "❌ You're not being tracked yet. Join the challenge! Start with `[1/100]` in #100-days-log channel."
@@ -114,7 +163,7 @@ class GeneralCommands(commands.Cog):
             return
         enabled = user_data.get("reminders_enabled", True)
         new_enabled = not enabled
-        self.bot.db.set_reminders_enabled(user_id, new_enabled)
+        await self.bot.db.set_reminders_enabled(guild_id, user_id, new_enabled)
         if new_enabled:
             await ctx.send(
                 "🔔 Reminders enabled! We'll notify you if you go inactive."
@@ -126,22 +175,15 @@ class GeneralCommands(commands.Cog):
 
     @commands.command(name="myrank")
     async def my_rank(self, ctx):
+        guild_id = self.bot.guild_key(ctx.guild)
         user_id = ctx.author.id
-        user_data = self.bot.db.get_user_data(user_id)
+        user_data = await self.bot.db.get_user_data(guild_id, user_id)
         if not user_data:
             await ctx.send(
                 "❌ You're not being tracked yet. Join the challenge! Start with `[1/100]` in #100-days-log channel."
             )
             return
-        leaderboard = self.bot.db.get_leaderboard(limit=1000)
-        rank = next(
-            (
-                i
-                for i, u in enumerate(leaderboard, 1)
-                if u["user_id"] == user_id
-            ),
-            None,
-        )
+        rank = await self.bot.db.get_user_rank(guild_id, user_id)
         if rank:
             await ctx.send(
                 f"📊 You are currently ranked **#{rank}**, on day {user_data['current_day']}."
@@ -151,8 +193,9 @@ class GeneralCommands(commands.Cog):
 
     @commands.command(name="status")
     async def self_status(self, ctx):
-        user_id = ctx.author.id
-        user_data = self.bot.db.get_user_data(user_id)
+        user_data = await self.bot.db.get_user_data(
+            self.bot.guild_key(ctx.guild), ctx.author.id
+        )
         if not user_data:
             await ctx.send(
                 "❌ You're not being tracked yet. Join the challenge! Start with `[1/100]` in #100-days-log channel."
@@ -191,15 +234,11 @@ class GeneralCommands(commands.Cog):
 
     @commands.command(name="hall-of-fame")
     async def hall_of_fame(self, ctx):
-        if not ChannelConfig.is_command_allowed(ctx.channel.name):
+        if not ChannelConfig.is_command_allowed(ctx.channel):
             return
-        conn = self.bot.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT username, completed_at FROM hall_of_fame ORDER BY completed_at ASC"
+        records = await self.bot.db.get_hall_of_fame(
+            self.bot.guild_key(ctx.guild)
         )
-        records = cursor.fetchall()
-        conn.close()
         if not records:
             await ctx.send(
                 "🏛️ No one has entered the Hall of Fame yet. Be the first to reach Day 100!"
@@ -210,12 +249,12 @@ class GeneralCommands(commands.Cog):
             description="Legendary coders who completed the challenge:",
             color=0xFFD700,
         )
-        for username, completed_at in records:
-            date_str = datetime.datetime.fromisoformat(completed_at).strftime(
-                "%b %d, %Y"
-            )
+        for record in records:
+            date_str = record["completed_at"].strftime("%b %d, %Y")
             embed.add_field(
-                name=username, value=f"Completed on {date_str}", inline=False
+                name=record["username"],
+                value=f"Completed on {date_str}",
+                inline=False,
             )
         await ctx.send(embed=embed)
 
@@ -232,13 +271,16 @@ class GeneralCommands(commands.Cog):
                 "❌ Please provide a valid GitHub repo URL or user/repo format."
             )
             return
-        self.bot.db.set_user_repo(user_id, repo)
+        await self.bot.db.set_user_repo(
+            self.bot.guild_key(ctx.guild), user_id, repo
+        )
         await ctx.send(f"🔗 Linked GitHub repo `{repo}` to your profile!")
 
     @commands.command(name="github")
     async def github_commits(self, ctx, n: int = 3):
-        user_id = ctx.author.id
-        repo = self.bot.db.get_user_repo(user_id)
+        repo = await self.bot.db.get_user_repo(
+            self.bot.guild_key(ctx.guild), ctx.author.id
+        )
         if not repo:
             try:
                 await ctx.author.send(
@@ -249,27 +291,28 @@ class GeneralCommands(commands.Cog):
                     "❌ Could not send you a DM. Please check your privacy settings."
                 )
             return
-        import aiohttp
-
-        api_url = f"https://api.github.com/repos/{repo}/commits"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url) as resp:
-                if resp.status != 200:
-                    await ctx.author.send(
-                        f"❌ Could not fetch commits for `{repo}`. Make sure the repo is public and exists."
-                    )
-                    return
-                data = await resp.json()
-        commits = data[:n]
+        # The background poller keeps recent commits locally; only go to the
+        # API for repos it hasn't reached yet or when more commits are asked for
+        activity = await self.bot.db.get_repo_activity(repo)
+        if (
+            activity
+            and activity["status"] == 200
+            and len(activity["commits"]) >= n
+        ):
+            commits = activity["commits"][:n]
+        else:
+            commits = await self.bot.github.get_commits(repo, n)
+        if commits is None:
+            await ctx.author.send(
+                f"❌ Could not fetch commits for `{repo}`. Make sure the repo is public and exists."
+            )
+            return
         if not commits:
             await ctx.author.send(f"ℹ️ No commits found for `{repo}`.")
             return
         msg = f"**Last {len(commits)} commits for `{repo}`:**\n"
         for c in commits:
-            date = c["commit"]["committer"]["date"][:10]
-            message = c["commit"]["message"].split("\n")[0]
-            url = c["html_url"]
-            msg += f"[`{date}`] [{message}]({url})\n"
+            msg += f"[`{c['date'][:10]}`] [{c['message']}]({c['url']})\n"
         await ctx.author.send(msg)
         if ctx.guild:
             await ctx.message.add_reaction("📬")
@@ -1,14 +1,39 @@
 # config.py: ChannelConfig and constants
+import json
 import os
+from typing import Dict, FrozenSet, List, Optional
 from dotenv import load_dotenv
+from .reminders import ReminderTier
 
 load_dotenv()
 
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
 
+class GuildChannels:
+    """Channels resolved for one guild"""
+
+    __slots__ = ("logging_channel", "logging_ids", "command_ids")
+
+    def __init__(
+        self,
+        logging_channel: Optional[object],
+        logging_ids: FrozenSet[int],
+        command_ids: FrozenSet[int],
+    ):
+        # Where the daily job posts for this guild (first match by name)
+        self.logging_channel = logging_channel
+        self.logging_ids = logging_ids
+        self.command_ids = command_ids
+
+
 class ChannelConfig:
-    """Channel configuration for feature control"""
+    """Channel configuration for feature control
+
+    Channels are configured by name but routed by ID: ``resolve_guild``
+    maps names to IDs when the bot becomes ready and whenever a guild's
+    channels change, so per-message checks are frozenset lookups.
+    """
 
     LOGGING_CHANNEL = "100-days-log"
     ALLOWED_COMMAND_CHANNELS = [
@@ -18,11 +43,161 @@ class ChannelConfig:
         "quick-help",
         "sheclouds",
     ]
+    # Per-guild name overrides, e.g.
+    # CHANNEL_OVERRIDES='{"1234": {"logging": "daily-log", "commands": ["bots"]}}'
+    GUILD_OVERRIDES: Dict[int, Dict] = {
+        int(guild_id): override
+        for guild_id, override in json.loads(
+            os.getenv("CHANNEL_OVERRIDES", "{}")
+        ).items()
+    }
+
+    _guilds: Dict[int, GuildChannels] = {}
+    _logging_ids: FrozenSet[int] = frozenset()
+    _command_ids: FrozenSet[int] = frozenset()
+
+    @classmethod
+    def logging_channel_name(cls, guild_id: int) -> str:
+        return cls.GUILD_OVERRIDES.get(guild_id, {}).get(
+            "logging", cls.LOGGING_CHANNEL
+        )
+
+    @classmethod
+    def command_channel_names(cls, guild_id: int) -> List[str]:
+        return cls.GUILD_OVERRIDES.get(guild_id, {}).get(
+            "commands", cls.ALLOWED_COMMAND_CHANNELS
+        )
 
     @classmethod
-    def is_logging_channel(cls, channel_name: str) -> bool:
-        return channel_name == cls.LOGGING_CHANNEL
+    def resolve_guild(cls, guild) -> GuildChannels:
+        """(Re)build the ID sets for a guild from its current channels"""
+        logging_name = cls.logging_channel_name(guild.id)
+        command_names = set(cls.command_channel_names(guild.id))
+        logging_channels = [c for c in guild.channels if c.name == logging_name]
+        resolved = GuildChannels(
+            logging_channels[0] if logging_channels else None,
+            frozenset(c.id for c in logging_channels),
+            frozenset(c.id for c in guild.channels if c.name in command_names),
+        )
+        cls._guilds[guild.id] = resolved
+        cls._rebuild()
+        return resolved
+
+    @classmethod
+    def forget_guild(cls, guild_id: int) -> None:
+        if cls._guilds.pop(guild_id, None) is not None:
+            cls._rebuild()
+
+    @classmethod
+    def _rebuild(cls) -> None:
+        cls._logging_ids = frozenset().union(
+            *(g.logging_ids for g in cls._guilds.values())
+        )
+        cls._command_ids = frozenset().union(
+            *(g.command_ids for g in cls._guilds.values())
+        )
+
+    @classmethod
+    def logging_channel(cls, guild_id: int):
+        """The resolved logging channel of a guild, or None"""
+        resolved = cls._guilds.get(guild_id)
+        return resolved.logging_channel if resolved is not None else None
+
+    @classmethod
+    def logging_channels(cls) -> Dict[int, object]:
+        """guild_id -> logging channel for every guild that has one"""
+        return {
+            guild_id: resolved.logging_channel
+            for guild_id, resolved in cls._guilds.items()
+            if resolved.logging_channel is not None
+        }
+
+    @classmethod
+    def is_logging_channel(cls, channel) -> bool:
+        return channel.id in cls._logging_ids
+
+    @classmethod
+    def is_command_allowed(cls, channel) -> bool:
+        return channel.id in cls._command_ids
+
+
+class ChallengeConfig:
+    """Accepted challenge lengths, i.e. the N in [day/N] posts"""
+
+    LENGTHS = tuple(
+        int(n) for n in os.getenv("CHALLENGE_LENGTHS", "100").split(",") if n.strip()
+    )
+
+
+class GitHubConfig:
+    """GitHub API access and background polling of linked repos"""
+
+    TOKEN = os.getenv("GITHUB_TOKEN")
+    POLL_MINUTES = float(os.getenv("GITHUB_POLL_MINUTES", "15"))
+    POLL_CONCURRENCY = int(os.getenv("GITHUB_POLL_CONCURRENCY", "8"))
+
+
+class MetricsConfig:
+    """Counters/histograms on the hot paths, a local /metrics endpoint and
+    periodic JSON snapshots; all off unless METRICS_ENABLED is set"""
+
+    ENABLED = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+    HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    # 0 disables the HTTP endpoint
+    PORT = int(os.getenv("METRICS_PORT", "9100"))
+    # Empty disables snapshots
+    SNAPSHOT_PATH = os.getenv("METRICS_SNAPSHOT_PATH", "")
+    SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "60"))
+    # In-process resource sampler (RSS, CPU, loop lag, tasks, GC); 0 disables.
+    # Runs whenever there is somewhere to put the samples: the store below
+    # or, with METRICS_ENABLED, the bot_process gauge
+    SAMPLE_SECONDS = float(os.getenv("RESOURCE_SAMPLE_SECONDS", "15"))
+    # Samples buffered per write to the store
+    SAMPLE_FLUSH = int(os.getenv("RESOURCE_SAMPLE_FLUSH", "20"))
+    # MetricsStore database for the samples; empty keeps them in memory only
+    STORE_PATH = os.getenv("RESOURCE_METRICS_DB", "")
+    # Modal volume holding STORE_PATH, committed after each write
+    STORE_VOLUME = os.getenv("RESOURCE_METRICS_VOLUME", "")
+
+
+class WatchdogConfig:
+    """Event-loop stall detection; each stall is logged with the stack that
+    was running"""
+
+    # Heartbeat lag that counts as a stall; 0 disables the watchdog
+    STALL_MS = float(os.getenv("LOOP_STALL_MS", "250"))
+    INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "100"))
+    # asyncio debug mode names slow callbacks but slows every callback
+    ASYNCIO_DEBUG = os.getenv("LOOP_ASYNCIO_DEBUG", "").lower() in ("1", "true", "yes")
+
+
+class ReminderConfig:
+    """Inactivity thresholds (days since the last post) for the daily job"""
+
+    GENTLE_DAYS = int(os.getenv("REMINDER_GENTLE_DAYS", "3"))
+    FIRM_DAYS = int(os.getenv("REMINDER_FIRM_DAYS", "5"))
+    WARNING_DAYS = int(os.getenv("REMINDER_WARNING_DAYS", "7"))
+    REMOVE_DAYS = int(os.getenv("REMINDER_REMOVE_DAYS", "14"))
+    # Reminders sent in parallel by the daily job
+    SEND_CONCURRENCY = int(os.getenv("REMINDER_SEND_CONCURRENCY", "5"))
 
     @classmethod
-    def is_command_allowed(cls, channel_name: str) -> bool:
-        return channel_name in cls.ALLOWED_COMMAND_CHANNELS
+    def tiers(cls) -> List[ReminderTier]:
+        return [
+            ReminderTier(
+                "gentle",
+                cls.GENTLE_DAYS,
+                "🌟 Hey there! Just a friendly reminder to log your coding progress. Keep up the great work!",
+            ),
+            ReminderTier(
+                "firm",
+                cls.FIRM_DAYS,
+                "⚠️ You haven't posted in {days} days. Don't break your streak now - you've got this!",
+            ),
+            ReminderTier(
+                "warning",
+                cls.WARNING_DAYS,
+                "🚨 **{days} days without posting!** Your streak is at risk. Please post your progress soon!",
+                public=True,
+            ),
+        ]
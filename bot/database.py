@@ -1,30 +1,121 @@
 # database.py: DatabaseManager class
 import sqlite3
 import datetime
+import json
 import os
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+from .cache import UserState, UserStateCache
+from .db_pool import ConnectionPool
+from . import events
+from .leaderboard import LeaderboardSnapshots
+from .migrations import (
+    LEGACY_CHALLENGE_LENGTH,
+    UNASSIGNED_GUILD_ID,
+    apply_migrations,
+)
+from .rank import GuildRanks
+from .reminders import ReminderPlan, ReminderTier
+from .volume import VolumeBackend, VolumeCommitScheduler, default_backend
 
-# Try to import modal for volume operations
-try:
-    import modal
-except ImportError:
-    pass  # Modal not available in local development
+# Hot queries, kept at module level so their plans can be checked against
+# the indexes in migrations.py
+LEADERBOARD_QUERY = """
+    SELECT user_id, username, current_day, last_post_timestamp
+    FROM user_streaks
+    WHERE guild_id = ? AND is_active = 1
+    ORDER BY current_day DESC, last_post_timestamp ASC
+    LIMIT ?
+"""
+
+# Keyset pages for the admin listings: the cursor is the sort key of the
+# previous page's last row, so every page is an index seek, not an OFFSET
+LEADERBOARD_PAGE_QUERY = """
+    SELECT user_id, username, current_day, last_post_timestamp
+    FROM user_streaks
+    WHERE guild_id = ? AND is_active = 1 AND current_day <= ?
+      AND (current_day < ? OR (current_day = ? AND (
+           last_post_timestamp > ? OR (last_post_timestamp = ? AND user_id > ?))))
+    ORDER BY current_day DESC, last_post_timestamp ASC, user_id ASC
+    LIMIT ?
+"""
+
+INACTIVE_PAGE_QUERY = """
+    SELECT user_id, username, current_day, last_post_timestamp, reminders_enabled
+    FROM user_streaks
+    WHERE guild_id = ? AND is_active = 1 AND last_post_timestamp < ?
+      AND (last_post_timestamp, user_id) > (?, ?)
+    ORDER BY last_post_timestamp ASC, user_id ASC
+    LIMIT ?
+"""
+
+INACTIVE_USERS_QUERY = """
+    SELECT user_id, username, current_day, last_post_timestamp, reminders_enabled
+    FROM user_streaks
+    WHERE guild_id = ? AND is_active = 1 AND last_post_timestamp < ?
+"""
 
 
 class DatabaseManager:
-    """Handles all database operations for user streaks"""
+    """Handles all database operations for user streaks
+
+    Per-user data is partitioned by guild: every user method takes the
+    ``guild_id`` first, so one process can serve several communities.
+    """
 
-    def __init__(self, db_path: str = None):
+    def __init__(
+        self,
+        db_path: str = None,
+        readers: int = None,
+        volume_backend: Optional[VolumeBackend] = None,
+    ):
         if db_path is None:
             db_path = os.environ.get("DB_PATH", "/data/streaks.db")
+        if readers is None:
+            readers = int(os.environ.get("DB_READERS", "4"))
         self.db_path = db_path
         # Don't automatically initialize the database on creation
-        # This allows us to connect to an existing database without recreating it
+        # This allows us to connect to an existing database without recreating it.
+        # Connections are opened lazily by the pool and reused across calls.
+        self._pool = ConnectionPool(db_path, readers=readers)
+        self.volume = VolumeCommitScheduler(
+            volume_backend if volume_backend is not None else default_backend(),
+            window=float(os.environ.get("VOLUME_COMMIT_WINDOW", "30")),
+            threshold=int(os.environ.get("VOLUME_COMMIT_THRESHOLD", "50")),
+            before_commit=self._before_volume_commit,
+        )
+        # Write-through cache of user_streaks rows for the log-message hot path
+        self.cache = UserStateCache(
+            int(os.environ.get("USER_CACHE_SIZE", "10000"))
+        )
+        # Per guild: loaded on the first rank lookup, then kept current by writes
+        self.ranks = GuildRanks()
+        # Per-guild top of the leaderboard, patched by the same writes
+        self.leaderboards = LeaderboardSnapshots(
+            int(os.environ.get("LEADERBOARD_SNAPSHOT_SIZE", "25"))
+        )
+        # Bumped whenever linked repos or their polled activity change
+        self.activity_version = 0
+        # post_events rows waiting for a batched insert
+        self.events = events.EventBuffer(
+            int(os.environ.get("EVENT_BATCH_SIZE", "500"))
+        )
+
+    def close(self):
+        """Flush pending events and volume commits, then close all pooled
+        connections"""
+        self.flush_events()
+        self.volume.close()
+        self._pool.close()
 
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._pool.writer() as conn:
+            self._create_schema(conn.cursor())
+            apply_migrations(conn)
+        self.commit_to_volume()
+        self.flush_volume()
+
+    def _create_schema(self, cursor):
         cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS user_streaks (
@@ -56,104 +147,201 @@ class DatabaseManager:
             )
             """
         )
-        # Migration: add reminders_enabled if missing
-        cursor.execute("PRAGMA table_info(user_streaks)")
-        columns = [row[1] for row in cursor.fetchall()]
-        if "reminders_enabled" not in columns:
-            cursor.execute(
-                "ALTER TABLE user_streaks ADD COLUMN reminders_enabled BOOLEAN NOT NULL DEFAULT 1"
-            )
-        conn.commit()
-        conn.close()
-        self.commit_to_volume()
+        # Later tables, columns and indexes (including the per-guild
+        # primary keys) live in migrations.py
 
-    def get_user_data(self, user_id: int) -> Optional[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT user_id, username, current_day, last_post_timestamp, \
-                   is_active, created_at, completed_at, reminders_enabled
-            FROM user_streaks WHERE user_id = ?
-        """,
-            (user_id,),
-        )
-        row = cursor.fetchone()
-        conn.close()
+    def adopt_unassigned_rows(self, guild_id: int) -> int:
+        """Move rows migrated without a guild into ``guild_id``
+
+        Called when the bot is in exactly one guild, which is then where
+        the pre-partitioning data came from. Rows that would collide with
+        ones the guild already has are left unassigned.
+        """
+        if guild_id == UNASSIGNED_GUILD_ID:
+            return 0
+        with self._pool.writer() as conn:
+            moved = 0
+            for table in ("user_streaks", "hall_of_fame", "user_repos"):
+                cursor = conn.execute(
+                    f"UPDATE OR IGNORE {table} SET guild_id = ? WHERE guild_id = ?",
+                    (guild_id, UNASSIGNED_GUILD_ID),
+                )
+                moved += cursor.rowcount
+            if moved:
+                self._log_event(
+                    guild_id,
+                    UNASSIGNED_GUILD_ID,
+                    events.ADOPT,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                )
+        if moved:
+            self.cache.clear()
+            self.ranks.reset()
+            self.leaderboards.reset()
+            self.commit_to_volume()
+        return moved
+
+    def get_user_data(self, guild_id: int, user_id: int) -> Optional[Dict]:
+        state = self.cache.get((guild_id, user_id))
+        if state is not None:
+            return state.to_dict()
+        token = self.cache.generation
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                """
+                SELECT user_id, username, current_day, last_post_timestamp, \
+                       is_active, created_at, completed_at, reminders_enabled, \
+                       challenge_length
+                FROM user_streaks WHERE guild_id = ? AND user_id = ?
+            """,
+                (guild_id, user_id),
+            ).fetchone()
         if row:
-            return {
-                "user_id": row[0],
-                "username": row[1],
-                "current_day": row[2],
-                "last_post_timestamp": datetime.datetime.fromisoformat(row[3]),
-                "is_active": bool(row[4]),
-                "created_at": datetime.datetime.fromisoformat(row[5]),
-                "completed_at": (
+            state = UserState(
+                guild_id=guild_id,
+                user_id=row[0],
+                username=row[1],
+                current_day=row[2],
+                last_post_timestamp=datetime.datetime.fromisoformat(row[3]),
+                is_active=bool(row[4]),
+                created_at=datetime.datetime.fromisoformat(row[5]),
+                completed_at=(
                     datetime.datetime.fromisoformat(row[6]) if row[6] else None
                 ),
-                "reminders_enabled": bool(row[7]),
-            }
+                reminders_enabled=bool(row[7]),
+                challenge_length=row[8],
+            )
+            self.cache.put(state, token)
+            return state.to_dict()
         return None
 
-    def create_user(self, user_id: int, username: str) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def create_user(
+        self,
+        guild_id: int,
+        user_id: int,
+        username: str,
+        message_id: Optional[int] = None,
+        challenge_length: int = LEGACY_CHALLENGE_LENGTH,
+    ) -> bool:
         try:
-            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-            cursor.execute(
-                """
-                INSERT INTO user_streaks 
-                (user_id, username, current_day, last_post_timestamp, created_at, reminders_enabled)
-                VALUES (?, ?, 1, ?, ?, 1)
-            """,
-                (user_id, username, now, now),
+            now_dt = datetime.datetime.now(datetime.timezone.utc)
+            now = now_dt.isoformat()
+            with self._pool.writer() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO user_streaks 
+                    (guild_id, user_id, username, current_day, last_post_timestamp, created_at, reminders_enabled, challenge_length)
+                    VALUES (?, ?, ?, 1, ?, ?, 1, ?)
+                """,
+                    (guild_id, user_id, username, now, now, challenge_length),
+                )
+                self._log_event(
+                    guild_id,
+                    user_id,
+                    events.CREATE,
+                    now,
+                    day=1,
+                    username=username,
+                    message_id=message_id,
+                    detail=str(challenge_length),
+                )
+            self.cache.put(
+                UserState(
+                    guild_id=guild_id,
+                    user_id=user_id,
+                    username=username,
+                    current_day=1,
+                    last_post_timestamp=now_dt,
+                    is_active=True,
+                    created_at=now_dt,
+                    completed_at=None,
+                    reminders_enabled=True,
+                    challenge_length=challenge_length,
+                )
             )
-            conn.commit()
-            conn.close()
+            self.ranks[guild_id].set(user_id, 1, now)
+            self.leaderboards.upsert(guild_id, user_id, username, 1, now)
             self.commit_to_volume()
             return True
         except sqlite3.IntegrityError:
-            conn.close()
             return False
 
     def update_user_progress(
-        self, user_id: int, username: str, new_day: int
+        self,
+        guild_id: int,
+        user_id: int,
+        username: str,
+        new_day: int,
+        completed: Optional[bool] = None,
+        message_id: Optional[int] = None,
     ) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        completed_at = now if new_day == 100 else None
-        cursor.execute(
-            """
-            UPDATE user_streaks 
-            SET username = ?, current_day = ?, last_post_timestamp = ?, completed_at = ?
-            WHERE user_id = ?
-        """,
-            (username, new_day, now, completed_at, user_id),
-        )
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        
+        now_dt = datetime.datetime.now(datetime.timezone.utc)
+        now = now_dt.isoformat()
+        completed_at = None
+        with self._pool.writer() as conn:
+            row = conn.execute(
+                "SELECT is_active, challenge_length FROM user_streaks "
+                "WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
+            ).fetchone()
+            success = row is not None
+            if success:
+                is_active, challenge_length = row
+                if completed is None:
+                    completed = new_day == challenge_length
+                completed_at = now if completed else None
+                conn.execute(
+                    """
+                    UPDATE user_streaks 
+                    SET username = ?, current_day = ?, last_post_timestamp = ?, completed_at = ?
+                    WHERE guild_id = ? AND user_id = ?
+                """,
+                    (username, new_day, now, completed_at, guild_id, user_id),
+                )
+                self._log_event(
+                    guild_id,
+                    user_id,
+                    events.PROGRESS,
+                    now,
+                    day=new_day,
+                    username=username,
+                    message_id=message_id,
+                    detail="completed" if completed else None,
+                )
+
         if success:
+            self.cache.update(
+                (guild_id, user_id),
+                username=username,
+                current_day=new_day,
+                last_post_timestamp=now_dt,
+                completed_at=now_dt if completed_at else None,
+            )
+            self.ranks[guild_id].move(user_id, new_day, now)
+            if is_active:
+                self.leaderboards.upsert(
+                    guild_id, user_id, username, new_day, now
+                )
             self.commit_to_volume()
         return success
 
-    def get_leaderboard(self, limit: int = 5) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT user_id, username, current_day, last_post_timestamp
-            FROM user_streaks 
-            WHERE is_active = 1 
-            ORDER BY current_day DESC, last_post_timestamp ASC
-            LIMIT ?
-        """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-        conn.close()
+    def get_leaderboard(
+        self, guild_id: int, limit: int = 5, use_snapshot: bool = True
+    ) -> List[Dict]:
+        """Top ``limit`` users; pass ``use_snapshot=False`` after a peek
+        already missed, so the miss isn't counted twice"""
+        if use_snapshot:
+            snapshot = self.leaderboards.peek(guild_id, limit)
+            if snapshot is not None:
+                return snapshot[1]
+        token = self.leaderboards.generation
+        capacity = self.leaderboards.capacity
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                LEADERBOARD_QUERY, (guild_id, max(limit, capacity))
+            ).fetchall()
+        if limit <= capacity:
+            self.leaderboards.load(guild_id, rows, token)
         return [
             {
                 "user_id": row[0],
@@ -161,26 +349,105 @@ class DatabaseManager:
                 "current_day": row[2],
                 "last_post_timestamp": datetime.datetime.fromisoformat(row[3]),
             }
-            for row in rows
+            for row in rows[:limit]
         ]
 
-    def get_inactive_users(self, days_threshold: int) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_leaderboard_page(
+        self, guild_id: int, limit: int = 10, after: Optional[Tuple] = None
+    ) -> Tuple[List[Dict], Optional[Tuple]]:
+        """One leaderboard page after cursor ``after`` (None: from the top)
+
+        Returns the rows and the cursor of the next page, None on the last.
+        """
+        day, timestamp, user_id = after if after is not None else (1 << 31, "", 0)
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                LEADERBOARD_PAGE_QUERY,
+                (guild_id, day, day, day, timestamp, timestamp, user_id, limit + 1),
+            ).fetchall()
+        page = rows[:limit]
+        cursor = None
+        if len(rows) > limit:
+            cursor = (page[-1][2], page[-1][3], page[-1][0])
+        return [
+            {
+                "user_id": row[0],
+                "username": row[1],
+                "current_day": row[2],
+                "last_post_timestamp": datetime.datetime.fromisoformat(row[3]),
+            }
+            for row in page
+        ], cursor
+
+    def get_inactive_page(
+        self,
+        guild_id: int,
+        days_threshold: int,
+        limit: int = 10,
+        after: Optional[Tuple] = None,
+    ) -> Tuple[List[Dict], Optional[Tuple]]:
+        """One page of users inactive for ``days_threshold`` days, longest
+        inactive first; same cursor contract as get_leaderboard_page"""
         threshold_date = (
             datetime.datetime.now(datetime.timezone.utc)
             - datetime.timedelta(days=days_threshold)
         ).isoformat()
-        cursor.execute(
-            """
-            SELECT user_id, username, current_day, last_post_timestamp, reminders_enabled
-            FROM user_streaks 
-            WHERE is_active = 1 AND last_post_timestamp < ?
-        """,
-            (threshold_date,),
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        timestamp, user_id = after if after is not None else ("", 0)
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                INACTIVE_PAGE_QUERY,
+                (guild_id, threshold_date, timestamp, user_id, limit + 1),
+            ).fetchall()
+        page = rows[:limit]
+        cursor = None
+        if len(rows) > limit:
+            cursor = (page[-1][3], page[-1][0])
+        return [
+            {
+                "user_id": row[0],
+                "username": row[1],
+                "current_day": row[2],
+                "last_post_timestamp": datetime.datetime.fromisoformat(row[3]),
+                "reminders_enabled": bool(row[4]),
+            }
+            for row in page
+        ], cursor
+
+    def iter_leaderboard(self, guild_id: int, page_size: int = 500) -> Iterator[Dict]:
+        """Every active user in leaderboard order, read a page at a time
+
+        Blocking generator: consume it on a worker thread (e.g. through
+        AsyncDatabaseManager.run). No connection is held between pages.
+        """
+        cursor = None
+        while True:
+            rows, cursor = self.get_leaderboard_page(guild_id, page_size, cursor)
+            yield from rows
+            if cursor is None:
+                return
+
+    def iter_inactive_users(
+        self, guild_id: int, days_threshold: int, page_size: int = 500
+    ) -> Iterator[Dict]:
+        """Streaming counterpart of get_inactive_page; see iter_leaderboard"""
+        cursor = None
+        while True:
+            rows, cursor = self.get_inactive_page(
+                guild_id, days_threshold, page_size, cursor
+            )
+            yield from rows
+            if cursor is None:
+                return
+
+    def get_inactive_users(self, guild_id: int, days_threshold: int) -> List[Dict]:
+        threshold_date = (
+            datetime.datetime.now(datetime.timezone.utc)
+            - datetime.timedelta(days=days_threshold)
+        ).isoformat()
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                INACTIVE_USERS_QUERY, (guild_id, threshold_date)
+            ).fetchall()
         return [
             {
                 "user_id": row[0],
@@ -192,153 +459,590 @@ class DatabaseManager:
             for row in rows
         ]
 
-    def deactivate_user(self, user_id: int) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE user_streaks SET is_active = 0 WHERE user_id = ?
-        """,
-            (user_id,),
-        )
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+    def get_user_rank(self, guild_id: int, user_id: int) -> Optional[int]:
+        """1-based position on the guild's leaderboard, None if inactive"""
+        ranks = self.ranks[guild_id]
+        with ranks.lock:
+            if not ranks.loaded:
+                # Writes wait on the lock, so none can slip in between the
+                # snapshot and the load
+                with self._pool.reader() as conn:
+                    rows = conn.execute(
+                        """
+                        SELECT user_id, current_day, last_post_timestamp
+                        FROM user_streaks WHERE guild_id = ? AND is_active = 1
+                        """,
+                        (guild_id,),
+                    ).fetchall()
+                ranks.load(rows)
+            return ranks.rank(user_id)
+
+    def get_reminder_plan(
+        self,
+        tiers: List[ReminderTier],
+        remove_after_days: int,
+        guild_id: Optional[int] = None,
+    ) -> ReminderPlan:
+        """Bucket every inactive active user into a reminder tier in one query
+
+        Matches the old per-threshold semantics: a user is in a tier when
+        ``(now - last_post).days == tier.days`` and is removed once the last
+        post is more than ``remove_after_days`` old. Cut-offs are ISO strings
+        compared against ``last_post_timestamp``, so the query is a single
+        range scan over idx_user_streaks_inactivity (all guilds) or
+        idx_user_streaks_guild_inactivity (one guild).
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        def cutoff(days: int) -> str:
+            return (now - datetime.timedelta(days=days)).isoformat()
+
+        cases = ["WHEN last_post_timestamp < ? THEN ?"]
+        params = [cutoff(remove_after_days), ReminderPlan.REMOVE]
+        for tier in tiers:
+            cases.append(
+                "WHEN last_post_timestamp < ? AND last_post_timestamp > ? THEN ?"
+            )
+            params += [cutoff(tier.days), cutoff(tier.days + 1), tier.name]
+        earliest = min([remove_after_days] + [tier.days for tier in tiers])
+        guild_filter = ""
+        if guild_id is not None:
+            guild_filter = "guild_id = ? AND "
+            params.append(guild_id)
+        params.append(cutoff(earliest))
+        query = f"""
+            SELECT * FROM (
+                SELECT user_id, username, current_day, last_post_timestamp,
+                       reminders_enabled,
+                       CASE {" ".join(cases)} END AS tier,
+                       guild_id, challenge_length
+                FROM user_streaks
+                WHERE {guild_filter}is_active = 1 AND last_post_timestamp < ?
+            )
+            WHERE tier IS NOT NULL
+        """
+        plan = ReminderPlan(tiers, remove_after_days)
+        with self._pool.reader() as conn:
+            for row in conn.execute(query, params):
+                plan.add(
+                    row[5],
+                    {
+                        "guild_id": row[6],
+                        "user_id": row[0],
+                        "username": row[1],
+                        "current_day": row[2],
+                        "last_post_timestamp": datetime.datetime.fromisoformat(
+                            row[3]
+                        ),
+                        "reminders_enabled": bool(row[4]),
+                        "challenge_length": row[7],
+                    },
+                )
+        return plan
+
+    def deactivate_user(self, guild_id: int, user_id: int) -> bool:
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE user_streaks SET is_active = 0 WHERE guild_id = ? AND user_id = ?
+            """,
+                (guild_id, user_id),
+            )
+            success = cursor.rowcount > 0
+            if success:
+                self._log_event(
+                    guild_id,
+                    user_id,
+                    events.DEACTIVATE,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                )
+        self.cache.update((guild_id, user_id), is_active=False)
+        self.ranks[guild_id].remove(user_id)
+        self.leaderboards.remove(guild_id, user_id)
         if success:
             self.commit_to_volume()
         return success
 
-    def reset_user(self, user_id: int) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        cursor.execute(
-            """
-            UPDATE user_streaks 
-            SET current_day = 1, last_post_timestamp = ?, completed_at = NULL, is_active = 1
-            WHERE user_id = ?
-        """,
-            (now, user_id),
-        )
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        if success:
+    def deactivate_users(
+        self, keys: List[Tuple[int, int]], remove_after_days: int
+    ) -> List[Tuple[int, int]]:
+        """Deactivate many ``(guild_id, user_id)`` pairs in one transaction
+        and one volume commit
+
+        Only rows still active and inactive for more than
+        ``remove_after_days`` are changed: the list comes from a plan built
+        before the reminder dispatch, and a user may have posted since.
+        Returns the keys actually deactivated.
+        """
+        if not keys:
+            return []
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cutoff = (now - datetime.timedelta(days=remove_after_days)).isoformat()
+        deactivated = []
+        with self._pool.writer() as conn:
+            for guild_id, user_id in keys:
+                cursor = conn.execute(
+                    """
+                    UPDATE user_streaks SET is_active = 0
+                    WHERE guild_id = ? AND user_id = ?
+                      AND is_active = 1 AND last_post_timestamp < ?
+                    """,
+                    (guild_id, user_id, cutoff),
+                )
+                if cursor.rowcount > 0:
+                    deactivated.append((guild_id, user_id))
+                    self._log_event(
+                        guild_id, user_id, events.DEACTIVATE, now.isoformat()
+                    )
+        for guild_id, user_id in deactivated:
+            self.cache.update((guild_id, user_id), is_active=False)
+            self.ranks[guild_id].remove(user_id)
+            self.leaderboards.remove(guild_id, user_id)
+        if deactivated:
             self.commit_to_volume()
-        return success
+        return deactivated
 
-    def force_set_day(self, user_id: int, username: str, day: int) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def reset_user(self, guild_id: int, user_id: int) -> bool:
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        completed_at = now if day == 100 else None
-        user_data = self.get_user_data(user_id)
-        if not user_data:
-            cursor.execute(
-                """
-                INSERT INTO user_streaks 
-                (user_id, username, current_day, last_post_timestamp, created_at, completed_at, reminders_enabled)
-                VALUES (?, ?, ?, ?, ?, ?, 1)
-            """,
-                (user_id, username, day, now, now, completed_at),
-            )
-        else:
-            cursor.execute(
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
                 """
                 UPDATE user_streaks 
-                SET username = ?, current_day = ?, last_post_timestamp = ?, \
-                    completed_at = ?, is_active = 1
-                WHERE user_id = ?
+                SET current_day = 1, last_post_timestamp = ?, completed_at = NULL, is_active = 1
+                WHERE guild_id = ? AND user_id = ?
             """,
-                (username, day, now, completed_at, user_id),
+                (now, guild_id, user_id),
             )
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
+            success = cursor.rowcount > 0
+            if success:
+                username = conn.execute(
+                    "SELECT username FROM user_streaks WHERE guild_id = ? AND user_id = ?",
+                    (guild_id, user_id),
+                ).fetchone()[0]
+                self._log_event(guild_id, user_id, events.RESET, now)
+        self.cache.invalidate((guild_id, user_id))
+        if success:
+            self.ranks[guild_id].set(user_id, 1, now)
+            self.leaderboards.upsert(guild_id, user_id, username, 1, now)
+        if success:
+            self.commit_to_volume()
         return success
 
-    def toggle_reminders(self, user_id: int) -> Optional[bool]:
-        # Get current value
-        success, result = self.execute_safely(
-            "SELECT reminders_enabled FROM user_streaks WHERE user_id = ?",
-            (user_id,),
-            'one'
-        )
-        
-        if not success or result is None:
-            return None
-            
-        # Toggle value
-        new_value = 0 if result[0] else 1
-        success, _ = self.execute_safely(
-            "UPDATE user_streaks SET reminders_enabled = ? WHERE user_id = ?",
-            (new_value, user_id)
-        )
-        
+    def force_set_day(
+        self,
+        guild_id: int,
+        user_id: int,
+        username: str,
+        day: int,
+        challenge_length: Optional[int] = None,
+    ) -> bool:
+        """Create or overwrite a user's streak at ``day``
+
+        ``challenge_length`` defaults to the user's current one (or the
+        legacy length for new users).
+        """
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._pool.writer() as conn:
+            row = conn.execute(
+                "SELECT challenge_length FROM user_streaks WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
+            ).fetchone()
+            if challenge_length is None:
+                challenge_length = row[0] if row else LEGACY_CHALLENGE_LENGTH
+            completed_at = now if day == challenge_length else None
+            if not row:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO user_streaks 
+                    (guild_id, user_id, username, current_day, last_post_timestamp, created_at, completed_at, reminders_enabled, challenge_length)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+                """,
+                    (
+                        guild_id,
+                        user_id,
+                        username,
+                        day,
+                        now,
+                        now,
+                        completed_at,
+                        challenge_length,
+                    ),
+                )
+            else:
+                cursor = conn.execute(
+                    """
+                    UPDATE user_streaks 
+                    SET username = ?, current_day = ?, last_post_timestamp = ?, \
+                        completed_at = ?, is_active = 1, challenge_length = ?
+                    WHERE guild_id = ? AND user_id = ?
+                """,
+                    (
+                        username,
+                        day,
+                        now,
+                        completed_at,
+                        challenge_length,
+                        guild_id,
+                        user_id,
+                    ),
+                )
+            success = cursor.rowcount > 0
+            if success:
+                self._log_event(
+                    guild_id,
+                    user_id,
+                    events.FORCE_SET,
+                    now,
+                    day=day,
+                    username=username,
+                    detail=str(challenge_length),
+                )
+        self.cache.invalidate((guild_id, user_id))
         if success:
+            self.ranks[guild_id].set(user_id, day, now)
+            self.leaderboards.upsert(guild_id, user_id, username, day, now)
             self.commit_to_volume()
-            return bool(new_value)
+        return success
+
+    def toggle_reminders(self, guild_id: int, user_id: int) -> Optional[bool]:
+        user_data = self.get_user_data(guild_id, user_id)
+        if user_data is None:
+            return None
+        new_value = not user_data["reminders_enabled"]
+        if self.set_reminders_enabled(guild_id, user_id, new_value):
+            return new_value
         return None
 
-    def set_reminders_enabled(self, user_id: int, enabled: bool) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE user_streaks SET reminders_enabled = ? WHERE user_id = ?",
-            (1 if enabled else 0, user_id),
-        )
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+    def set_reminders_enabled(
+        self, guild_id: int, user_id: int, enabled: bool
+    ) -> bool:
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
+                "UPDATE user_streaks SET reminders_enabled = ? WHERE guild_id = ? AND user_id = ?",
+                (1 if enabled else 0, guild_id, user_id),
+            )
+            success = cursor.rowcount > 0
+            if success:
+                self._log_event(
+                    guild_id,
+                    user_id,
+                    events.REMINDERS,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    detail="on" if enabled else "off",
+                )
+        self.cache.update((guild_id, user_id), reminders_enabled=enabled)
         if success:
             self.commit_to_volume()
         return success
 
-    def archive_to_hof(self, user_id: int, username: str) -> None:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def archive_to_hof(self, guild_id: int, user_id: int, username: str) -> None:
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO hall_of_fame (user_id, username, completed_at)
-            VALUES (?, ?, ?)
-            """,
-            (user_id, username, now),
-        )
-        cursor.execute(
-            "DELETE FROM user_streaks WHERE user_id = ?", (user_id,)
-        )
-        conn.commit()
-        conn.close()
+        with self._pool.writer() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO hall_of_fame (guild_id, user_id, username, completed_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (guild_id, user_id, username, now),
+            )
+            conn.execute(
+                "DELETE FROM user_streaks WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
+            )
+            self._log_event(
+                guild_id, user_id, events.ARCHIVE, now, username=username
+            )
+        self.cache.invalidate((guild_id, user_id))
+        self.ranks[guild_id].remove(user_id)
+        self.leaderboards.remove(guild_id, user_id)
         self.commit_to_volume()
 
-    def set_user_repo(self, user_id: int, github_repo: str) -> None:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO user_repos (user_id, github_repo) VALUES (?, ?)",
-            (user_id, github_repo),
-        )
-        conn.commit()
-        conn.close()
+    def delete_user(self, guild_id: int, user_id: int) -> bool:
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
+                "DELETE FROM user_streaks WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
+            )
+            success = cursor.rowcount > 0
+            if success:
+                self._log_event(
+                    guild_id,
+                    user_id,
+                    events.DELETE,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                )
+        self.cache.invalidate((guild_id, user_id))
+        self.ranks[guild_id].remove(user_id)
+        self.leaderboards.remove(guild_id, user_id)
+        if success:
+            self.commit_to_volume()
+        return success
+
+    def get_hall_of_fame(self, guild_id: int) -> List[Dict]:
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                "SELECT user_id, username, completed_at FROM hall_of_fame WHERE guild_id = ? ORDER BY completed_at ASC",
+                (guild_id,),
+            ).fetchall()
+        return [
+            {
+                "user_id": row[0],
+                "username": row[1],
+                "completed_at": datetime.datetime.fromisoformat(row[2]),
+            }
+            for row in rows
+        ]
+
+    def set_user_repo(self, guild_id: int, user_id: int, github_repo: str) -> None:
+        with self._pool.writer() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO user_repos (guild_id, user_id, github_repo) VALUES (?, ?, ?)",
+                (guild_id, user_id, github_repo),
+            )
+        self.activity_version += 1
         self.commit_to_volume()
 
-    def get_user_repo(self, user_id: int) -> Optional[str]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT github_repo FROM user_repos WHERE user_id = ?",
-            (user_id,),
-        )
-        row = cursor.fetchone()
-        conn.close()
+    def get_user_repo(self, guild_id: int, user_id: int) -> Optional[str]:
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                "SELECT github_repo FROM user_repos WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
+            ).fetchone()
         if row:
             return row[0]
         return None
 
+    def get_repos_to_poll(self, limit: int) -> List[Tuple[str, Optional[str]]]:
+        """Linked repos, never-polled first then least recently polled,
+        with the stored ETag for a conditional request"""
+        with self._pool.reader() as conn:
+            return conn.execute(
+                """
+                SELECT r.github_repo, a.etag
+                FROM (SELECT DISTINCT github_repo FROM user_repos) r
+                LEFT JOIN repo_activity a ON a.github_repo = r.github_repo
+                ORDER BY a.fetched_at IS NOT NULL, a.fetched_at
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+
+    def save_repo_activity(self, results: List[Dict]) -> None:
+        """Store a poll round in one transaction
+
+        Each result has ``repo`` and ``status``; 200s also carry ``etag``
+        and summarized ``commits``. A 304 only refreshes ``fetched_at``.
+        """
+        if not results:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        changed = [r for r in results if r["status"] != 304]
+        unchanged = [r for r in results if r["status"] == 304]
+        with self._pool.writer() as conn:
+            conn.executemany(
+                """
+                INSERT INTO repo_activity
+                (github_repo, status, etag, commits, last_commit_at, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(github_repo) DO UPDATE SET
+                    status = excluded.status, etag = excluded.etag,
+                    commits = excluded.commits,
+                    last_commit_at = excluded.last_commit_at,
+                    fetched_at = excluded.fetched_at
+                """,
+                [
+                    (
+                        r["repo"],
+                        r["status"],
+                        r.get("etag"),
+                        json.dumps(r.get("commits") or []),
+                        r["commits"][0]["date"] if r.get("commits") else None,
+                        now,
+                    )
+                    for r in changed
+                ],
+            )
+            conn.executemany(
+                "UPDATE repo_activity SET fetched_at = ? WHERE github_repo = ?",
+                [(now, r["repo"]) for r in unchanged],
+            )
+        if changed:
+            self.activity_version += 1
+            self.commit_to_volume()
+
+    def get_repo_activity(self, github_repo: str) -> Optional[Dict]:
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                """
+                SELECT status, commits, last_commit_at, fetched_at
+                FROM repo_activity WHERE github_repo = ?
+                """,
+                (github_repo,),
+            ).fetchone()
+        if row:
+            return {
+                "status": row[0],
+                "commits": json.loads(row[1]),
+                "last_commit_at": (
+                    datetime.datetime.fromisoformat(row[2].replace("Z", "+00:00"))
+                    if row[2]
+                    else None
+                ),
+                "fetched_at": datetime.datetime.fromisoformat(row[3]),
+            }
+        return None
+
+    def get_last_commit_dates(
+        self, guild_id: int, user_ids: List[int]
+    ) -> Dict[int, datetime.datetime]:
+        """Latest polled commit time per user, for users with a linked repo"""
+        if not user_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in user_ids)
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT r.user_id, a.last_commit_at
+                FROM user_repos r
+                JOIN repo_activity a ON a.github_repo = r.github_repo
+                WHERE r.guild_id = ? AND r.user_id IN ({placeholders})
+                  AND a.last_commit_at IS NOT NULL
+                """,
+                [guild_id, *user_ids],
+            ).fetchall()
+        return {
+            row[0]: datetime.datetime.fromisoformat(row[1].replace("Z", "+00:00"))
+            for row in rows
+        }
+
+    def claim_message(self, message_id: int, user_id: int) -> bool:
+        """Record a log post as processed; False if it was already claimed"""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO processed_messages (message_id, user_id, processed_at)
+                VALUES (?, ?, ?)
+                """,
+                (message_id, user_id, now),
+            )
+            return cursor.rowcount > 0
+
+    def prune_processed_messages(self, days: int = 7) -> int:
+        """Forget claims older than ``days``; Discord won't redeliver those"""
+        cutoff = (
+            datetime.datetime.now(datetime.timezone.utc)
+            - datetime.timedelta(days=days)
+        ).isoformat()
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
+                "DELETE FROM processed_messages WHERE processed_at < ?",
+                (cutoff,),
+            )
+            return cursor.rowcount
+
+    def record_rejected_post(
+        self,
+        guild_id: int,
+        user_id: int,
+        day: int,
+        message_id: Optional[int],
+        reason: str,
+    ) -> None:
+        """Log a log post that failed validation (audit only, no state)"""
+        self.events.add(
+            guild_id,
+            user_id,
+            events.REJECTED,
+            datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            day=day,
+            message_id=message_id,
+            detail=reason,
+        )
+
+    def _log_event(self, guild_id: int, user_id: int, kind: str, at: str, **fields):
+        """Buffer a post_events row; call inside the write's writer block so
+        events keep commit order"""
+        self.events.add(guild_id, user_id, kind, at, **fields)
+
+    def flush_events(self) -> int:
+        """Insert all buffered post_events rows in one transaction"""
+        with self._pool.writer() as conn:
+            # Drained under the writer lock, so no later write's events can
+            # be inserted ahead of these
+            batch = self.events.drain()
+            if batch:
+                conn.executemany(
+                    f"""
+                    INSERT INTO post_events ({", ".join(events.EVENT_COLUMNS)})
+                    VALUES ({", ".join("?" for _ in events.EVENT_COLUMNS)})
+                    """,
+                    batch,
+                )
+        return len(batch)
+
+    def replay_events(self) -> Dict[Tuple[int, int], List]:
+        """user_streaks rows rebuilt from post_events, keyed by
+        (guild_id, user_id); see events.replay"""
+        self.flush_events()
+        with self._pool.reader() as conn:
+            return events.replay(
+                conn.execute(
+                    """
+                    SELECT guild_id, user_id, kind, day, username, detail, created_at
+                    FROM post_events ORDER BY event_id
+                    """
+                )
+            )
+
+    def restore_from_events(self) -> int:
+        """Replace user_streaks with its replay from post_events
+
+        The recovery path: runs under the writer lock so no write lands
+        between reading the log and swapping the table. Returns the number
+        of rows restored.
+        """
+        self.flush_events()
+        with self._pool.writer() as conn:
+            rows = events.replay(
+                conn.execute(
+                    """
+                    SELECT guild_id, user_id, kind, day, username, detail, created_at
+                    FROM post_events ORDER BY event_id
+                    """
+                )
+            )
+            conn.execute("DELETE FROM user_streaks")
+            conn.executemany(
+                """
+                INSERT INTO user_streaks
+                (guild_id, user_id, username, current_day, last_post_timestamp,
+                 is_active, created_at, completed_at, reminders_enabled,
+                 challenge_length)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                ((*key, *row) for key, row in rows.items()),
+            )
+        self.cache.clear()
+        self.ranks.reset()
+        self.leaderboards.reset()
+        self.commit_to_volume()
+        return len(rows)
+
+    def explain_query_plan(self, operation: str, params=()) -> List[str]:
+        """Return the EXPLAIN QUERY PLAN detail lines for a statement"""
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                f"EXPLAIN QUERY PLAN {operation}", params
+            ).fetchall()
+        return [row[3] for row in rows]
+
     def get_connection(self):
-        """Get a database connection with timeout to prevent hanging"""
-        return sqlite3.connect(self.db_path, timeout=10)
+        """Get a dedicated database connection (caller closes it)
+
+        Prefer the DatabaseManager methods, which reuse pooled connections.
+        """
+        return self._pool.connect()
     
     def execute_safely(self, operation, params=None, fetch_type=None) -> Tuple[bool, any]:
         """Execute a database operation safely with proper error handling
@@ -351,38 +1055,42 @@ class DatabaseManager:
         Returns:
             Tuple of (success, result)
         """
-        conn = None
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(operation, params)
-            else:
-                cursor.execute(operation)
-                
-            result = None
-            if fetch_type == 'one':
-                result = cursor.fetchone()
-            elif fetch_type == 'all':
-                result = cursor.fetchall()
-            else:
-                result = cursor.rowcount
-                
-            conn.commit()
+            with self._pool.writer() as conn:
+                cursor = conn.cursor()
+                if params:
+                    cursor.execute(operation, params)
+                else:
+                    cursor.execute(operation)
+
+                result = None
+                if fetch_type == 'one':
+                    result = cursor.fetchone()
+                elif fetch_type == 'all':
+                    result = cursor.fetchall()
+                else:
+                    result = cursor.rowcount
+            # Arbitrary SQL may touch any row; drop the cache to stay correct
+            if not operation.lstrip().upper().startswith("SELECT"):
+                self.cache.clear()
+                self.ranks.reset()
+                self.leaderboards.reset()
             return True, result
         except sqlite3.Error as e:
             logging.error(f"Database error: {e}")
             return False, None
-        finally:
-            if conn:
-                conn.close()
         
     def commit_to_volume(self):
-        """Commit changes to the Modal volume if available"""
-        try:
-            if 'modal' in globals():
-                modal.Volume.from_name("discord-bot-db").commit()
-        except Exception as e:
-            logging.error(f"Failed to commit to volume: {e}")
-            # Continue operation even if volume commit fails
-            # This ensures the bot keeps working with local DB
+        """Mark the database dirty; the scheduler batches the Modal volume commit"""
+        if len(self.events) >= self.events.batch_size:
+            self.flush_events()
+        self.volume.mark_dirty()
+
+    def _before_volume_commit(self):
+        # Persist buffered events with the state they describe
+        self.flush_events()
+        self._pool.checkpoint()
+
+    def flush_volume(self) -> bool:
+        """Commit any pending changes to the volume right away"""
+        return self.volume.flush()
@@ -0,0 +1,106 @@
+# db_pool.py: ConnectionPool class
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections: one writer plus a bounded set of readers"""
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA mmap_size=268435456",  # 256 MiB
+        "PRAGMA cache_size=-16000",  # ~16 MiB per connection
+        "PRAGMA temp_store=MEMORY",
+    )
+
+    def __init__(self, db_path: str, readers: int = 4, timeout: float = 10):
+        self.db_path = db_path
+        self.timeout = timeout
+        # In-memory databases are private to a connection, so everything
+        # has to go through the writer
+        self.max_readers = 0 if db_path == ":memory:" else max(0, readers)
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._closed = False
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection with the pool PRAGMAs applied"""
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if self._writer is None:
+            self._writer = self.connect()
+        return self._writer
+
+    @contextmanager
+    def writer(self):
+        """Exclusive access to the writer; commits on success, rolls back on error"""
+        with self._writer_lock:
+            conn = self._get_writer()
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection, falling back to the writer"""
+        if self.max_readers == 0:
+            with self._writer_lock:
+                yield self._get_writer()
+            return
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                return self.connect()
+        return self._readers.get(timeout=self.timeout)
+
+    def checkpoint(self) -> None:
+        """Fold the WAL back into the main database file"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._reader_count = 0
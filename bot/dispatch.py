@@ -0,0 +1,167 @@
+# dispatch.py: MessageDispatcher, a rate-limit-aware concurrent sender
+#
+# The dispatcher knows nothing about discord.py: a job is a route name plus
+# a zero-argument coroutine function. Anything can drive it, including a
+# local fake client. Errors are classified by duck typing on ``status`` and
+# ``retry_after`` (as found on discord.HTTPException / RateLimited).
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SendFunc = Callable[[], Awaitable[object]]
+
+
+class TokenBucket:
+    """Classic token bucket; ``acquire`` waits until a token is available"""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DispatchStats:
+    """Outcome counters for one dispatcher run"""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retries = 0
+        self.duration = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "duration": round(self.duration, 3),
+        }
+
+
+class MessageDispatcher:
+    """Sends queued jobs with bounded concurrency, per-route token buckets
+    and retry with exponential backoff on 429s and 5xx errors
+
+    Routes are strings such as ``"dm"`` or ``"channel:<id>"``; the part
+    before the colon selects the limit in ``route_limits`` and each full
+    route gets its own bucket. Every attempt also takes a token from a
+    global bucket that mirrors Discord's process-wide limit.
+    """
+
+    DEFAULT_ROUTE_LIMITS = {
+        # (tokens per second, burst)
+        "dm": (5.0, 5),
+        "channel": (1.0, 5),
+    }
+
+    def __init__(
+        self,
+        concurrency: int = 5,
+        route_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        global_rate: float = 45.0,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.route_limits = dict(self.DEFAULT_ROUTE_LIMITS)
+        if route_limits:
+            self.route_limits.update(route_limits)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._global = TokenBucket(global_rate, global_rate)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.stats = DispatchStats()
+
+    def submit(self, route: str, send: SendFunc, description: str = "") -> None:
+        self._queue.put_nowait((route, send, description))
+
+    def skip(self, count: int = 1) -> None:
+        """Record jobs that were deliberately not sent (e.g. opted out)"""
+        self.stats.skipped += count
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def run(self) -> DispatchStats:
+        """Drain the queue and return this run's stats"""
+        start = time.perf_counter()
+        workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(min(self.concurrency, max(1, self._queue.qsize())))
+        ]
+        try:
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        self.stats.duration = time.perf_counter() - start
+        return self.stats
+
+    def _bucket(self, route: str) -> TokenBucket:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            rate, burst = self.route_limits.get(
+                route.split(":", 1)[0], self.route_limits["channel"]
+            )
+            bucket = self._buckets[route] = TokenBucket(rate, burst)
+        return bucket
+
+    async def _worker(self) -> None:
+        while True:
+            route, send, description = await self._queue.get()
+            try:
+                await self._deliver(route, send, description)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, route: str, send: SendFunc, description: str):
+        bucket = self._bucket(route)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            await self._global.acquire()
+            try:
+                await send()
+                self.stats.sent += 1
+                return
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    self.stats.failed += 1
+                    logger.error(f"Failed to send {description or route}: {e}")
+                    return
+                self.stats.retries += 1
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if not retryable"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return float(retry_after)
+        status = getattr(error, "status", None)
+        if status == 429 or (status is not None and status >= 500):
+            return self.base_delay * (2**attempt) * (1 + random.random() / 4)
+        return None
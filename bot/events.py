@@ -0,0 +1,180 @@
+# events.py: the post_events log buffer and replay of user_streaks from it
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .migrations import LEGACY_CHALLENGE_LENGTH
+
+# Event kinds. Every change to a user_streaks row is one of these, so the
+# table can be rebuilt by folding the log in event_id order.
+IMPORT = "import"  # Row that existed when the log was introduced (detail: JSON row)
+CREATE = "create"  # detail is the challenge length (absent before it was stored)
+PROGRESS = "progress"  # detail "completed" when the post finished the challenge
+REJECTED = "rejected"  # Audit only; detail is the reason shown to the user
+RESET = "reset"
+FORCE_SET = "force_set"  # detail is the challenge length, like CREATE
+DEACTIVATE = "deactivate"
+REMINDERS = "reminders"  # detail "on" / "off"
+ARCHIVE = "archive"  # Completed and moved to the hall of fame
+DELETE = "delete"
+ADOPT = "adopt"  # Rows of guild user_id (the unassigned guild) moved into guild_id
+
+EVENT_COLUMNS = (
+    "guild_id",
+    "user_id",
+    "kind",
+    "day",
+    "username",
+    "message_id",
+    "detail",
+    "created_at",
+)
+
+Event = Tuple[
+    int, int, str, Optional[int], Optional[str], Optional[int], Optional[str], str
+]
+
+
+class EventBuffer:
+    """Thread-safe list of events waiting for a batched insert
+
+    Writers add events while holding the database writer lock, so the
+    buffer (and therefore event_id) follows commit order.
+    """
+
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = max(1, batch_size)
+        self._events: List[Event] = []
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.batches = 0
+
+    def add(
+        self,
+        guild_id: int,
+        user_id: int,
+        kind: str,
+        created_at: str,
+        day: Optional[int] = None,
+        username: Optional[str] = None,
+        message_id: Optional[int] = None,
+        detail: Optional[str] = None,
+    ) -> bool:
+        """Queue an event; True when a batch is ready to be flushed"""
+        with self._lock:
+            self._events.append(
+                (guild_id, user_id, kind, day, username, message_id, detail, created_at)
+            )
+            return len(self._events) >= self.batch_size
+
+    def drain(self) -> List[Event]:
+        with self._lock:
+            events, self._events = self._events, []
+            if events:
+                self.recorded += len(events)
+                self.batches += 1
+            return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._events),
+            "recorded": self.recorded,
+            "batches": self.batches,
+        }
+
+
+# Replayed rows, in user_streaks column order after the key:
+# [username, current_day, last_post_timestamp, is_active, created_at,
+#  completed_at, reminders_enabled, challenge_length]
+(
+    _USERNAME,
+    _DAY,
+    _LAST_POST,
+    _ACTIVE,
+    _CREATED,
+    _COMPLETED,
+    _REMINDERS,
+    _LENGTH,
+) = range(8)
+
+
+def _length(detail: Optional[str], default: int) -> int:
+    return int(detail) if detail else default
+
+
+def replay(events: Iterable[Tuple]) -> Dict[Tuple[int, int], List]:
+    """Fold ``(guild_id, user_id, kind, day, username, detail, created_at)``
+    events, in event_id order, into user_streaks rows keyed by
+    ``(guild_id, user_id)``
+
+    Each event is applied the way the DatabaseManager write that recorded
+    it changed the table, so the result matches what the writes produced.
+    """
+    rows: Dict[Tuple[int, int], List] = {}
+    for guild_id, user_id, kind, day, username, detail, at in events:
+        key = (guild_id, user_id)
+        if kind == PROGRESS:
+            row = rows.get(key)
+            if row is not None:
+                row[_USERNAME] = username
+                row[_DAY] = day
+                row[_LAST_POST] = at
+                row[_COMPLETED] = at if detail == "completed" else None
+        elif kind == CREATE:
+            length = _length(detail, LEGACY_CHALLENGE_LENGTH)
+            rows.setdefault(key, [username, 1, at, 1, at, None, 1, length])
+        elif kind == REJECTED:
+            continue
+        elif kind == DEACTIVATE:
+            row = rows.get(key)
+            if row is not None:
+                row[_ACTIVE] = 0
+        elif kind == RESET:
+            row = rows.get(key)
+            if row is not None:
+                row[_DAY] = 1
+                row[_LAST_POST] = at
+                row[_COMPLETED] = None
+                row[_ACTIVE] = 1
+        elif kind == FORCE_SET:
+            row = rows.get(key)
+            length = _length(
+                detail, row[_LENGTH] if row is not None else LEGACY_CHALLENGE_LENGTH
+            )
+            completed_at = at if day == length else None
+            if row is None:
+                rows[key] = [username, day, at, 1, at, completed_at, 1, length]
+            else:
+                row[_USERNAME] = username
+                row[_DAY] = day
+                row[_LAST_POST] = at
+                row[_COMPLETED] = completed_at
+                row[_ACTIVE] = 1
+                row[_LENGTH] = length
+        elif kind == REMINDERS:
+            row = rows.get(key)
+            if row is not None:
+                row[_REMINDERS] = 1 if detail == "on" else 0
+        elif kind in (ARCHIVE, DELETE):
+            rows.pop(key, None)
+        elif kind == IMPORT:
+            state = json.loads(detail)
+            rows[key] = [
+                state["username"],
+                state["current_day"],
+                state["last_post_timestamp"],
+                state["is_active"],
+                state["created_at"],
+                state["completed_at"],
+                state["reminders_enabled"],
+                state.get("challenge_length", LEGACY_CHALLENGE_LENGTH),
+            ]
+        elif kind == ADOPT:
+            # Same rule as adopt_unassigned_rows: skip users already present
+            for (row_guild, row_user) in [k for k in rows if k[0] == user_id]:
+                if (guild_id, row_user) not in rows:
+                    rows[(guild_id, row_user)] = rows.pop((row_guild, row_user))
+    return rows
@@ -0,0 +1,197 @@
+# github.py: GitHubClient, a pooled GitHub API client with an ETag cache
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """LRU of JSON responses with their ETag and a freshness deadline"""
+
+    def __init__(self, ttl: float = 300, max_size: int = 512):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[float, Optional[str], object]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, etag: Optional[str], data) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, etag, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def touch(self, key: str) -> None:
+        """Extend freshness after a 304 Not Modified"""
+        _, etag, data = self._entries[key]
+        self.put(key, etag, data)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class GitHubClient:
+    """Bot-lifetime GitHub REST client
+
+    One pooled ``aiohttp.ClientSession`` is shared by every request. JSON
+    responses are cached: within ``cache_ttl`` a repeat request costs
+    nothing, after that it is revalidated with ``If-None-Match`` so an
+    unchanged resource costs a 304, which GitHub doesn't count against the
+    rate limit for authenticated requests.
+    """
+
+    API_URL = "https://api.github.com"
+
+    def __init__(
+        self,
+        base_url: str = API_URL,
+        token: Optional[str] = None,
+        timeout: float = 10,
+        cache_ttl: float = 300,
+        cache_size: int = 512,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_ttl, cache_size)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.rate_limit_limit: Optional[int] = None
+        self.rate_limit_remaining: Optional[int] = None
+        self.rate_limit_reset: Optional[float] = None
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+
+    async def start(self) -> None:
+        if self._session is not None:
+            return
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "100DoC-discord-bot",
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        self._session = aiohttp.ClientSession(
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "cache_hits": self.cache_hits,
+            "cached_entries": len(self.cache),
+            "rate_limit_remaining": self.rate_limit_remaining,
+        }
+
+    def budget(self, reserve_fraction: float = 0.0) -> Optional[int]:
+        """Requests left in this window, keeping ``reserve_fraction`` of the
+        hourly limit back; None until GitHub has told us"""
+        if self.rate_limit_remaining is None:
+            return None
+        if self.rate_limit_reset is not None and time.time() >= self.rate_limit_reset:
+            return None  # Window has rolled over; the next response says
+        reserve = int((self.rate_limit_limit or 0) * reserve_fraction)
+        return max(0, self.rate_limit_remaining - reserve)
+
+    async def fetch(
+        self, path: str, params: Optional[Dict] = None, etag: Optional[str] = None
+    ) -> Tuple[int, object, Optional[str]]:
+        """Uncached conditional GET; returns ``(status, data, etag)``
+
+        A 304 comes back as ``(304, None, etag)``.
+        """
+        await self.start()
+        headers = {"If-None-Match": etag} if etag else {}
+        self.requests += 1
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with self._session.get(
+                f"{self.base_url}{path}", params=params, headers=headers
+            ) as resp:
+                status = str(resp.status)
+                self._track_rate_limit(resp)
+                if resp.status == 304:
+                    self.not_modified += 1
+                    return 304, None, etag
+                if resp.status != 200:
+                    return resp.status, None, None
+                return 200, await resp.json(), resp.headers.get("ETag")
+        finally:
+            if metrics.REGISTRY.enabled:
+                metrics.GITHUB_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start, status
+                )
+
+    async def get_json(self, path: str, params: Optional[Dict] = None):
+        """GET ``path``; returns ``(status, data)``, data is None on errors"""
+        key = f"{path}?" + "&".join(
+            f"{k}={v}" for k, v in sorted((params or {}).items())
+        )
+        entry = self.cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.cache_hits += 1
+            return 200, entry[2]
+        status, data, etag = await self.fetch(
+            path, params, entry[1] if entry is not None else None
+        )
+        if status == 304 and entry is not None:
+            self.cache.touch(key)
+            return 200, entry[2]
+        if status == 200:
+            self.cache.put(key, etag, data)
+        return status, data
+
+    async def get_commits(self, repo: str, n: int = 3) -> Optional[List[Dict]]:
+        """Latest ``n`` commits of ``owner/name`` (summarized), or None"""
+        per_page = max(1, min(n, 100))
+        try:
+            status, data = await self.get_json(
+                f"/repos/{repo}/commits", {"per_page": per_page}
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"GitHub request for {repo} failed: {e}")
+            return None
+        if status != 200:
+            return None
+        return [self.summarize_commit(c) for c in data[:per_page]]
+
+    @staticmethod
+    def summarize_commit(commit: Dict) -> Dict:
+        """The fields the bot shows, from a raw commits API entry"""
+        return {
+            "sha": commit["sha"],
+            "date": commit["commit"]["committer"]["date"],
+            "message": commit["commit"]["message"].split("\n")[0],
+            "url": commit["html_url"],
+        }
+
+    def _track_rate_limit(self, resp) -> None:
+        limit = resp.headers.get("X-RateLimit-Limit")
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if limit is not None:
+            self.rate_limit_limit = int(limit)
+        if remaining is not None:
+            self.rate_limit_remaining = int(remaining)
+        if reset is not None:
+            self.rate_limit_reset = float(reset)
@@ -0,0 +1,98 @@
+# github_poller.py: RepoActivityPoller, background refresh of linked repos
+import asyncio
+import logging
+import time
+from typing import Dict
+
+import aiohttp
+
+from .github import GitHubClient
+
+logger = logging.getLogger(__name__)
+
+
+class RepoActivityPoller:
+    """Refreshes repo_activity for every repo linked with !linkrepo
+
+    Each round polls the least recently fetched repos first, with bounded
+    concurrency and a conditional request per repo (stored ETag), and
+    stops before spending the last ``reserve`` fraction of GitHub's hourly
+    limit so interactive !github calls still work. Unchanged repos cost a
+    304, so with a token a few thousand repos fit comfortably in an hour.
+    """
+
+    def __init__(
+        self,
+        db,
+        github: GitHubClient,
+        concurrency: int = 8,
+        reserve: float = 0.2,
+        per_page: int = 10,
+        max_per_round: int = 1000,
+    ):
+        self.db = db
+        self.github = github
+        self.concurrency = concurrency
+        self.reserve = reserve
+        self.per_page = per_page
+        self.max_per_round = max_per_round
+
+    async def poll_once(self) -> Dict[str, float]:
+        start = time.perf_counter()
+        stats = {"polled": 0, "updated": 0, "not_modified": 0, "errors": 0}
+        budget = self.github.budget(self.reserve)
+        if budget is None:
+            # Unknown budget: probe with a small batch to learn the limit
+            budget = self.concurrency
+        limit = min(budget, self.max_per_round)
+        if limit <= 0:
+            logger.info("GitHub poll skipped: rate-limit budget exhausted")
+            stats["duration"] = 0.0
+            return stats
+
+        repos = await self.db.get_repos_to_poll(limit)
+        slots = asyncio.Semaphore(self.concurrency)
+        results = []
+
+        async def poll(repo: str, etag):
+            async with slots:
+                remaining = self.github.budget(self.reserve)
+                if remaining is not None and remaining <= 0:
+                    return
+                try:
+                    status, data, new_etag = await self.github.fetch(
+                        f"/repos/{repo}/commits",
+                        {"per_page": self.per_page},
+                        etag,
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    stats["errors"] += 1
+                    logger.warning(f"GitHub poll for {repo} failed: {e}")
+                    return
+            stats["polled"] += 1
+            if status == 304:
+                stats["not_modified"] += 1
+                results.append({"repo": repo, "status": 304})
+            elif status == 200:
+                stats["updated"] += 1
+                results.append(
+                    {
+                        "repo": repo,
+                        "status": 200,
+                        "etag": new_etag,
+                        "commits": [
+                            GitHubClient.summarize_commit(c) for c in data
+                        ],
+                    }
+                )
+            elif status in (403, 429):
+                stats["errors"] += 1  # Rate limited; budget check stops the rest
+            else:
+                # Missing or private repo: remember it so it isn't retried first
+                stats["errors"] += 1
+                results.append({"repo": repo, "status": status, "commits": []})
+
+        await asyncio.gather(*(poll(repo, etag) for repo, etag in repos))
+        await self.db.save_repo_activity(results)
+        stats["duration"] = round(time.perf_counter() - start, 3)
+        return stats
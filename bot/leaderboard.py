@@ -0,0 +1,199 @@
+# leaderboard.py: per-guild top-N leaderboard snapshots and the embed cache
+import bisect
+import datetime
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Sort key plus payload, ordered like LEADERBOARD_QUERY:
+# (-current_day, last_post_timestamp, user_id, username)
+_Entry = Tuple[int, str, int, str]
+
+
+class _Snapshot:
+    __slots__ = ("entries", "complete", "version")
+
+    def __init__(self, entries: List[_Entry], complete: bool, version: int):
+        self.entries = entries
+        # True when ``entries`` holds every active user of the guild, so a
+        # user falling off the end can't be hiding someone better
+        self.complete = complete
+        self.version = version
+
+
+class LeaderboardSnapshots:
+    """Top ``capacity`` active users per guild, kept current by writes
+
+    A guild's snapshot is loaded from the database on first use and then
+    patched by every streak write: progress, create, reset, force-set,
+    deactivation, archive and delete. ``version`` changes only when the
+    first ``display`` rows change, so rendered leaderboards can be reused
+    until then. Loads follow the UserStateCache rule: a loader takes a
+    ``generation`` token before querying and the result is only installed
+    if no write happened meanwhile.
+    """
+
+    def __init__(self, capacity: int = 25, display: int = 5):
+        self.capacity = max(1, capacity)
+        self.display = min(display, self.capacity)
+        self._snapshots: Dict[int, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._versions = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.rebuilds = 0  # Snapshots dropped because they ran short
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def peek(self, guild_id: int, limit: int) -> Optional[Tuple[int, List[Dict]]]:
+        """``(version, rows)`` for the top ``limit`` if the snapshot can
+        answer, otherwise None (count it as a miss and query instead)"""
+        with self._lock:
+            snapshot = self._snapshots.get(guild_id)
+            if snapshot is None or (
+                len(snapshot.entries) < limit and not snapshot.complete
+            ):
+                if limit <= self.capacity:
+                    self.misses += 1  # Longer lists are never snapshotted
+                return None
+            self.hits += 1
+            return snapshot.version, [
+                {
+                    "user_id": user_id,
+                    "username": username,
+                    "current_day": -negative_day,
+                    "last_post_timestamp": datetime.datetime.fromisoformat(
+                        timestamp
+                    ),
+                }
+                for negative_day, timestamp, user_id, username in snapshot.entries[
+                    :limit
+                ]
+            ]
+
+    def version(self, guild_id: int) -> Optional[int]:
+        with self._lock:
+            snapshot = self._snapshots.get(guild_id)
+            return snapshot.version if snapshot is not None else None
+
+    def load(
+        self, guild_id: int, rows: List[Tuple[int, str, int, str]], token: int
+    ) -> None:
+        """Install ``(user_id, username, current_day, timestamp)`` rows read
+        with ``LIMIT capacity`` after taking ``token``"""
+        with self._lock:
+            if token != self._generation:
+                return
+            self.loads += 1
+            self._versions += 1
+            self._snapshots[guild_id] = _Snapshot(
+                [
+                    (-day, timestamp, user_id, username)
+                    for user_id, username, day, timestamp in rows
+                ],
+                complete=len(rows) < self.capacity,
+                version=self._versions,
+            )
+
+    def upsert(
+        self, guild_id: int, user_id: int, username: str, day: int, timestamp: str
+    ) -> None:
+        """An active user's new position (ISO timestamp)"""
+        with self._lock:
+            self._generation += 1
+            snapshot = self._snapshots.get(guild_id)
+            if snapshot is None:
+                return
+            before = snapshot.entries[: self.display]
+            self._discard(snapshot, user_id)
+            entry = (-day, timestamp, user_id, username)
+            entries = snapshot.entries
+            if len(entries) < self.capacity and snapshot.complete:
+                bisect.insort(entries, entry)
+            elif entries and entry < entries[-1]:
+                bisect.insort(entries, entry)
+                if len(entries) > self.capacity:
+                    entries.pop()
+                    snapshot.complete = False
+            else:
+                # Below the snapshot: the user stays outside it
+                snapshot.complete = False
+            self._settle(guild_id, snapshot, before)
+
+    def remove(self, guild_id: int, user_id: int) -> None:
+        """The user left the leaderboard (inactive, archived or deleted)"""
+        with self._lock:
+            self._generation += 1
+            snapshot = self._snapshots.get(guild_id)
+            if snapshot is None:
+                return
+            before = snapshot.entries[: self.display]
+            self._discard(snapshot, user_id)
+            self._settle(guild_id, snapshot, before)
+
+    def reset(self, guild_id: Optional[int] = None) -> None:
+        """Drop one guild's snapshot, or all of them"""
+        with self._lock:
+            self._generation += 1
+            if guild_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(guild_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "guilds": len(self._snapshots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+            "rebuilds": self.rebuilds,
+        }
+
+    @staticmethod
+    def _discard(snapshot: _Snapshot, user_id: int) -> None:
+        for i, entry in enumerate(snapshot.entries):
+            if entry[2] == user_id:
+                del snapshot.entries[i]
+                return
+
+    def _settle(self, guild_id: int, snapshot: _Snapshot, before) -> None:
+        if len(snapshot.entries) < self.display and not snapshot.complete:
+            # Someone outside the snapshot may now belong in the top rows
+            del self._snapshots[guild_id]
+            self.rebuilds += 1
+        elif snapshot.entries[: self.display] != before:
+            self._versions += 1
+            snapshot.version = self._versions
+
+
+class RenderCache:
+    """Last rendering per guild, reused while its key is unchanged"""
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[Hashable, object]] = {}
+        self.hits = 0
+        self.rebuilds = 0
+
+    def get(self, guild_id: int, key: Hashable):
+        entry = self._entries.get(guild_id)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        return None
+
+    def put(self, guild_id: int, key: Hashable, value) -> None:
+        self.rebuilds += 1
+        self._entries[guild_id] = (key, value)
+
+    def stats(self) -> Dict[str, float]:
+        renders = self.hits + self.rebuilds
+        return {
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "hit_rate": self.hits / renders if renders else 0.0,
+        }
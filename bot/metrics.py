@@ -0,0 +1,419 @@
+# metrics.py: in-process counters and latency histograms, /metrics endpoint
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from .config import MetricsConfig
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+
+# Seconds; spans a cached SQLite read up to a slow volume commit
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _label_key(names: Sequence[str], values: Labels) -> str:
+    """Compact series name for JSON snapshots, e.g. ``method=get_user_data``"""
+    return ",".join(f"{name}={value}" for name, value in zip(names, values))
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_label_text(self.labelnames, labels)} {value}"
+            for labels, value in items
+        ]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return {
+            _label_key(self.labelnames, labels): value for labels, value in items
+        }
+
+
+class Histogram:
+    """Bucketed observations per label set, Prometheus-style
+
+    Bucket counts are kept per bucket and only made cumulative when
+    rendered, so ``observe`` is one bisect and three additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (+Inf last), sum, count]
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _items(self):
+        with self._lock:
+            return sorted(
+                (labels, (list(counts), total, count))
+                for labels, (counts, total, count) in self._series.items()
+            )
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """Estimate of the q-quantile, interpolated within its bucket"""
+        series = self._series.get(labels)
+        if series is None or series[2] == 0:
+            return None
+        return self._quantile(q, series[0], series[2])
+
+    def _quantile(self, q: float, counts: List[int], count: int) -> float:
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # Beyond the last bound
+                lower = self.buckets[i - 1] if i else 0.0
+                fraction = (rank - seen) / bucket_count
+                return lower + (self.buckets[i] - lower) * fraction
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._items():
+            cumulative = 0
+            bounds = [*(repr(b) for b in self.buckets), "+Inf"]
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_text = _label_text(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            _label_key(self.labelnames, labels): {
+                "count": count,
+                "sum": round(total, 6),
+                "p50": round(self._quantile(0.5, counts, count), 6),
+                "p99": round(self._quantile(0.99, counts, count), 6),
+            }
+            for labels, (counts, total, count) in self._items()
+            if count
+        }
+
+
+class Gauge:
+    """Value(s) read from a callback at collection time, so components that
+    already keep stats (caches, the volume scheduler) cost nothing per event
+
+    The callback returns a number, or a dict whose keys become the values of
+    the single label.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], object],
+        labelname: str = "stat",
+    ):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.labelnames = (labelname,)
+
+    def _values(self) -> Dict[Labels, float]:
+        try:
+            value = self.collect()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} failed: {e}")
+            return {}
+        if isinstance(value, dict):
+            return {
+                (str(key),): v
+                for key, v in value.items()
+                if isinstance(v, (int, float)) and not isinstance(v, bool)
+            }
+        return {(): value} if value is not None else {}
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, labels)} {value}"
+            for labels, value in sorted(self._values().items())
+        ]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            _label_key(self.labelnames, labels): value
+            for labels, value in sorted(self._values().items())
+        }
+
+
+class MetricsRegistry:
+    """Named metrics plus the ``enabled`` switch that instrumentation checks
+
+    When disabled, call sites skip their timing entirely and no wrappers,
+    server or snapshot task are installed, so the cost is one attribute
+    check on the hot paths.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            # Gauges are replaced: their callback closes over live objects
+            if existing is not None and metric.kind != "gauge":
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(
+        self, name: str, help: str, collect: Callable[[], object], labelname="stat"
+    ) -> Gauge:
+        """Register (or replace) a callback gauge"""
+        return self._register(Gauge(name, help, collect, labelname))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """Zero every counter and histogram (e.g. between benchmark runs)"""
+        for metric in list(self._metrics.values()):
+            if metric.kind != "gauge":
+                metric.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        return {
+            "timestamp": time.time(),
+            "metrics": {
+                name: {"type": metric.kind, "values": metric.snapshot()}
+                for name, metric in sorted(self._metrics.items())
+            },
+        }
+
+    def write_snapshot(self, path: str) -> None:
+        """Atomically replace ``path`` with a JSON snapshot (blocking)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry(enabled=MetricsConfig.ENABLED)
+
+# Hot-path metrics; label values are bounded (outcomes, method and route names)
+LOG_MESSAGES = REGISTRY.counter(
+    "bot_log_messages_total",
+    "Posts in the logging channel by outcome",
+    ("outcome",),
+)
+LOG_MESSAGE_SECONDS = REGISTRY.histogram(
+    "bot_log_message_seconds",
+    "handle_log_message time for parsed posts, including lock waits",
+)
+DB_CALL_SECONDS = REGISTRY.histogram(
+    "bot_db_call_seconds",
+    "DatabaseManager method time on the database executor",
+    ("method",),
+)
+DB_QUEUE_SECONDS = REGISTRY.histogram(
+    "bot_db_queue_seconds",
+    "Time a database call waited for an executor thread",
+    ("method",),
+)
+DB_ERRORS = REGISTRY.counter(
+    "bot_db_errors_total", "DatabaseManager calls that raised", ("method",)
+)
+VOLUME_COMMIT_SECONDS = REGISTRY.histogram(
+    "bot_volume_commit_seconds",
+    "Volume commits, including the event flush and WAL checkpoint before them",
+)
+VOLUME_COMMIT_FAILURES = REGISTRY.counter(
+    "bot_volume_commit_failures_total", "Volume commits that raised"
+)
+DISCORD_REQUEST_SECONDS = REGISTRY.histogram(
+    "bot_discord_request_seconds",
+    "Discord REST calls (sends, replies, reactions, fetches), incl. rate-limit waits",
+    ("method", "route"),
+)
+DISCORD_REQUEST_ERRORS = REGISTRY.counter(
+    "bot_discord_request_errors_total",
+    "Discord REST calls that raised",
+    ("route", "status"),
+)
+GITHUB_REQUEST_SECONDS = REGISTRY.histogram(
+    "bot_github_request_seconds",
+    "GitHub API requests that went to the network, by response status",
+    ("status",),
+)
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "bot_loop_lag_seconds", "How late the watchdog heartbeat woke up"
+)
+LOOP_STALLS = REGISTRY.counter(
+    "bot_loop_stalls_total", "Heartbeats late by at least the stall threshold"
+)
+LOOP_STALL_SECONDS = REGISTRY.histogram(
+    "bot_loop_stall_seconds", "Lag of heartbeats that counted as stalls"
+)
+LOOP_SLOW_CALLBACKS = REGISTRY.counter(
+    "bot_loop_slow_callbacks_total",
+    "Callbacks asyncio debug mode reported as slow (only with LOOP_ASYNCIO_DEBUG)",
+)
+
+
+class MetricsServer:
+    """Serves ``/metrics`` (Prometheus text) and ``/metrics.json`` locally"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/metrics.json", self._metrics_json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request):
+        return web.Response(
+            body=self.registry.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def _metrics_json(self, request):
+        return web.json_response(self.registry.snapshot())
@@ -0,0 +1,296 @@
+# metrics_store.py: MetricsStore, an append-only SQLite time series with rollups
+#
+# Raw samples are appended in batches and stay at full resolution for
+# ``raw_retention`` seconds. Compaction then folds them into fixed-size
+# buckets (count/sum/min/max per metric), and each rollup tier is folded
+# into the next, coarser one once it ages out. Writes touch only the tail
+# of the tables, so their cost doesn't grow with history, and data only
+# ever lives in one tier, so window summaries can combine tiers exactly.
+import datetime
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# (bucket seconds, retention seconds or None to keep forever); each bucket
+# size must be a multiple of the previous one
+DEFAULT_TIERS = (
+    (300, 30 * 86400),  # 5-minute buckets for a month
+    (3600, None),  # then hourly
+)
+
+Sample = Tuple[float, str, float]  # (unix time, name, value)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS metric_samples (
+        ts REAL NOT NULL,
+        name TEXT NOT NULL,
+        value REAL NOT NULL
+    )
+    """,
+    # By time only: compaction takes the oldest rows, and a summary reads
+    # at most raw_retention worth of samples
+    """
+    CREATE INDEX IF NOT EXISTS idx_metric_samples_ts ON metric_samples (ts)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS metric_rollups (
+        name TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        bucket_start INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        sum REAL NOT NULL,
+        min REAL NOT NULL,
+        max REAL NOT NULL,
+        PRIMARY KEY (name, resolution, bucket_start)
+    ) WITHOUT ROWID
+    """,
+    # Compaction selects the aged-out buckets of a tier across all names
+    """
+    CREATE INDEX IF NOT EXISTS idx_metric_rollups_age
+    ON metric_rollups (resolution, bucket_start)
+    """,
+)
+
+# Late samples can land in a bucket that was already rolled up
+_MERGE_ROLLUP = """
+    ON CONFLICT (name, resolution, bucket_start) DO UPDATE SET
+        count = count + excluded.count,
+        sum = sum + excluded.sum,
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max)
+"""
+
+
+class MetricsStore:
+    """Time-series store for resource and bot metrics
+
+    ``record`` appends one batch in one transaction. ``record`` compacts
+    only once the oldest raw sample has aged out of ``raw_retention`` by a
+    whole bucket, and at most every ``compact_every`` seconds, so raw data
+    is kept for up to ``raw_retention + compact_every`` and compaction
+    cost is amortized over many writes. Call ``checkpoint`` (or ``close``)
+    before committing the file to a volume.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        raw_retention: float = 2 * 86400,
+        tiers: Sequence[Tuple[int, Optional[float]]] = DEFAULT_TIERS,
+        compact_every: float = 3600,
+    ):
+        for (finer, _), (coarser, _) in zip(tiers, tiers[1:]):
+            if coarser % finer:
+                raise ValueError(f"Bucket {coarser}s is not a multiple of {finer}s")
+        self.path = path
+        self.raw_retention = raw_retention
+        self.tiers = tuple(tiers)
+        self.compact_every = compact_every
+        self._pool = ConnectionPool(path, readers=0)
+        self._next_compaction = 0.0
+        # Oldest raw sample time, None until read from the table
+        self._oldest_raw: Optional[float] = None
+        self._initialized = False
+        self.samples_written = 0
+        self.compactions = 0
+
+    def _init(self, conn) -> None:
+        if not self._initialized:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._initialized = True
+
+    def record(self, values: Dict[str, float], ts: Optional[float] = None) -> None:
+        """Append one sample per metric, all at time ``ts`` (default now)"""
+        ts = time.time() if ts is None else ts
+        self.record_many((ts, name, value) for name, value in values.items())
+
+    def record_many(self, samples: Iterable[Sample]) -> int:
+        """Append a batch of ``(ts, name, value)`` samples; returns the count"""
+        rows = [
+            (float(ts), name, float(value))
+            for ts, name, value in samples
+            if value is not None
+        ]
+        if not rows:
+            return 0
+        with self._pool.writer() as conn:
+            self._init(conn)
+            conn.executemany(
+                "INSERT INTO metric_samples (ts, name, value) VALUES (?, ?, ?)", rows
+            )
+            if self._oldest_raw is None:
+                self._oldest_raw = self._min_raw_ts(conn)
+            else:
+                self._oldest_raw = min(self._oldest_raw, min(row[0] for row in rows))
+        self.samples_written += len(rows)
+        latest = max(row[0] for row in rows)
+        if latest >= max(self._raw_rollover(), self._next_compaction):
+            self.compact(latest)
+        return len(rows)
+
+    @staticmethod
+    def _min_raw_ts(conn) -> Optional[float]:
+        return conn.execute("SELECT MIN(ts) FROM metric_samples").fetchone()[0]
+
+    def _raw_rollover(self) -> float:
+        """Earliest time at which compaction has raw samples to move"""
+        if self._oldest_raw is None:
+            return float("inf")
+        if not self.tiers:
+            return self._oldest_raw + self.raw_retention
+        # The raw cutoff is bucket-aligned, see _roll_raw
+        resolution = self.tiers[0][0]
+        return (
+            self._align(self._oldest_raw, resolution) + resolution + self.raw_retention
+        )
+
+    def compact(self, now: Optional[float] = None) -> None:
+        """Roll aged-out raw samples and rollups into the next tier"""
+        now = time.time() if now is None else now
+        with self._pool.writer() as conn:
+            self._init(conn)
+            if self.tiers:
+                self._roll_raw(conn, now)
+            for i, (resolution, retention) in enumerate(self.tiers):
+                if retention is None:
+                    continue
+                if i + 1 < len(self.tiers):
+                    coarser = self.tiers[i + 1][0]
+                    self._roll_tier(
+                        conn, resolution, coarser, self._align(now - retention, coarser)
+                    )
+                else:
+                    conn.execute(
+                        "DELETE FROM metric_rollups "
+                        "WHERE resolution = ? AND bucket_start < ?",
+                        (resolution, self._align(now - retention, resolution)),
+                    )
+            if not self.tiers:
+                conn.execute(
+                    "DELETE FROM metric_samples WHERE ts < ?",
+                    (now - self.raw_retention,),
+                )
+            self._oldest_raw = self._min_raw_ts(conn)
+        self.compactions += 1
+        self._next_compaction = now + self.compact_every
+
+    @staticmethod
+    def _align(ts: float, resolution: int) -> int:
+        return int(ts // resolution) * resolution
+
+    def _roll_raw(self, conn, now: float) -> None:
+        resolution = self.tiers[0][0]
+        # Only whole buckets, so a bucket is never split between tiers
+        cutoff = self._align(now - self.raw_retention, resolution)
+        conn.execute(
+            f"""
+            INSERT INTO metric_rollups
+                (name, resolution, bucket_start, count, sum, min, max)
+            SELECT name, ?, CAST(ts / ? AS INTEGER) * ?,
+                   COUNT(*), SUM(value), MIN(value), MAX(value)
+            FROM metric_samples
+            WHERE ts < ?
+            GROUP BY name, 3
+            {_MERGE_ROLLUP}
+            """,
+            (resolution, resolution, resolution, cutoff),
+        )
+        conn.execute("DELETE FROM metric_samples WHERE ts < ?", (cutoff,))
+
+    def _roll_tier(self, conn, resolution: int, coarser: int, cutoff: int) -> None:
+        # ``cutoff`` is aligned to the coarser bucket, for the same reason
+        conn.execute(
+            f"""
+            INSERT INTO metric_rollups
+                (name, resolution, bucket_start, count, sum, min, max)
+            SELECT name, ?, (bucket_start / ?) * ?,
+                   SUM(count), SUM(sum), MIN(min), MAX(max)
+            FROM metric_rollups
+            WHERE resolution = ? AND bucket_start < ?
+            GROUP BY name, 3
+            {_MERGE_ROLLUP}
+            """,
+            (coarser, coarser, coarser, resolution, cutoff),
+        )
+        conn.execute(
+            "DELETE FROM metric_rollups WHERE resolution = ? AND bucket_start < ?",
+            (resolution, cutoff),
+        )
+
+    def summary(
+        self, name: str, start: float, end: Optional[float] = None
+    ) -> Optional[Dict[str, float]]:
+        """min/avg/max/count of ``name`` over ``[start, end)``, or None
+
+        Raw samples are matched exactly; rolled-up data by bucket start,
+        so a window edge is as precise as the bucket it falls in.
+        """
+        end = time.time() if end is None else end
+        with self._pool.reader() as conn:
+            self._init(conn)
+            row = conn.execute(
+                """
+                SELECT SUM(count), SUM(sum), MIN(min), MAX(max) FROM (
+                    SELECT COUNT(*) AS count, SUM(value) AS sum,
+                           MIN(value) AS min, MAX(value) AS max
+                    FROM metric_samples
+                    WHERE name = ? AND ts >= ? AND ts < ?
+                    UNION ALL
+                    SELECT SUM(count), SUM(sum), MIN(min), MAX(max)
+                    FROM metric_rollups
+                    WHERE name = ? AND bucket_start >= ? AND bucket_start < ?
+                )
+                """,
+                (name, start, end, name, start, end),
+            ).fetchone()
+        count, total, low, high = row
+        if not count:
+            return None
+        return {"min": low, "avg": total / count, "max": high, "count": count}
+
+    def names(self) -> List[str]:
+        with self._pool.reader() as conn:
+            self._init(conn)
+            return [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT name FROM metric_samples "
+                    "UNION SELECT DISTINCT name FROM metric_rollups ORDER BY 1"
+                )
+            ]
+
+    def import_jsonl(self, path: str, time_key: str = "timestamp") -> int:
+        """Load a legacy JSON-lines metrics file (ISO timestamps); returns
+        the number of samples imported"""
+        samples = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    ts = datetime.datetime.fromisoformat(entry.pop(time_key))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Skipping bad metrics line in {path}: {e}")
+                    continue
+                if ts.tzinfo is None:
+                    ts = ts.replace(tzinfo=datetime.timezone.utc)
+                samples += [
+                    (ts.timestamp(), name, value)
+                    for name, value in entry.items()
+                    if isinstance(value, (int, float))
+                ]
+        return self.record_many(samples)
+
+    def checkpoint(self) -> None:
+        """Fold the WAL into the main file, e.g. before a volume commit"""
+        self._pool.checkpoint()
+
+    def close(self) -> None:
+        self._pool.checkpoint()
+        self._pool.close()
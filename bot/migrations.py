@@ -0,0 +1,283 @@
+# migrations.py: versioned schema migrations tracked in PRAGMA user_version
+#
+# Each migration takes a cursor and must be safe to run against databases
+# created before versioning existed (user_version 0), so guard anything
+# that isn't naturally idempotent.
+import os
+import sqlite3
+
+# Guild that rows from before per-guild partitioning are moved to. 0 means
+# "unassigned": a bot that is in exactly one guild adopts them on startup
+# (DatabaseManager.adopt_unassigned_rows).
+UNASSIGNED_GUILD_ID = 0
+LEGACY_GUILD_ID = int(os.environ.get("LEGACY_GUILD_ID", str(UNASSIGNED_GUILD_ID)))
+# Challenge length of streaks from before it was stored per user; only
+# [day/100] posts were accepted then
+LEGACY_CHALLENGE_LENGTH = 100
+
+
+def add_reminders_enabled(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("PRAGMA table_info(user_streaks)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "reminders_enabled" not in columns:
+        cursor.execute(
+            "ALTER TABLE user_streaks ADD COLUMN reminders_enabled BOOLEAN NOT NULL DEFAULT 1"
+        )
+
+
+def add_processed_messages(cursor: sqlite3.Cursor) -> None:
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS processed_messages (
+            message_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            processed_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def add_streak_indexes(cursor: sqlite3.Cursor) -> None:
+    # Covers get_leaderboard and the rank index load: the index order
+    # matches ORDER BY current_day DESC, last_post_timestamp ASC, and
+    # user_id rides along as the rowid
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_streaks_leaderboard
+        ON user_streaks (is_active, current_day DESC, last_post_timestamp, username)
+        """
+    )
+    # Covers get_inactive_users: range scan on last_post_timestamp
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_streaks_inactivity
+        ON user_streaks (is_active, last_post_timestamp, current_day, reminders_enabled, username)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_processed_messages_processed_at
+        ON processed_messages (processed_at)
+        """
+    )
+
+
+def add_repo_activity(cursor: sqlite3.Cursor) -> None:
+    # Latest commits per linked repo, filled by the background poller.
+    # The ETag is stored so conditional requests survive restarts.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS repo_activity (
+            github_repo TEXT PRIMARY KEY,
+            status INTEGER NOT NULL,
+            etag TEXT DEFAULT NULL,
+            commits TEXT NOT NULL DEFAULT '[]',
+            last_commit_at TEXT DEFAULT NULL,
+            fetched_at TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_repo_activity_fetched_at
+        ON repo_activity (fetched_at)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_repos_github_repo
+        ON user_repos (github_repo)
+        """
+    )
+
+
+def _rebuild_with_guild(cursor: sqlite3.Cursor, table: str, definition: str) -> None:
+    """Recreate ``table`` keyed by (guild_id, user_id), keeping its rows"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "guild_id" in columns:
+        return
+    # Left behind by a rebuild that crashed before migrations ran in a
+    # single transaction; its rows were never committed
+    cursor.execute(f"DROP TABLE IF EXISTS {table}_partitioned")
+    cursor.execute(f"CREATE TABLE {table}_partitioned ({definition})")
+    column_list = ", ".join(columns)
+    cursor.execute(
+        f"""
+        INSERT INTO {table}_partitioned (guild_id, {column_list})
+        SELECT ?, {column_list} FROM {table}
+        """,
+        (LEGACY_GUILD_ID,),
+    )
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_partitioned RENAME TO {table}")
+
+
+def partition_by_guild(cursor: sqlite3.Cursor) -> None:
+    # One process serves several guilds, so every per-user table is keyed
+    # by (guild_id, user_id). Dropping the old tables drops their indexes.
+    _rebuild_with_guild(
+        cursor,
+        "user_streaks",
+        """
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        current_day INTEGER NOT NULL DEFAULT 1,
+        last_post_timestamp TEXT NOT NULL,
+        is_active BOOLEAN NOT NULL DEFAULT 1,
+        created_at TEXT NOT NULL,
+        completed_at TEXT DEFAULT NULL,
+        reminders_enabled BOOLEAN NOT NULL DEFAULT 1,
+        PRIMARY KEY (guild_id, user_id)
+        """,
+    )
+    _rebuild_with_guild(
+        cursor,
+        "hall_of_fame",
+        """
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        completed_at TEXT NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+        """,
+    )
+    _rebuild_with_guild(
+        cursor,
+        "user_repos",
+        """
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        github_repo TEXT NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+        """,
+    )
+    # Per-guild get_leaderboard and rank index load, in ORDER BY order
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_streaks_guild_leaderboard
+        ON user_streaks (guild_id, is_active, current_day DESC,
+                         last_post_timestamp, user_id, username)
+        """
+    )
+    # Per-guild get_inactive_users: range scan on last_post_timestamp
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_streaks_guild_inactivity
+        ON user_streaks (guild_id, is_active, last_post_timestamp, user_id,
+                         current_day, reminders_enabled, username)
+        """
+    )
+    # The daily reminder plan, which covers every guild in one scan
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_streaks_inactivity
+        ON user_streaks (is_active, last_post_timestamp, guild_id, user_id,
+                         current_day, reminders_enabled, username)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_hall_of_fame_guild_completed
+        ON hall_of_fame (guild_id, completed_at)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_repos_github_repo
+        ON user_repos (github_repo)
+        """
+    )
+
+
+def add_post_events(cursor: sqlite3.Cursor) -> None:
+    # Append-only history of every streak write and rejected log post
+    # (see events.py). Existing rows are logged as "import" events so the
+    # log alone can rebuild user_streaks. Only the rowid is indexed: the
+    # log is read back in event_id order, and a secondary index made each
+    # batched insert about four times slower.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS post_events (
+            event_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            day INTEGER DEFAULT NULL,
+            username TEXT DEFAULT NULL,
+            message_id INTEGER DEFAULT NULL,
+            detail TEXT DEFAULT NULL,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO post_events (guild_id, user_id, kind, username, detail, created_at)
+        SELECT guild_id, user_id, 'import', username,
+               json_object(
+                   'username', username,
+                   'current_day', current_day,
+                   'last_post_timestamp', last_post_timestamp,
+                   'is_active', is_active,
+                   'created_at', created_at,
+                   'completed_at', completed_at,
+                   'reminders_enabled', reminders_enabled
+               ),
+               strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+        FROM user_streaks
+        WHERE NOT EXISTS (SELECT 1 FROM post_events)
+        ORDER BY guild_id, user_id
+        """
+    )
+
+
+def add_challenge_length(cursor: sqlite3.Cursor) -> None:
+    # The N of a user's [day/N] posts, fixed by their [1/N] post, so a
+    # different accepted total can't finish the challenge early
+    cursor.execute("PRAGMA table_info(user_streaks)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "challenge_length" not in columns:
+        cursor.execute(
+            "ALTER TABLE user_streaks ADD COLUMN challenge_length INTEGER NOT NULL "
+            f"DEFAULT {LEGACY_CHALLENGE_LENGTH}"
+        )
+
+
+# Append only; position + 1 is the schema version a migration brings you to
+MIGRATIONS = [
+    add_reminders_enabled,
+    add_processed_messages,
+    add_streak_indexes,
+    add_repo_activity,
+    partition_by_guild,
+    add_post_events,
+    add_challenge_length,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Run pending migrations; returns the resulting schema version
+
+    Each migration and its user_version bump run in one explicit
+    transaction: sqlite3 would otherwise autocommit DDL statement by
+    statement, and a failure partway through would leave a half-applied
+    migration that can't be rerun.
+    """
+    conn.commit()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in enumerate(MIGRATIONS, 1):
+        if version < target:
+            conn.execute("BEGIN")
+            try:
+                migration(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {target}")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            version = target
+    return version
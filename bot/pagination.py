@@ -0,0 +1,141 @@
+# pagination.py: button-driven paged embeds and streaming CSV export
+import csv
+import io
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# (rows, cursor of the next page or None)
+Page = Tuple[List[Dict], Optional[Tuple]]
+FetchPage = Callable[[Optional[Tuple]], Awaitable[Page]]
+
+
+def iter_csv(rows: Iterable[Dict], columns: Sequence[str]) -> Iterator[str]:
+    """CSV text for ``rows``, one line at a time, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(
+            [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (row[column] for column in columns)
+            ]
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def build_csv(rows: Iterable[Dict], columns: Sequence[str]) -> bytes:
+    """Drain a (blocking) row iterator into one CSV document
+
+    Run it on a worker thread; rows are encoded as they stream in, so only
+    the output is held in memory.
+    """
+    out = io.BytesIO()
+    for line in iter_csv(rows, columns):
+        out.write(line.encode("utf-8"))
+    return out.getvalue()
+
+
+class PagedView(discord.ui.View):
+    """Previous/next buttons over a keyset-paginated listing
+
+    Only one page is fetched per click. Keyset cursors can't step
+    backwards, so the view remembers the start cursor of every page it has
+    shown. An optional ``export`` coroutine backs a CSV button.
+    """
+
+    def __init__(
+        self,
+        author_id: int,
+        title: str,
+        fetch_page: FetchPage,
+        render_line: Callable[[int, Dict], str],
+        export: Optional[Callable[[], Awaitable[discord.File]]] = None,
+        timeout: float = 300,
+    ):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.title = title
+        self.fetch_page = fetch_page
+        self.render_line = render_line
+        self.export = export
+        self.message: Optional[discord.Message] = None
+        self._starts: List[Optional[Tuple]] = [None]
+        self._next: Optional[Tuple] = None
+        self._offset = 0
+        self._page_size = 0
+        if export is None:
+            self.remove_item(self.export_button)
+
+    @property
+    def page_number(self) -> int:
+        return len(self._starts)
+
+    async def first_page(self) -> Optional[discord.Embed]:
+        """Embed for page 1, or None when the listing is empty"""
+        rows, self._next = await self.fetch_page(None)
+        if not rows:
+            return None
+        self._page_size = len(rows)
+        return self._render(rows)
+
+    def _render(self, rows: List[Dict]) -> discord.Embed:
+        self.previous_button.disabled = self.page_number == 1
+        self.next_button.disabled = self._next is None
+        embed = discord.Embed(
+            title=self.title,
+            description="\n".join(
+                self.render_line(self._offset + i, row)
+                for i, row in enumerate(rows, 1)
+            ),
+            color=0x0099FF,
+        )
+        embed.set_footer(text=f"Page {self.page_number}")
+        return embed
+
+    async def _show(self, interaction: discord.Interaction, start) -> None:
+        rows, self._next = await self.fetch_page(start)
+        await interaction.response.edit_message(embed=self._render(rows), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(
+                "❌ Only the admin who ran the command can page through it.",
+                ephemeral=True,
+            )
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction, button):
+        self._starts.pop()
+        self._offset -= self._page_size
+        await self._show(interaction, self._starts[-1])
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction, button):
+        self._starts.append(self._next)
+        self._offset += self._page_size
+        await self._show(interaction, self._starts[-1])
+
+    @discord.ui.button(label="📄 CSV", style=discord.ButtonStyle.secondary)
+    async def export_button(self, interaction, button):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await interaction.followup.send(file=await self.export(), ephemeral=True)
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException as e:
+                logger.debug(f"Could not disable expired pager: {e}")
@@ -0,0 +1,153 @@
+# rank.py: RankIndex, an order-statistic index over active streaks
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class _Fenwick:
+    """Binary indexed tree of per-day user counts"""
+
+    def __init__(self, size: int):
+        self.tree = [0] * (size + 1)
+
+    @property
+    def size(self) -> int:
+        return len(self.tree) - 1
+
+    def add(self, index: int, delta: int) -> None:
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        """Sum of counts for days 1..index"""
+        total = 0
+        index = min(index, self.size)
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+
+class RankIndex:
+    """Leaderboard rank in O(log n), ordered like get_leaderboard
+
+    Users are ranked by ``current_day`` descending, then by
+    ``last_post_timestamp`` ascending (ISO strings sort chronologically).
+    A Fenwick tree counts users on higher days; within a day a sorted list
+    of ``(timestamp, user_id)`` gives the position by bisection.
+    """
+
+    def __init__(self, max_day: int = 100):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self._positions: Dict[int, Tuple[int, str]] = {}
+        self._buckets: Dict[int, List[Tuple[str, int]]] = {}
+        self._counts = _Fenwick(max_day)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def load(self, rows: Iterable[Tuple[int, int, str]]) -> None:
+        """Replace the index with ``(user_id, current_day, timestamp)`` rows"""
+        with self.lock:
+            self._positions = {}
+            self._buckets = {}
+            self._counts = _Fenwick(self._counts.size)
+            for user_id, day, timestamp in rows:
+                self._insert(user_id, day, timestamp, presorted=False)
+            for bucket in self._buckets.values():
+                bucket.sort()
+            self.loaded = True
+
+    def reset(self) -> None:
+        """Drop everything; the next rank lookup reloads from the database"""
+        with self.lock:
+            self.loaded = False
+            self._positions = {}
+            self._buckets = {}
+
+    def set(self, user_id: int, day: int, timestamp: str) -> None:
+        with self.lock:
+            if not self.loaded:
+                return
+            self._remove(user_id)
+            self._insert(user_id, day, timestamp)
+
+    def move(self, user_id: int, day: int, timestamp: str) -> None:
+        """Like ``set``, but only for users already ranked (i.e. active)"""
+        with self.lock:
+            if self.loaded and user_id in self._positions:
+                self._remove(user_id)
+                self._insert(user_id, day, timestamp)
+
+    def remove(self, user_id: int) -> None:
+        with self.lock:
+            if self.loaded:
+                self._remove(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        with self.lock:
+            position = self._positions.get(user_id)
+            if position is None:
+                return None
+            day, timestamp = position
+            higher = len(self._positions) - self._counts.prefix(day)
+            same_day_ahead = bisect.bisect_left(
+                self._buckets[day], (timestamp, user_id)
+            )
+            return higher + same_day_ahead + 1
+
+    def _insert(
+        self, user_id: int, day: int, timestamp: str, presorted: bool = True
+    ) -> None:
+        if day > self._counts.size:
+            self._grow(day)
+        self._positions[user_id] = (day, timestamp)
+        bucket = self._buckets.setdefault(day, [])
+        if presorted:
+            bisect.insort(bucket, (timestamp, user_id))
+        else:
+            bucket.append((timestamp, user_id))
+        self._counts.add(day, 1)
+
+    def _remove(self, user_id: int) -> None:
+        position = self._positions.pop(user_id, None)
+        if position is None:
+            return
+        day, timestamp = position
+        bucket = self._buckets[day]
+        index = bisect.bisect_left(bucket, (timestamp, user_id))
+        del bucket[index]
+        self._counts.add(day, -1)
+
+    def _grow(self, day: int) -> None:
+        counts = _Fenwick(max(day, self._counts.size * 2))
+        for bucket_day, bucket in self._buckets.items():
+            if bucket:
+                counts.add(bucket_day, len(bucket))
+        self._counts = counts
+
+
+class GuildRanks:
+    """One RankIndex per guild, created on first use"""
+
+    def __init__(self, max_day: int = 100):
+        self.max_day = max_day
+        self._indexes: Dict[int, RankIndex] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, guild_id: int) -> RankIndex:
+        index = self._indexes.get(guild_id)
+        if index is None:
+            with self._lock:
+                index = self._indexes.setdefault(guild_id, RankIndex(self.max_day))
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in list(self._indexes.values()))
+
+    def reset(self) -> None:
+        """Drop every guild's index; each reloads on its next lookup"""
+        for index in list(self._indexes.values()):
+            index.reset()
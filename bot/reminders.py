@@ -0,0 +1,44 @@
+# reminders.py: ReminderTier and ReminderPlan for the daily inactivity job
+from typing import Dict, List
+
+
+class ReminderTier:
+    """A reminder sent to users exactly ``days`` days after their last post"""
+
+    def __init__(self, name: str, days: int, message: str, public: bool = False):
+        self.name = name
+        self.days = days
+        self.message = message
+        # Public tiers ping the user in the logging channel instead of a DM
+        self.public = public
+
+    def render(self) -> str:
+        return self.message.format(days=self.days)
+
+
+class ReminderPlan:
+    """Active users bucketed by reminder tier, built from a single query"""
+
+    REMOVE = "remove"
+
+    def __init__(self, tiers: List[ReminderTier], remove_after_days: int):
+        self.tiers = tiers
+        self.remove_after_days = remove_after_days
+        self._buckets: Dict[str, List[Dict]] = {tier.name: [] for tier in tiers}
+        self._buckets[self.REMOVE] = []
+
+    def add(self, tier_name: str, user_data: Dict) -> None:
+        self._buckets[tier_name].append(user_data)
+
+    def users(self, tier_name: str) -> List[Dict]:
+        return self._buckets[tier_name]
+
+    @property
+    def removals(self) -> List[Dict]:
+        return self._buckets[self.REMOVE]
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(users) for name, users in self._buckets.items()}
+
+    def __len__(self) -> int:
+        return sum(len(users) for users in self._buckets.values())
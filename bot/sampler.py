@@ -0,0 +1,172 @@
+# sampler.py: ResourceSampler, in-process resource sampling on the event loop
+import asyncio
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .metrics_store import MetricsStore, Sample
+from .volume import NullVolumeBackend, VolumeBackend
+
+# psutil is optional: without it RSS comes from /proc and thread counts
+# from the threading module
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceSampler:
+    """Samples the bot's own process every ``interval`` seconds
+
+    Nothing here blocks the loop: CPU is the process-time delta between
+    samples (no ``cpu_percent(interval=1)``), loop lag is how late the
+    sampler's own sleep wakes up, and GC pauses are timed by a
+    ``gc.callbacks`` hook. Samples are buffered and written to the
+    ``MetricsStore`` ``flush_every`` at a time on a worker thread, then the
+    volume holding the store is committed.
+    """
+
+    def __init__(
+        self,
+        store: Optional[MetricsStore],
+        interval: float = 15.0,
+        flush_every: int = 20,
+        volume_backend: Optional[VolumeBackend] = None,
+    ):
+        self.store = store
+        self.interval = interval
+        self.flush_every = max(1, flush_every)
+        self.volume_backend = volume_backend or NullVolumeBackend()
+        self.latest: Dict[str, float] = {}
+        self.samples = 0
+        self.flushes = 0
+        self._pending: List[Tuple[float, Dict[str, float]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Future] = None
+        self._process = psutil.Process() if psutil is not None else None
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+        self._last_gc = self._gc_collections()
+        self._gc_pause = 0.0
+        self._gc_started = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._last_wall = time.monotonic()
+            self._last_cpu = time.process_time()
+            self._last_gc = self._gc_collections()
+            gc.callbacks.append(self._on_gc)
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="resource-sampler"
+            )
+
+    async def stop(self) -> None:
+        """Stop sampling and persist whatever is buffered"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._writing is not None:
+            await self._writing  # A flush cancelled mid-write still lands
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        await self.flush()
+        if self.store is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.close)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            try:
+                self._record(self.sample(lag))
+                if len(self._pending) >= self.flush_every:
+                    await self.flush()
+            except Exception as e:
+                logger.error(f"Resource sampler failed: {e}")
+
+    def sample(self, loop_lag: float = 0.0) -> Dict[str, float]:
+        """One reading; rates are since the previous call"""
+        wall = time.monotonic()
+        cpu = time.process_time()
+        elapsed = wall - self._last_wall
+        values = {
+            "cpu_percent": (cpu - self._last_cpu) / elapsed * 100 if elapsed else 0.0,
+            "loop_lag_ms": loop_lag * 1e3,
+            "tasks": len(asyncio.all_tasks()),
+            "threads": (
+                self._process.num_threads()
+                if self._process is not None
+                else threading.active_count()
+            ),
+            "gc_pause_ms": self._gc_pause * 1e3,
+        }
+        self._last_wall, self._last_cpu, self._gc_pause = wall, cpu, 0.0
+        rss = self._rss_bytes()
+        if rss is not None:
+            values["rss_mb"] = rss / (1024 * 1024)
+        collections = self._gc_collections()
+        for generation, (now, before) in enumerate(zip(collections, self._last_gc)):
+            values[f"gc_collections_gen{generation}"] = now - before
+        self._last_gc = collections
+        return values
+
+    def _record(self, values: Dict[str, float]) -> None:
+        self.latest = values
+        self.samples += 1
+        if self.store is not None:
+            self._pending.append((time.time(), values))
+
+    async def flush(self) -> None:
+        if not self._pending or self.store is None:
+            return
+        batch = [
+            (ts, name, value)
+            for ts, values in self._pending
+            for name, value in values.items()
+        ]
+        self._pending = []
+        self._writing = asyncio.get_running_loop().run_in_executor(
+            None, self._write, batch
+        )
+        await asyncio.shield(self._writing)
+
+    def _write(self, batch: List[Sample]) -> None:
+        try:
+            self.store.record_many(batch)
+            self.store.checkpoint()
+            self.volume_backend.commit()
+            self.flushes += 1
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} resource samples: {e}")
+
+    def _rss_bytes(self) -> Optional[int]:
+        if self._process is not None:
+            return self._process.memory_info().rss
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def _gc_collections() -> List[int]:
+        return [generation["collections"] for generation in gc.get_stats()]
+
+    def _on_gc(self, phase: str, info: Dict) -> None:
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            self._gc_pause += time.perf_counter() - self._gc_started
+            self._gc_started = None
@@ -0,0 +1,116 @@
+# users.py: UserResolver, cache-first user lookups for bulk jobs
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from .migrations import UNASSIGNED_GUILD_ID
+
+logger = logging.getLogger(__name__)
+
+
+class UserResolver:
+    """Resolves user IDs with as few REST round-trips as possible
+
+    Lookup order: the client user cache, guild member caches, a TTL cache
+    of previously fetched users, and only then ``fetch_user``. Bulk jobs
+    should call ``prefetch`` first so members are loaded through gateway
+    member chunking (100 IDs per request) instead of one REST call each.
+    """
+
+    CHUNK_SIZE = 100
+
+    def __init__(self, bot, ttl: float = 3600, max_size: int = 10000):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.client_hits = 0
+        self.member_hits = 0
+        self.ttl_hits = 0
+        self.api_calls = 0
+        self.chunk_requests = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "client_hits": self.client_hits,
+            "member_hits": self.member_hits,
+            "ttl_hits": self.ttl_hits,
+            "api_calls": self.api_calls,
+            "chunk_requests": self.chunk_requests,
+        }
+
+    def _cached(self, user_id: int):
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            self.client_hits += 1
+            return user
+        for guild in self.bot.guilds:
+            member = guild.get_member(user_id)
+            if member is not None:
+                self.member_hits += 1
+                return member
+        entry = self._cache.get(user_id)
+        if entry is not None:
+            expires, user = entry
+            if expires > time.monotonic():
+                self._cache.move_to_end(user_id)
+                self.ttl_hits += 1
+                return user
+            del self._cache[user_id]
+        return None
+
+    def _remember(self, user) -> None:
+        self._cache[user.id] = (time.monotonic() + self.ttl, user)
+        self._cache.move_to_end(user.id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    async def prefetch(self, members: Iterable[Tuple[int, int]]) -> None:
+        """Load members for many ``(guild_id, user_id)`` pairs via guild
+        member chunk requests
+
+        Each ID is requested only from its row's guild; unassigned rows are
+        tried guild by guild until found.
+        """
+        by_guild: Dict[int, Dict[int, None]] = {}
+        for guild_id, user_id in members:
+            if self.bot.get_user(user_id) is None and user_id not in self._cache:
+                by_guild.setdefault(guild_id, {})[user_id] = None
+        unassigned = list(by_guild.pop(UNASSIGNED_GUILD_ID, {}))
+        for guild_id, user_ids in by_guild.items():
+            guild = self.bot.get_guild(guild_id)
+            if guild is not None:
+                await self._query_members(guild, list(user_ids))
+        missing = [uid for uid in unassigned if uid not in self._cache]
+        for guild in self.bot.guilds:
+            if not missing:
+                break
+            await self._query_members(guild, missing)
+            missing = [uid for uid in missing if uid not in self._cache]
+
+    async def _query_members(self, guild, user_ids: List[int]) -> None:
+        missing = [uid for uid in user_ids if guild.get_member(uid) is None]
+        for i in range(0, len(missing), self.CHUNK_SIZE):
+            chunk = missing[i : i + self.CHUNK_SIZE]
+            self.chunk_requests += 1
+            try:
+                members = await guild.query_members(
+                    user_ids=chunk, limit=self.CHUNK_SIZE, cache=True
+                )
+            except Exception as e:
+                logger.warning(f"Member chunk request failed in guild {guild.id}: {e}")
+                continue
+            for member in members:
+                self._remember(member)
+
+    async def resolve(self, user_id: int):
+        user = self._cached(user_id)
+        if user is None:
+            self.api_calls += 1
+            user = await self.bot.fetch_user(user_id)
+            self._remember(user)
+        return user
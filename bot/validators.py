@@ -1,42 +1,94 @@
 # validators.py: StreakValidator class
 import re
 import datetime
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Tuple
+
+LOG_PATTERN = re.compile(r"\[(\d+)/(\d+)\]\s*")
+
+
+class LogEntry:
+    """A parsed ``[day/total] description`` post"""
+
+    __slots__ = ("day", "total", "description_length")
+
+    def __init__(self, day: int, total: int, description_length: int):
+        self.day = day
+        self.total = total
+        self.description_length = description_length
+
+    @property
+    def is_final_day(self) -> bool:
+        return self.day == self.total
 
 
 class StreakValidator:
     """Validates streak posts and progression"""
 
-    @staticmethod
-    def parse_log_message(content: str) -> Optional[int]:
-        pattern = r"^\[(\d+)/100\]"
-        match = re.match(pattern, content.strip())
-        if match:
-            day = int(match.group(1))
-            if 1 <= day <= 100:
-                return day
-        return None
+    def __init__(self, challenge_lengths: Iterable[int] = (100,)):
+        self.challenge_lengths = frozenset(challenge_lengths)
+        # Matched on the raw digits to skip an int() for unknown totals
+        self._totals = {str(n): n for n in self.challenge_lengths}
+
+    def parse_log_entry(self, content: str) -> Optional[LogEntry]:
+        # Almost every message in the channel either starts with "[" or is
+        # chatter; reject the chatter on its first character
+        if not content:
+            return None
+        if content[0] != "[":
+            if not content[0].isspace():
+                return None
+            content = content.lstrip()
+            if not content or content[0] != "[":
+                return None
+        match = LOG_PATTERN.match(content)
+        if match is None:
+            return None
+        day_digits, total_digits = match.groups()
+        total = self._totals.get(total_digits)
+        if total is None:
+            return None
+        day = int(day_digits)
+        if not 1 <= day <= total:
+            return None
+        # rstrip() returns the string itself when there is nothing to strip
+        return LogEntry(day, total, max(0, len(content.rstrip()) - match.end()))
+
+    def parse_log_message(self, content: str) -> Optional[int]:
+        entry = self.parse_log_entry(content)
+        return entry.day if entry is not None else None
 
     @staticmethod
     def is_valid_progression(
-        current_day: int, new_day: int, is_new_user: bool
+        current_day: int,
+        new_day: int,
+        is_new_user: bool,
+        total: int = 100,
+        challenge_length: Optional[int] = None,
     ) -> Tuple[bool, str]:
+        """``total`` is the N of the post; ``challenge_length`` the N the
+        user started with (defaults to ``total``)"""
         if is_new_user:
             if new_day == 1:
-                return True, "Welcome to the 100 Days of Code challenge!"
+                return True, f"Welcome to the {total} Days of Code challenge!"
             else:
-                return False, "New participants must start with [1/100]"
+                return False, f"New participants must start with [1/{total}]"
+        length = total if challenge_length is None else challenge_length
+        if total != length:
+            return (
+                False,
+                f"You're on the {length}-day challenge. Next post should be [{current_day + 1}/{length}]",
+            )
         if new_day == current_day + 1:
             return True, f"Great progress! Day {new_day} logged successfully."
         elif new_day <= current_day:
             return (
                 False,
-                f"You've already completed day {current_day}. Next post should be [{current_day + 1}/100]",
+                f"You've already completed day {current_day}. Next post should be [{current_day + 1}/{length}]",
             )
         else:
             return (
                 False,
-                f"You can't skip ahead! You're on day {current_day}, next should be [{current_day + 1}/100]",
+                f"You can't skip ahead! You're on day {current_day}, next should be [{current_day + 1}/{length}]",
             )
 
     @staticmethod
@@ -0,0 +1,167 @@
+# volume.py: volume backends and the debounced VolumeCommitScheduler
+import abc
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from . import metrics
+
+# Try to import modal for volume operations
+try:
+    import modal
+except ImportError:
+    modal = None  # Modal not available in local development
+
+
+class VolumeBackend(abc.ABC):
+    """Persists the database directory to durable storage"""
+
+    @abc.abstractmethod
+    def commit(self) -> None:
+        """Make everything written so far durable"""
+
+
+class NullVolumeBackend(VolumeBackend):
+    """Local no-op backend; counts commits so tests can assert on them"""
+
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+class ModalVolumeBackend(VolumeBackend):
+    """Commits a named Modal volume"""
+
+    def __init__(self, name: str = "discord-bot-db"):
+        self.name = name
+        self._volume = None
+
+    def commit(self) -> None:
+        if self._volume is None:
+            self._volume = modal.Volume.from_name(self.name)
+        self._volume.commit()
+
+
+def default_backend(name: str = "discord-bot-db") -> VolumeBackend:
+    return ModalVolumeBackend(name) if modal is not None else NullVolumeBackend()
+
+
+class VolumeCommitScheduler:
+    """Coalesces database writes into as few volume commits as possible
+
+    Writes call ``mark_dirty()``. A commit happens once ``threshold`` writes
+    are pending or ``window`` seconds after the first pending write, whichever
+    comes first. ``flush()`` commits immediately and is used on shutdown and
+    before jobs that need an up-to-date volume. A failed commit keeps its
+    writes pending and is retried after ``window`` seconds, doubling with
+    each consecutive failure up to ``max_backoff``.
+    """
+
+    def __init__(
+        self,
+        backend: VolumeBackend,
+        window: float = 30.0,
+        threshold: int = 50,
+        before_commit: Optional[Callable[[], None]] = None,
+        max_backoff: float = 300.0,
+    ):
+        self.backend = backend
+        self.window = window
+        self.threshold = max(1, threshold)
+        self.before_commit = before_commit
+        self.max_backoff = max_backoff
+        self._pending = 0
+        self._timer = None
+        self._consecutive_failures = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.writes = 0
+        self.commits = 0
+        self.failures = 0
+        self.last_commit_seconds = 0.0
+
+    @property
+    def coalesced(self) -> int:
+        """Writes that did not need a commit of their own"""
+        return max(0, self.writes - self.commits)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "writes": self.writes,
+            "commits": self.commits,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "pending": self._pending,
+            "last_commit_seconds": self.last_commit_seconds,
+        }
+
+    def mark_dirty(self) -> None:
+        with self._lock:
+            self._pending += 1
+            self.writes += 1
+            flush_now = self._pending >= self.threshold or self.window <= 0
+            if not flush_now and self._timer is None:
+                self._arm(self.window)
+        if flush_now:
+            self.flush()
+
+    def _arm(self, delay: float) -> None:
+        """Schedule a flush; call with ``_lock`` held"""
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> bool:
+        """Commit now if anything is pending; returns True if a commit ran"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, 0
+            if pending == 0:
+                return False
+            start = time.perf_counter()
+            try:
+                if self.before_commit is not None:
+                    self.before_commit()
+                self.backend.commit()
+            except Exception as e:
+                logging.error(f"Failed to commit to volume: {e}")
+                # Keep the writes pending and retry them with backoff, even
+                # if no further write comes along to schedule a flush
+                self.failures += 1
+                self._consecutive_failures += 1
+                delay = min(
+                    (self.window or 1.0) * 2 ** (self._consecutive_failures - 1),
+                    self.max_backoff,
+                )
+                with self._lock:
+                    self._pending += pending
+                    if self._timer is None and not self._closed:
+                        self._arm(delay)
+                if metrics.REGISTRY.enabled:
+                    metrics.VOLUME_COMMIT_FAILURES.inc()
+                return False
+            self.commits += 1
+            self._consecutive_failures = 0
+            self.last_commit_seconds = time.perf_counter() - start
+            if metrics.REGISTRY.enabled:
+                metrics.VOLUME_COMMIT_SECONDS.observe(self.last_commit_seconds)
+            logging.debug(
+                f"Volume commit covered {pending} writes "
+                f"in {self.last_commit_seconds:.3f}s"
+            )
+            return True
+
+    def close(self) -> None:
+        self._closed = True
+        self.flush()
+        logging.info(
+            f"Volume commits: {self.commits} for {self.writes} writes "
+            f"({self.coalesced} coalesced)"
+        )
@@ -0,0 +1,188 @@
+# watchdog.py: LoopWatchdog, event-loop stall detection with stack samples
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Deque, Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects asyncio debug mode's "Executing <Handle ...> took N seconds"
+    warnings, which name the callback that held the loop"""
+
+    def __init__(self, watchdog: "LoopWatchdog"):
+        super().__init__(logging.WARNING)
+        self.watchdog = watchdog
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, str) and record.msg.startswith("Executing"):
+            self.watchdog._slow_callback(record.getMessage())
+
+
+class LoopWatchdog:
+    """Measures event-loop scheduling lag and reports stalls
+
+    A heartbeat task wakes every ``interval`` seconds and records how late
+    it woke. A daemon thread watches the heartbeat; once it is overdue by
+    half of ``threshold`` the thread samples the loop thread's stack via
+    ``sys._current_frames()`` on every check, so a stall is profiled while
+    it happens rather than after. When the heartbeat runs again with a lag
+    of at least ``threshold``, the stall is logged with its most frequent
+    stack and counted in the metrics registry.
+
+    With ``asyncio_debug`` the loop also runs in asyncio debug mode with
+    ``slow_callback_duration = threshold``; the slow callbacks it names are
+    attached to the report. Debug mode slows every callback down, so it is
+    for investigating, not for normal running.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.25,
+        interval: float = 0.1,
+        asyncio_debug: bool = False,
+        max_samples: int = 100,
+        keep_reports: int = 20,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.asyncio_debug = asyncio_debug
+        self.max_samples = max_samples
+        self.reports: Deque[Dict] = collections.deque(maxlen=keep_reports)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._samples: List[traceback.StackSummary] = []
+        self._slow_callbacks: List[str] = []
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._handler: Optional[_SlowCallbackHandler] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        if self.asyncio_debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+            self._handler = _SlowCallbackHandler(self)
+            asyncio_logger = logging.getLogger("asyncio")
+            asyncio_logger.addHandler(self._handler)
+            # The slow-callback warnings must not be filtered out by level
+            if not asyncio_logger.isEnabledFor(logging.WARNING):
+                asyncio_logger.setLevel(logging.WARNING)
+        self._task = loop.create_task(self._heartbeat(), name="loop-watchdog")
+        self._thread = threading.Thread(
+            target=self._monitor, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._thread.join()
+        if self._handler is not None:
+            logging.getLogger("asyncio").removeHandler(self._handler)
+            self._handler = None
+            asyncio.get_running_loop().set_debug(False)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "stalls": self.stalls,
+            "max_lag_ms": self.max_lag * 1e3,
+            "threshold_ms": self.threshold * 1e3,
+        }
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._beat = now
+                samples, self._samples = self._samples, []
+                slow, self._slow_callbacks = self._slow_callbacks, []
+            self.max_lag = max(self.max_lag, lag)
+            if metrics.REGISTRY.enabled:
+                metrics.LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                self._report(lag, samples, slow)
+
+    def _monitor(self) -> None:
+        """Runs on the watchdog thread; samples the loop thread while the
+        heartbeat is overdue"""
+        while not self._stopped.wait(self.interval / 2):
+            overdue = time.monotonic() - self._beat - self.interval
+            if overdue < self.threshold / 2:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            with self._lock:
+                if len(self._samples) < self.max_samples:
+                    self._samples.append(stack)
+
+    def _slow_callback(self, message: str) -> None:
+        with self._lock:
+            self._slow_callbacks.append(message)
+
+    def _report(
+        self,
+        lag: float,
+        samples: List[traceback.StackSummary],
+        slow_callbacks: List[str],
+    ) -> None:
+        self.stalls += 1
+        stack, hits = self._most_frequent(samples)
+        report = {
+            "time": time.time(),
+            "lag_ms": round(lag * 1e3, 1),
+            "samples": len(samples),
+            "stack": stack,
+            "stack_hits": hits,
+            "slow_callbacks": slow_callbacks,
+        }
+        self.reports.append(report)
+        if metrics.REGISTRY.enabled:
+            metrics.LOOP_STALLS.inc()
+            metrics.LOOP_STALL_SECONDS.observe(lag)
+            metrics.LOOP_SLOW_CALLBACKS.inc(amount=len(slow_callbacks))
+        detail = "".join(f"\n  {message}" for message in slow_callbacks)
+        if stack:
+            detail += f"\nMost frequent stack ({hits}/{len(samples)} samples):\n"
+            detail += "".join(stack)
+        else:
+            detail += "\n(stall ended before a stack sample was taken)"
+        logger.warning(f"Event loop stalled for {lag * 1e3:.0f} ms{detail}")
+
+    @staticmethod
+    def _most_frequent(samples: List[traceback.StackSummary]):
+        """Formatted stack seen most often, innermost frame last"""
+        if not samples:
+            return [], 0
+        keys = [tuple((f.filename, f.lineno, f.name) for f in s) for s in samples]
+        key, hits = collections.Counter(keys).most_common(1)[0]
+        return samples[keys.index(key)].format(), hits
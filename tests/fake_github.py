@@ -0,0 +1,92 @@
+# fake_github.py: a local stub of the GitHub commits API, for tests
+#
+# Serves /repos/{owner}/{name}/commits from an in-memory dict with ETags,
+# If-None-Match revalidation (304), 404 for unknown repos, per_page and the
+# X-RateLimit-* headers, and records every request it receives.
+import datetime
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+def make_commit(repo: str, number: int, when: Optional[datetime.datetime] = None):
+    """A commits API entry with the fields GitHubClient.summarize_commit reads"""
+    when = when or datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    sha = hashlib.sha1(f"{repo}:{number}".encode()).hexdigest()
+    return {
+        "sha": sha,
+        "html_url": f"https://github.com/{repo}/commit/{sha}",
+        "commit": {
+            "message": f"Commit {number}\n\nDetails",
+            "committer": {"date": when.strftime("%Y-%m-%dT%H:%M:%SZ")},
+        },
+    }
+
+
+class StubGitHub:
+    """``repos`` maps ``owner/name`` to its commits, newest first"""
+
+    def __init__(self, rate_limit: int = 5000):
+        self.repos: Dict[str, List[Dict]] = {}
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        # (path, query dict, If-None-Match header, response status)
+        self.requests: List[tuple] = []
+        self._runner = None
+        self.base_url = ""
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/repos/{owner}/{name}/commits", self._commits)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def push(self, repo: str, commit: Dict) -> None:
+        self.repos.setdefault(repo, []).insert(0, commit)
+
+    def statuses(self) -> List[int]:
+        return [status for *_, status in self.requests]
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        }
+
+    async def _commits(self, request):
+        repo = f"{request.match_info['owner']}/{request.match_info['name']}"
+        if_none_match = request.headers.get("If-None-Match")
+        commits = self.repos.get(repo)
+        if commits is None:
+            status, response = 404, web.json_response(
+                {"message": "Not Found"}, status=404, headers=self._headers()
+            )
+        else:
+            per_page = int(request.query.get("per_page", "30"))
+            body = json.dumps(commits[:per_page])
+            etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+            headers = {**self._headers(), "ETag": etag}
+            if if_none_match == etag:
+                status, response = 304, web.Response(status=304, headers=headers)
+            else:
+                self.remaining = max(0, self.remaining - 1)
+                headers.update(self._headers())
+                status, response = 200, web.Response(
+                    body=body, content_type="application/json", headers=headers
+                )
+        self.requests.append((request.path, dict(request.query), if_none_match, status))
+        return response
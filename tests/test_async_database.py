@@ -0,0 +1,87 @@
+# test_async_database.py: a slow disk doesn't stall the event loop
+#
+# A DatabaseManager whose writes for one user take 500 ms (a stuck fsync,
+# a slow volume) runs behind AsyncDatabaseManager. While that write is in
+# flight, a heartbeat on the loop must keep ticking and another user's
+# log post must be answered.
+# Usage: python -m pytest tests/test_async_database.py
+import asyncio
+import datetime
+import time
+
+from benchmarks.fake_gateway import FakeGateway
+from bot.config import ChannelConfig
+from bot.database import DatabaseManager
+
+GUILD_ID = 1
+DISK_DELAY = 0.5
+SLOW_USER, FAST_USER = 1, 2
+
+
+class SlowDiskManager(DatabaseManager):
+    """Writes for SLOW_USER block for DISK_DELAY seconds"""
+
+    def update_user_progress(self, guild_id, user_id, *args, **kwargs):
+        if user_id == SLOW_USER:
+            time.sleep(DISK_DELAY)
+        return super().update_user_progress(guild_id, user_id, *args, **kwargs)
+
+
+async def heartbeat(gaps: list, interval: float = 0.01) -> None:
+    last = time.perf_counter()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run_slow_disk(db_path: str) -> None:
+    gateway = FakeGateway(db_path, manager_class=SlowDiskManager)
+    await gateway.start()
+    db = gateway.bot.db.manager
+    try:
+        yesterday = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            days=1
+        )
+        for user_id in (SLOW_USER, FAST_USER):
+            db.force_set_day(GUILD_ID, user_id, f"user{user_id}", 5)
+        with db._pool.writer() as conn:
+            conn.execute(
+                "UPDATE user_streaks SET last_post_timestamp = ?",
+                (yesterday.isoformat(),),
+            )
+        db.cache.clear()
+        channel = gateway.channel(ChannelConfig.LOGGING_CHANNEL)
+        slow = gateway.message("[6/100] Slow disk", gateway.user(SLOW_USER), channel)
+        fast = gateway.message("[6/100] Fast", gateway.user(FAST_USER), channel)
+        gateway.reset_counters()
+
+        gaps = []
+        ticker = asyncio.get_running_loop().create_task(heartbeat(gaps))
+        started = time.perf_counter()
+        gateway.dispatch_message(slow)
+        await asyncio.sleep(0.05)  # The slow write is now on the executor
+        gateway.dispatch_message(fast)
+        await gateway.drain()
+        elapsed = time.perf_counter() - started
+        ticker.cancel()
+
+        assert gateway.errors == 0
+        assert elapsed >= DISK_DELAY
+        # The fast post was answered first, long before the slow write ended
+        assert [reference for kind, reference, _ in gateway.sent] == [fast, slow]
+        fast_latency, slow_latency = gateway.latencies
+        assert fast_latency < DISK_DELAY / 4, gateway.latencies
+        assert slow_latency >= DISK_DELAY
+        # The loop kept running throughout
+        assert len(gaps) >= DISK_DELAY / 0.01 / 2
+        assert max(gaps) < DISK_DELAY / 5, max(gaps)
+        assert db.get_user_data(GUILD_ID, SLOW_USER)["current_day"] == 6
+        assert db.get_user_data(GUILD_ID, FAST_USER)["current_day"] == 6
+    finally:
+        await gateway.close()
+
+
+def test_slow_disk_does_not_block_the_loop(tmp_path):
+    asyncio.run(run_slow_disk(str(tmp_path / "streaks.db")))
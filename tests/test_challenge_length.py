@@ -0,0 +1,133 @@
+# test_challenge_length.py: a user's [day/N] total is fixed by their [1/N] post
+#
+# Usage: python -m pytest tests/test_challenge_length.py
+import asyncio
+import datetime
+
+from benchmarks.fake_gateway import FakeGateway
+from bot.config import ChannelConfig
+from bot.validators import StreakValidator
+
+GUILD_ID = 1
+
+
+def backdate(db, user_id: int) -> None:
+    """Move the last post to yesterday so today's post passes the time check"""
+    yesterday = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        days=1
+    )
+    with db._pool.writer() as conn:
+        conn.execute(
+            "UPDATE user_streaks SET last_post_timestamp = ? WHERE user_id = ?",
+            (yesterday.isoformat(), user_id),
+        )
+    db.cache.clear()
+
+
+async def post(gateway: FakeGateway, user, content: str):
+    message = gateway.message(
+        content, user, gateway.channel(ChannelConfig.LOGGING_CHANNEL)
+    )
+    gateway.dispatch_message(message)
+    await gateway.drain()
+    return [
+        (kind, sent) for kind, reference, sent in gateway.sent if reference is message
+    ]
+
+
+def hall_of_fame(db) -> set:
+    with db._pool.reader() as conn:
+        return {row[0] for row in conn.execute("SELECT user_id FROM hall_of_fame")}
+
+
+async def run_posts(db_path: str) -> None:
+    gateway = FakeGateway(db_path)
+    gateway.bot.validator = StreakValidator((30, 100))
+    await gateway.start()
+    db = gateway.bot.db.manager
+    try:
+        hundred, thirty = gateway.user(1), gateway.user(2)
+
+        await post(gateway, hundred, "[1/100] Started")
+        assert db.get_user_data(GUILD_ID, 1)["challenge_length"] == 100
+        assert db.force_set_day(GUILD_ID, 1, "user1", 29)
+        assert db.get_user_data(GUILD_ID, 1)["challenge_length"] == 100
+        backdate(db, 1)
+
+        # The other accepted total can't finish a 100-day run on day 30
+        replies = await post(gateway, hundred, "[30/30] Done?")
+        assert replies and "[30/100]" in replies[0][1], replies
+        assert db.get_user_data(GUILD_ID, 1)["current_day"] == 29
+        assert 1 not in hall_of_fame(db)
+
+        replies = await post(gateway, hundred, "[30/100] Day 30")
+        assert replies[0] == ("reaction", "✅"), replies
+        assert db.get_user_data(GUILD_ID, 1)["current_day"] == 30
+
+        # A 30-day user finishes on [30/30]
+        await post(gateway, thirty, "[1/30] Started")
+        assert db.get_user_data(GUILD_ID, 2)["challenge_length"] == 30
+        rejected = await post(gateway, thirty, "[2/100] Switching")
+        assert "[2/30]" in rejected[0][1], rejected
+        assert db.force_set_day(GUILD_ID, 2, "user2", 29)
+        backdate(db, 2)
+        replies = await post(gateway, thirty, "[30/30] Done")
+        assert "CONGRATULATIONS" in replies[0][1], replies
+        assert 2 in hall_of_fame(db)
+        assert gateway.errors == 0
+    finally:
+        await gateway.close()
+
+
+def test_total_must_match_the_users_challenge(tmp_path):
+    asyncio.run(run_posts(str(tmp_path / "streaks.db")))
+
+
+def test_completion_follows_stored_length(tmp_path):
+    from bot.database import DatabaseManager
+    from bot.volume import NullVolumeBackend
+
+    db = DatabaseManager(
+        str(tmp_path / "streaks.db"), volume_backend=NullVolumeBackend()
+    )
+    db.init_database()
+    db.create_user(GUILD_ID, 1, "user1", challenge_length=30)
+    db.update_user_progress(GUILD_ID, 1, "user1", 30)
+    assert db.get_user_data(GUILD_ID, 1)["completed_at"] is not None
+
+    db.create_user(GUILD_ID, 2, "user2", challenge_length=365)
+    db.update_user_progress(GUILD_ID, 2, "user2", 100)
+    assert db.get_user_data(GUILD_ID, 2)["completed_at"] is None
+    db.force_set_day(GUILD_ID, 2, "user2", 365)
+    assert db.get_user_data(GUILD_ID, 2)["completed_at"] is not None
+    db.force_set_day(GUILD_ID, 3, "user3", 30, challenge_length=30)
+    assert db.get_user_data(GUILD_ID, 3)["challenge_length"] == 30
+
+    # The event log replays to the same rows, lengths included
+    replayed = db.replay_events()
+    with db._pool.reader() as conn:
+        table = {
+            (row[0], row[1]): list(row[2:])
+            for row in conn.execute(
+                """
+                SELECT guild_id, user_id, username, current_day,
+                       last_post_timestamp, is_active, created_at, completed_at,
+                       reminders_enabled, challenge_length
+                FROM user_streaks
+                """
+            )
+        }
+    assert replayed == table
+    db.close()
+
+
+def test_validator_messages_use_the_users_length():
+    ok, message = StreakValidator.is_valid_progression(
+        29, 30, False, total=30, challenge_length=100
+    )
+    assert not ok and "[30/100]" in message
+    ok, message = StreakValidator.is_valid_progression(0, 2, True, total=30)
+    assert not ok and "[1/30]" in message
+    assert StreakValidator.is_valid_progression(
+        4, 5, False, total=30, challenge_length=30
+    )[0]
@@ -0,0 +1,81 @@
+# test_daily_removal.py: a post during the reminder dispatch cancels removal
+#
+# The removal list is planned before reminders are sent, which can take
+# minutes at Discord's rate limits. A user who posts meanwhile must stay
+# active and get no removal notice.
+# Usage: python -m pytest tests/test_daily_removal.py
+import asyncio
+import datetime
+
+from benchmarks.fake_gateway import FakeGateway
+from bot import events
+from bot.config import ChannelConfig, ReminderConfig
+
+GUILD_ID = 1
+
+
+async def run(db_path: str) -> None:
+    gateway = FakeGateway(db_path)
+    await gateway.start()
+    bot = gateway.bot
+    db = bot.db.manager
+    try:
+        inactive = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(days=ReminderConfig.REMOVE_DAYS + 6)
+        for user_id, length in ((1, 100), (2, 30)):
+            gateway.user(user_id)
+            db.force_set_day(GUILD_ID, user_id, f"user{user_id}", 10, length)
+        with db._pool.writer() as conn:
+            conn.execute(
+                "UPDATE user_streaks SET last_post_timestamp = ?",
+                (inactive.isoformat(),),
+            )
+        db.cache.clear()
+        db.leaderboards.reset()
+
+        get_plan = bot.db.get_reminder_plan
+        late_post = gateway.message(
+            "[11/100] Back at it",
+            gateway.user(1),
+            gateway.channel(ChannelConfig.LOGGING_CHANNEL),
+        )
+
+        async def plan_then_post(*args, **kwargs):
+            plan = await get_plan(*args, **kwargs)
+            assert {user["user_id"] for user in plan.removals} == {1, 2}
+            gateway.dispatch_message(late_post)
+            await gateway.drain()
+            return plan
+
+        bot.db.get_reminder_plan = plan_then_post
+        gateway.reset_counters()
+        await bot.daily_reminder_check.coro(bot)
+        assert gateway.errors == 0
+
+        assert late_post.reactions == ["✅"]
+        user_1 = db.get_user_data(GUILD_ID, 1)
+        assert user_1["is_active"] and user_1["current_day"] == 11
+        assert not db.get_user_data(GUILD_ID, 2)["is_active"]
+        notices = [
+            content
+            for kind, _, content in gateway.sent
+            if "removed" in str(content)
+        ]
+        assert len(notices) == 2  # Public post and DM, both for user 2
+        assert "<@2>" in notices[0] and "<@1>" not in "".join(notices)
+        # Worded for the user's own challenge length
+        assert all("[1/30]" in notice for notice in notices)
+        db.flush_events()
+        with db._pool.reader() as conn:
+            deactivated = conn.execute(
+                "SELECT user_id FROM post_events WHERE kind = ?",
+                (events.DEACTIVATE,),
+            ).fetchall()
+        assert deactivated == [(2,)]
+    finally:
+        await gateway.close()
+
+
+def test_post_during_dispatch_cancels_removal(tmp_path):
+    asyncio.run(run(str(tmp_path / "streaks.db")))
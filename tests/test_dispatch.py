@@ -0,0 +1,161 @@
+# test_dispatch.py: MessageDispatcher retries, rate limits and stats
+#
+# A fake sender fails each job with a scripted sequence of errors and
+# records when every attempt was made.
+# Usage: python -m pytest tests/test_dispatch.py
+import asyncio
+import time
+from types import SimpleNamespace
+
+import discord
+
+from bot.dispatch import MessageDispatcher
+
+
+class ServerError(Exception):
+    def __init__(self, status: int, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def http_error(cls, status: int, reason: str):
+    return cls(SimpleNamespace(status=status, reason=reason), reason)
+
+
+class FakeSender:
+    """``job(route, *errors)`` returns a send function that raises
+    ``errors`` in turn, then succeeds"""
+
+    def __init__(self):
+        self.attempts = []  # (route, monotonic time)
+        self.delivered = []
+
+    def job(self, route: str, *errors):
+        errors = list(errors)
+
+        async def send():
+            self.attempts.append((route, time.monotonic()))
+            if errors:
+                raise errors.pop(0)
+            self.delivered.append(route)
+
+        return send
+
+    def gaps(self):
+        times = [at for _, at in self.attempts]
+        return [later - earlier for earlier, later in zip(times, times[1:])]
+
+
+def dispatcher(**kwargs):
+    unlimited = (1000.0, 100)
+    kwargs.setdefault("route_limits", {"dm": unlimited, "channel": unlimited})
+    kwargs.setdefault("global_rate", 1000.0)
+    return MessageDispatcher(**kwargs)
+
+
+def run(dispatch):
+    return asyncio.run(dispatch.run())
+
+
+def test_429_retry_after_is_honoured():
+    sender = FakeSender()
+    # retry_after well above the backoff base, so only it explains the wait
+    dispatch = dispatcher(base_delay=0.001)
+    dispatch.submit("dm", sender.job("dm", ServerError(429, retry_after=0.15)))
+    stats = run(dispatch)
+    assert len(sender.attempts) == 2
+    assert sender.gaps()[0] >= 0.15
+    assert stats.as_dict()["sent"] == 1 and stats.retries == 1
+
+
+def test_client_side_rate_limit_is_honoured():
+    sender = FakeSender()
+    dispatch = dispatcher(base_delay=0.001)
+    dispatch.submit("dm", sender.job("dm", discord.RateLimited(0.1)))
+    run(dispatch)
+    assert sender.gaps()[0] >= 0.1 and sender.delivered == ["dm"]
+
+
+def test_5xx_retried_with_backoff_up_to_the_limit():
+    sender = FakeSender()
+    dispatch = dispatcher(max_retries=3, base_delay=0.02)
+    dispatch.submit("dm", sender.job("dm", *(ServerError(503) for _ in range(10))))
+    stats = run(dispatch)
+    assert len(sender.attempts) == 4  # The first try plus max_retries
+    for gap, delay in zip(sender.gaps(), (0.02, 0.04, 0.08)):
+        # Exponential, plus up to 25% jitter
+        assert delay <= gap < delay * 1.25 + 0.05
+    assert (stats.sent, stats.failed, stats.retries) == (0, 1, 3)
+
+
+def test_5xx_then_success():
+    sender = FakeSender()
+    dispatch = dispatcher(base_delay=0.01)
+    bad_gateway = http_error(discord.HTTPException, 502, "Bad Gateway")
+    dispatch.submit("dm", sender.job("dm", ServerError(500), bad_gateway))
+    stats = run(dispatch)
+    assert sender.delivered == ["dm"]
+    assert (stats.sent, stats.failed, stats.retries) == (1, 0, 2)
+
+
+def test_forbidden_and_not_found_are_not_retried():
+    sender = FakeSender()
+    dispatch = dispatcher(base_delay=0.01)
+    forbidden = http_error(discord.Forbidden, 403, "Forbidden")
+    dispatch.submit("dm", sender.job("dm", forbidden))
+    dispatch.submit(
+        "channel:1",
+        sender.job("channel:1", http_error(discord.NotFound, 404, "Unknown Channel")),
+    )
+    dispatch.submit("dm", sender.job("dm", ValueError("not an HTTP error")))
+    stats = run(dispatch)
+    assert len(sender.attempts) == 3
+    assert (stats.sent, stats.failed, stats.retries) == (0, 3, 0)
+
+
+def test_per_route_buckets():
+    sender = FakeSender()
+    # 20/s with a burst of 2 per channel; the global bucket is no limit
+    dispatch = dispatcher(concurrency=8, route_limits={"channel": (20.0, 2)})
+    for _ in range(6):
+        dispatch.submit("channel:1", sender.job("channel:1"))
+    for _ in range(2):
+        dispatch.submit("channel:2", sender.job("channel:2"))
+    start = time.monotonic()
+    run(dispatch)
+    busy = [at - start for route, at in sender.attempts if route == "channel:1"]
+    other = [at - start for route, at in sender.attempts if route == "channel:2"]
+    # Burst of 2, then one every 50 ms
+    assert busy[-1] >= 4 * 0.05 * 0.9
+    assert all(later - earlier >= 0.04 for earlier, later in zip(busy[1:], busy[2:]))
+    # The other channel's bucket is untouched by the busy one
+    assert max(other) < 0.04
+
+
+def test_global_bucket_limits_all_routes():
+    sender = FakeSender()
+    dispatch = dispatcher(concurrency=8, global_rate=20.0)
+    for channel in range(30):
+        dispatch.submit(f"channel:{channel}", sender.job(f"channel:{channel}"))
+    stats = run(dispatch)
+    # A burst of 20, then 10 more at 20/s
+    assert stats.duration >= 0.45
+    assert stats.sent == 30
+
+
+def test_stats_counters():
+    sender = FakeSender()
+    dispatch = dispatcher(max_retries=1, base_delay=0.001)
+    dispatch.submit("dm", sender.job("dm"))
+    dispatch.submit("dm", sender.job("dm", ServerError(500)))
+    dispatch.submit("dm", sender.job("dm", ServerError(500), ServerError(500)))
+    forbidden = http_error(discord.Forbidden, 403, "Forbidden")
+    dispatch.submit("dm", sender.job("dm", forbidden))
+    dispatch.skip()
+    dispatch.skip(2)
+    assert len(dispatch) == 4
+    stats = run(dispatch).as_dict()
+    assert stats.pop("duration") >= 0
+    assert stats == {"sent": 2, "failed": 2, "skipped": 3, "retries": 2}
+    assert len(dispatch) == 0
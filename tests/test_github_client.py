@@ -0,0 +1,94 @@
+# test_github_client.py: GitHubClient against a local stub of the API
+#
+# Usage: python -m pytest tests/test_github_client.py
+import asyncio
+
+from tests.fake_github import StubGitHub, make_commit
+from bot.github import GitHubClient
+
+REPO = "alice/cloud"
+
+
+async def with_stub(check, **client_kwargs):
+    stub = StubGitHub()
+    stub.repos[REPO] = [make_commit(REPO, i) for i in range(10, 0, -1)]
+    await stub.start()
+    client = GitHubClient(base_url=stub.base_url, **client_kwargs)
+    try:
+        await check(stub, client)
+    finally:
+        await client.close()
+        await stub.stop()
+
+
+def test_200_then_ttl_hit():
+    async def check(stub, client):
+        commits = await client.get_commits(REPO, 3)
+        assert [c["message"] for c in commits] == ["Commit 10", "Commit 9", "Commit 8"]
+        assert commits[0]["url"].startswith(f"https://github.com/{REPO}/commit/")
+        assert await client.get_commits(REPO, 3) == commits
+        # The second call was served from the cache within the TTL
+        assert stub.statuses() == [200]
+        assert client.stats()["cache_hits"] == 1
+        assert client.rate_limit_remaining == stub.rate_limit - 1
+
+    asyncio.run(with_stub(check, cache_ttl=60))
+
+
+def test_304_revalidation_and_change():
+    async def check(stub, client):
+        first = await client.get_commits(REPO, 3)
+        # TTL 0: every call revalidates with the stored ETag
+        assert await client.get_commits(REPO, 3) == first
+        assert stub.statuses() == [200, 304]
+        assert stub.requests[1][2] is not None  # If-None-Match was sent
+        assert client.stats()["not_modified"] == 1
+        stub.push(REPO, make_commit(REPO, 11))
+        changed = await client.get_commits(REPO, 3)
+        assert stub.statuses() == [200, 304, 200]
+        assert changed[0]["message"] == "Commit 11"
+
+    asyncio.run(with_stub(check, cache_ttl=0))
+
+
+def test_per_page_is_sent_and_clamped():
+    async def check(stub, client):
+        assert len(await client.get_commits(REPO, 2)) == 2
+        await client.get_commits(REPO, 500)
+        await client.get_commits(REPO, 0)
+        per_page = [query["per_page"] for _, query, *_ in stub.requests]
+        assert per_page == ["2", "100", "1"]
+
+    asyncio.run(with_stub(check))
+
+
+def test_lru_eviction():
+    async def check(stub, client):
+        for name in ("a", "b", "c"):
+            stub.repos[f"bob/{name}"] = [make_commit(f"bob/{name}", 1)]
+        await client.get_commits("bob/a")
+        await client.get_commits("bob/b")
+        await client.get_commits("bob/a")  # Hit; a becomes most recent
+        await client.get_commits("bob/c")  # Evicts b
+        assert len(client.cache) == 2
+        await client.get_commits("bob/a")
+        await client.get_commits("bob/b")
+        paths = [path for path, *_ in stub.requests]
+        assert paths == [
+            "/repos/bob/a/commits",
+            "/repos/bob/b/commits",
+            "/repos/bob/c/commits",
+            "/repos/bob/b/commits",
+        ]
+        assert client.stats()["cache_hits"] == 2
+
+    asyncio.run(with_stub(check, cache_ttl=60, cache_size=2))
+
+
+def test_missing_repo():
+    async def check(stub, client):
+        assert await client.get_commits("nobody/nothing") is None
+        assert stub.statuses() == [404]
+        assert len(client.cache) == 0
+
+    asyncio.run(with_stub(check))
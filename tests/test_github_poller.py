@@ -0,0 +1,140 @@
+# test_github_poller.py: RepoActivityPoller and !github against a stub API
+#
+# Usage: python -m pytest tests/test_github_poller.py
+import asyncio
+
+from benchmarks.fake_gateway import FakeGateway
+from tests.fake_github import StubGitHub, make_commit
+from bot.commands.general import GeneralCommands
+from bot.config import ChannelConfig
+from bot.github import GitHubClient
+
+GUILD_ID = 1
+LONG_AGO = "2000-01-01T00:00:00+00:00"
+
+
+async def with_poller(db_path, check, repos=5, missing=(), rate_limit=5000, **poller):
+    stub = StubGitHub(rate_limit=rate_limit)
+    linked = [f"user{i}/log" for i in range(1, repos + 1)]
+    for repo in linked:
+        stub.repos[repo] = [make_commit(repo, i) for i in range(12, 0, -1)]
+    await stub.start()
+    gateway = FakeGateway(db_path)
+    await gateway.start()
+    bot = gateway.bot
+    await bot.github.close()
+    bot.github = bot.github_poller.github = GitHubClient(base_url=stub.base_url)
+    for name, value in poller.items():
+        setattr(bot.github_poller, name, value)
+    for user_id, repo in enumerate([*linked, *missing], start=1):
+        await bot.db.set_user_repo(GUILD_ID, user_id, repo)
+    try:
+        await check(stub, gateway, bot.github_poller, bot.db.manager)
+    finally:
+        await gateway.close()
+        await stub.stop()
+
+
+def fetched_at(db) -> dict:
+    with db._pool.reader() as conn:
+        return dict(conn.execute("SELECT github_repo, fetched_at FROM repo_activity"))
+
+
+def test_stops_at_rate_limit_reserve(tmp_path):
+    async def check(stub, gateway, poller, db):
+        # 30 left of 100, 20 held in reserve: 10 requests to spend
+        stub.remaining = 30
+        # Unknown budget: a probe batch of `concurrency` repos
+        assert (await poller.poll_once())["polled"] == 2
+        assert poller.github.budget(poller.reserve) == 8
+        assert (await poller.poll_once())["polled"] == 8
+        assert poller.github.budget(poller.reserve) == 0
+        stats = await poller.poll_once()
+        assert stats["polled"] == 0 and stats["duration"] == 0.0
+        assert len(stub.requests) == 10
+        # Each repo was polled once, never-polled repos first
+        assert len({path for path, *_ in stub.requests}) == 10
+        assert len(fetched_at(db)) == 10
+
+    asyncio.run(
+        with_poller(
+            str(tmp_path / "streaks.db"),
+            check,
+            repos=15,
+            rate_limit=100,
+            concurrency=2,
+            reserve=0.2,
+        )
+    )
+
+
+def test_304_refreshes_fetched_at(tmp_path):
+    async def check(stub, gateway, poller, db):
+        assert (await poller.poll_once())["updated"] == 3
+        before = {
+            repo: await gateway.bot.db.get_repo_activity(repo) for repo in stub.repos
+        }
+        with db._pool.writer() as conn:
+            conn.execute("UPDATE repo_activity SET fetched_at = ?", (LONG_AGO,))
+
+        stats = await poller.poll_once()
+        assert stats["not_modified"] == 3 and stats["updated"] == 0
+        assert all(if_none_match for _, _, if_none_match, _ in stub.requests[3:])
+        assert all(value > LONG_AGO for value in fetched_at(db).values())
+        for repo, activity in before.items():
+            after = await gateway.bot.db.get_repo_activity(repo)
+            assert after["status"] == 200
+            assert after["commits"] == activity["commits"]
+            assert after["fetched_at"] > activity["fetched_at"]
+
+    asyncio.run(with_poller(str(tmp_path / "streaks.db"), check, repos=3))
+
+
+def test_missing_repo_is_stored(tmp_path):
+    async def check(stub, gateway, poller, db):
+        stats = await poller.poll_once()
+        assert stats["errors"] == 1 and stats["updated"] == 2
+        activity = await gateway.bot.db.get_repo_activity("ghost/missing")
+        assert activity["status"] == 404 and activity["commits"] == []
+        # A newly linked repo is polled before the stored 404
+        stub.push("user1/other", make_commit("user1/other", 1))
+        await gateway.bot.db.set_user_repo(GUILD_ID, 99, "user1/other")
+        queue = [repo for repo, _ in await gateway.bot.db.get_repos_to_poll(10)]
+        assert queue[0] == "user1/other"
+        # A 404 carries no ETag, so the repo is requested unconditionally
+        assert (await poller.poll_once())["errors"] == 1
+        assert [status for *_, status in stub.requests].count(404) == 2
+
+    asyncio.run(
+        with_poller(
+            str(tmp_path / "streaks.db"), check, repos=2, missing=["ghost/missing"]
+        )
+    )
+
+
+def test_github_command_uses_polled_commits(tmp_path):
+    async def check(stub, gateway, poller, db):
+        await gateway.add_cog(GeneralCommands)
+        await poller.poll_once()
+        stub.requests.clear()
+        user = gateway.user(1)
+        channel = gateway.channel(ChannelConfig.ALLOWED_COMMAND_CHANNELS[0])
+
+        async def github(n):
+            gateway.reset_counters()
+            gateway.dispatch_message(gateway.message(f"!github {n}", user, channel))
+            await gateway.drain()
+            assert gateway.errors == 0
+            return [content for kind, _, content in gateway.sent if kind == "dm"]
+
+        [dm] = await github(3)
+        assert "**Last 3 commits for `user1/log`:**" in dm
+        assert "Commit 12" in dm and "Commit 10" in dm and "Commit 9" not in dm
+        assert stub.requests == []
+
+        # More commits than the poller keeps: one API call
+        [dm] = await github(12)
+        assert "**Last 12 commits for `user1/log`:**" in dm
+        assert [query["per_page"] for _, query, *_ in stub.requests] == ["12"]
+
+    asyncio.run(with_poller(str(tmp_path / "streaks.db"), check, repos=1, per_page=10))
@@ -0,0 +1,38 @@
+# test_guild_availability.py: channel maps follow guild outages
+#
+# Usage: python -m pytest tests/test_guild_availability.py
+import asyncio
+
+from benchmarks.fake_gateway import FakeGateway
+from bot.config import ChannelConfig
+
+
+async def run(db_path: str) -> None:
+    gateway = FakeGateway(db_path)
+    await gateway.start()
+    try:
+        guild = gateway.guilds[0]
+        channel = gateway.channel(ChannelConfig.LOGGING_CHANNEL)
+        user = gateway.user(1)
+
+        gateway.bot.dispatch("guild_unavailable", guild)
+        await gateway.drain()
+        assert ChannelConfig.logging_channels() == {}
+        gateway.dispatch_message(gateway.message("[1/100] Setup", user, channel))
+        await gateway.drain()
+        assert gateway.sent == []
+
+        gateway.bot.dispatch("guild_available", guild)
+        await gateway.drain()
+        assert ChannelConfig.logging_channels() == {guild.id: channel}
+        message = gateway.message("[1/100] Setup", user, channel)
+        gateway.dispatch_message(message)
+        await gateway.drain()
+        assert message.reactions == ["✅"]
+        assert gateway.errors == 0
+    finally:
+        await gateway.close()
+
+
+def test_unavailable_guild_is_forgotten_until_available(tmp_path):
+    asyncio.run(run(str(tmp_path / "streaks.db")))
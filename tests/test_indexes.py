@@ -0,0 +1,42 @@
+# test_indexes.py: streak queries are answered from their covering indexes
+#
+# Usage: python -m pytest tests/test_indexes.py
+import datetime
+
+import pytest
+
+from benchmarks.bench_db_pool import GUILD_ID, seed
+from bot.database import INACTIVE_USERS_QUERY, LEADERBOARD_QUERY, DatabaseManager
+from bot.volume import NullVolumeBackend
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(
+        str(tmp_path / "streaks.db"), volume_backend=NullVolumeBackend()
+    )
+    seed(db, 2000)
+    seed(db, 500, guild_id=GUILD_ID + 1)
+    yield db
+    db.close()
+
+
+def plan(db, query, params) -> str:
+    return " | ".join(db.explain_query_plan(query, params))
+
+
+def test_leaderboard_uses_covering_index(db):
+    detail = plan(db, LEADERBOARD_QUERY, (GUILD_ID, 5))
+    assert "COVERING INDEX idx_user_streaks_guild_leaderboard" in detail
+    # The index order is the ORDER BY: no sort step
+    assert "TEMP B-TREE" not in detail
+
+
+def test_inactive_users_uses_covering_index(db):
+    threshold = (
+        datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=12)
+    ).isoformat()
+    detail = plan(db, INACTIVE_USERS_QUERY, (GUILD_ID, threshold))
+    assert "COVERING INDEX idx_user_streaks_guild_inactivity" in detail
+    assert "TEMP B-TREE" not in detail
+
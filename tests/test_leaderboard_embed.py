@@ -0,0 +1,68 @@
+# test_leaderboard_embed.py: a reused !leaderboard embed gets a fresh timestamp
+#
+# Usage: python -m pytest tests/test_leaderboard_embed.py
+import asyncio
+
+from benchmarks.fake_gateway import FakeGateway
+from bot import metrics
+from bot.commands.general import GeneralCommands
+from bot.config import ChannelConfig, MetricsConfig
+
+
+async def run(db_path: str) -> None:
+    gateway = FakeGateway(db_path)
+    await gateway.start()
+    await gateway.add_cog(GeneralCommands)
+    bot = gateway.bot
+    embeds = []
+    deliver = gateway.deliver
+
+    async def capture(route, reference, content, kwargs):
+        if "embed" in kwargs:
+            embeds.append(kwargs["embed"])
+        return await deliver(route, reference, content, kwargs)
+
+    gateway.deliver = capture
+    try:
+        for user_id in (1, 2):
+            bot.db.manager.force_set_day(1, user_id, f"user{user_id}", user_id * 10)
+        user = gateway.user(1)
+        channel = gateway.channel(ChannelConfig.ALLOWED_COMMAND_CHANNELS[0])
+        for _ in range(3):
+            gateway.dispatch_message(gateway.message("!leaderboard", user, channel))
+            await gateway.drain()
+            await asyncio.sleep(0.01)
+        assert gateway.errors == 0
+
+        assert len(embeds) == 3
+        # One snapshot lookup per command, a miss included
+        snapshots = bot.db.leaderboards
+        assert (snapshots.hits, snapshots.misses) == (2, 1)
+        assert bot.leaderboard_embeds.hits >= 1
+        assert [embed.to_dict()["fields"] for embed in embeds[1:]] == [
+            embeds[0].to_dict()["fields"]
+        ] * 2
+        stamps = [embed.timestamp for embed in embeds]
+        assert None not in stamps
+        assert stamps == sorted(set(stamps))
+        # The shared rendering itself is never stamped
+        cached = bot.leaderboard_embeds._entries[1][1]
+        assert cached.timestamp is None
+        assert all(embed is not cached for embed in embeds)
+
+        # The render cache's counters are exported next to the snapshots'
+        await bot._start_metrics()
+        exported = metrics.REGISTRY.get("bot_leaderboard_embeds").snapshot()
+        stats = bot.leaderboard_embeds.stats()
+        assert exported["stat=hits"] == stats["hits"] >= 1
+        assert exported["stat=rebuilds"] == stats["rebuilds"] >= 1
+    finally:
+        await gateway.close()
+
+
+def test_cached_leaderboard_gets_fresh_timestamp(tmp_path, monkeypatch):
+    # A private registry with no endpoint or snapshot task
+    monkeypatch.setattr(metrics, "REGISTRY", metrics.MetricsRegistry(enabled=True))
+    monkeypatch.setattr(MetricsConfig, "PORT", 0)
+    monkeypatch.setattr(MetricsConfig, "SNAPSHOT_PATH", "")
+    asyncio.run(run(str(tmp_path / "streaks.db")))
@@ -0,0 +1,110 @@
+# test_log_concurrency.py: interleaved and redelivered log posts are applied once
+#
+# Dispatches thousands of shuffled log posts at once through the fake
+# gateway: every user's correct next post is redelivered several times
+# (same message ID), alongside a second post for the same day and one that
+# skips ahead. Per-user locks and the processed_messages claim must leave
+# every user exactly one day further, with each message ID handled once.
+# Usage: python -m pytest tests/test_log_concurrency.py
+import asyncio
+import collections
+import datetime
+import random
+
+from benchmarks.fake_gateway import FakeGateway
+from bot import events
+from bot.config import ChannelConfig
+
+GUILD_ID = 1
+EXISTING_USERS = 400
+NEW_USERS = 100
+REDELIVERIES = 3
+
+
+def seed(db, users: int) -> dict:
+    """Users on assorted days whose last post was yesterday"""
+    days = {user_id: random.randint(1, 98) for user_id in range(1, users + 1)}
+    for user_id, day in days.items():
+        db.force_set_day(GUILD_ID, user_id, f"user{user_id}", day)
+    yesterday = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        days=1
+    )
+    with db._pool.writer() as conn:
+        conn.execute(
+            "UPDATE user_streaks SET last_post_timestamp = ?", (yesterday.isoformat(),)
+        )
+    db.cache.clear()
+    db.leaderboards.reset()
+    return days
+
+
+async def run_stress(db_path: str, seed_value: int = 7) -> None:
+    random.seed(seed_value)
+    # A little send latency so handlers interleave at every await
+    gateway = FakeGateway(db_path, send_latency=0.001)
+    await gateway.start()
+    db = gateway.bot.db.manager
+    try:
+        days = seed(db, EXISTING_USERS)
+        channel = gateway.channel(ChannelConfig.LOGGING_CHANNEL)
+        expected = {}
+        deliveries = []
+        for user_id in range(1, EXISTING_USERS + NEW_USERS + 1):
+            user = gateway.user(user_id)
+            day = days.get(user_id, 0)
+            expected[user_id] = day + 1
+            valid = gateway.message(f"[{day + 1}/100] Progress", user, channel)
+            deliveries += [valid] * REDELIVERIES
+            deliveries.append(gateway.message(f"[{day + 1}/100] Again", user, channel))
+            deliveries.append(gateway.message(f"[{day + 2}/100] Skip", user, channel))
+        random.shuffle(deliveries)
+        gateway.reset_counters()
+
+        for message in deliveries:
+            gateway.dispatch_message(message)
+        await gateway.drain()
+
+        assert gateway.errors == 0
+        with db._pool.reader() as conn:
+            final = dict(
+                conn.execute(
+                    "SELECT user_id, current_day FROM user_streaks WHERE guild_id = ?",
+                    (GUILD_ID,),
+                )
+            )
+            claimed = [
+                row[0] for row in conn.execute("SELECT message_id FROM processed_messages")
+            ]
+        assert final == expected
+
+        unique_ids = {message.id for message in deliveries}
+        assert len(deliveries) > len(unique_ids) * 1.5
+        assert sorted(claimed) == sorted(unique_ids)
+        # One outcome per message ID: a ✅ or a rejection reply; milestone
+        # replies (🔥) come on top of a ✅
+        outcomes = collections.Counter(
+            reference.id
+            for kind, reference, content in gateway.sent
+            if reference is not None
+            and (content == "✅" or str(content).startswith(("❌", "⏰")))
+        )
+        assert set(outcomes) == unique_ids
+        assert max(outcomes.values()) == 1
+
+        # One accepted write per user in the event log
+        db.flush_events()
+        with db._pool.reader() as conn:
+            writes = collections.Counter(
+                row[0]
+                for row in conn.execute(
+                    "SELECT user_id FROM post_events WHERE kind IN (?, ?)",
+                    (events.CREATE, events.PROGRESS),
+                )
+            )
+        assert writes == collections.Counter(expected.keys())
+    finally:
+        await gateway.close()
+
+
+def test_interleaved_and_duplicated_posts(tmp_path):
+    asyncio.run(run_stress(str(tmp_path / "streaks.db")))
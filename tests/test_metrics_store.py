@@ -0,0 +1,117 @@
+# test_metrics_store.py: MetricsStore stays bounded as history grows
+#
+# Fast-forwards two days of samples through a store with small tiers and
+# checks row counts, how often compaction runs, and that summaries over
+# raw and rolled-up data match the samples written.
+# Usage: python -m pytest tests/test_metrics_store.py
+import random
+
+import pytest
+
+from bot.metrics_store import MetricsStore
+
+START = 1_750_000_000 - 1_750_000_000 % 3600
+INTERVAL = 30
+RAW_RETENTION = 3600
+TIERS = ((60, 6 * 3600), (600, None))
+COMPACT_EVERY = 600
+METRICS = ("rss_mb", "cpu_percent", "threads")
+
+
+def row_counts(store: MetricsStore) -> dict:
+    with store._pool.reader() as conn:
+        counts = dict(
+            conn.execute(
+                "SELECT resolution, COUNT(*) FROM metric_rollups GROUP BY resolution"
+            )
+        )
+        counts["raw"] = conn.execute(
+            "SELECT COUNT(*) FROM metric_samples"
+        ).fetchone()[0]
+    return counts
+
+
+def expected_summary(samples, name, start, end):
+    values = [v for ts, n, v in samples if n == name and start <= ts < end]
+    if not values:
+        return None
+    return {
+        "min": min(values),
+        "avg": sum(values) / len(values),
+        "max": max(values),
+        "count": len(values),
+    }
+
+
+def assert_summary(store, samples, name, start, end):
+    expected = expected_summary(samples, name, start, end)
+    actual = store.summary(name, start, end)
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value)
+
+
+def test_rows_stay_bounded_and_summaries_match(tmp_path):
+    random.seed(3)
+    store = MetricsStore(
+        str(tmp_path / "metrics.db"),
+        raw_retention=RAW_RETENTION,
+        tiers=TIERS,
+        compact_every=COMPACT_EVERY,
+    )
+    samples = []
+    hours = 48
+    for step in range(hours * 3600 // INTERVAL):
+        ts = START + step * INTERVAL
+        values = {name: random.uniform(0, 100) for name in METRICS}
+        samples += [(ts, name, value) for name, value in values.items()]
+        store.record(values, ts)
+        elapsed = ts - START
+        if elapsed < RAW_RETENTION + TIERS[0][0]:
+            # Nothing has aged out yet: no compaction at all
+            assert store.compactions == 0
+        if step % 120 == 0:
+            counts = row_counts(store)
+            # Raw rows: the retention, one bucket of alignment and the gap
+            # between compactions
+            span = RAW_RETENTION + TIERS[0][0] + COMPACT_EVERY
+            assert counts["raw"] <= (span // INTERVAL + 1) * len(METRICS)
+            span = TIERS[0][1] + TIERS[1][0] + COMPACT_EVERY
+            assert counts.get(60, 0) <= (span // 60 + 1) * len(METRICS)
+            assert counts.get(600, 0) <= (elapsed // 600 + 1) * len(METRICS)
+
+    assert store.samples_written == len(samples)
+    # Compaction ran at most once per compact_every, not once per record
+    assert store.compactions <= hours * 3600 // COMPACT_EVERY
+    counts = row_counts(store)
+    assert counts[60] > 0 and counts[600] > 0 and counts["raw"] > 0
+
+    end = START + hours * 3600
+    for name in METRICS:
+        # Whole history, raw data only, 1-minute tier only, hourly-tier span,
+        # and windows crossing tier boundaries (all on 10-minute edges)
+        for start, stop in (
+            (START, end),
+            (end - 1800, end),
+            (end - 4 * 3600, end - 2 * 3600),
+            (START + 3600, START + 7200),
+            (end - 8 * 3600, end),
+            (START, end - 600),
+        ):
+            assert_summary(store, samples, name, start, stop)
+    assert store.summary("missing", START, end) is None
+    store.close()
+
+
+def test_reopened_store_finds_its_oldest_sample(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    store = MetricsStore(path, raw_retention=RAW_RETENTION, tiers=TIERS)
+    store.record({"rss_mb": 1.0}, START)
+    store.close()
+    store = MetricsStore(path, raw_retention=RAW_RETENTION, tiers=TIERS)
+    store.record({"rss_mb": 2.0}, START + RAW_RETENTION)
+    assert store.compactions == 0
+    store.record({"rss_mb": 3.0}, START + RAW_RETENTION + 60)
+    assert store.compactions == 1
+    assert row_counts(store) == {"raw": 2, 60: 1}
+    store.close()
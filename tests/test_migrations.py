@@ -0,0 +1,144 @@
+# test_migrations.py: a migration that fails partway leaves nothing behind
+#
+# Usage: python -m pytest tests/test_migrations.py
+import sqlite3
+
+import pytest
+
+from bot import migrations
+
+
+def user_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def tables(conn: sqlite3.Connection) -> set:
+    return {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+
+
+def create_base(cursor):
+    cursor.execute("CREATE TABLE base (id INTEGER PRIMARY KEY, value TEXT)")
+    cursor.execute("INSERT INTO base (value) VALUES ('kept')")
+
+
+def test_failed_migration_rolls_back_and_reruns(tmp_path, monkeypatch):
+    fail = True
+
+    def add_extra(cursor):
+        # DDL and DML in one migration, failing after both
+        cursor.execute("CREATE TABLE extra (id INTEGER PRIMARY KEY)")
+        cursor.execute("UPDATE base SET value = 'changed'")
+        if fail:
+            raise RuntimeError("crash mid-migration")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [create_base, add_extra])
+    conn = sqlite3.connect(tmp_path / "migrations.db")
+
+    with pytest.raises(RuntimeError):
+        migrations.apply_migrations(conn)
+    assert user_version(conn) == 1
+    assert "extra" not in tables(conn)
+    assert conn.execute("SELECT value FROM base").fetchone()[0] == "kept"
+
+    fail = False
+    assert migrations.apply_migrations(conn) == 2
+    assert user_version(conn) == 2
+    assert "extra" in tables(conn)
+    assert conn.execute("SELECT value FROM base").fetchone()[0] == "changed"
+    conn.close()
+
+
+LEGACY_SCHEMA = (
+    """
+    CREATE TABLE user_streaks (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        current_day INTEGER NOT NULL DEFAULT 1,
+        last_post_timestamp TEXT NOT NULL,
+        is_active BOOLEAN NOT NULL DEFAULT 1,
+        created_at TEXT NOT NULL,
+        completed_at TEXT DEFAULT NULL
+    )
+    """,
+    """
+    CREATE TABLE hall_of_fame (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        completed_at TEXT NOT NULL
+    )
+    """,
+    "CREATE TABLE user_repos (user_id INTEGER PRIMARY KEY, github_repo TEXT NOT NULL)",
+    """
+    INSERT INTO user_streaks
+        (user_id, username, current_day, last_post_timestamp, created_at)
+    VALUES (1, 'alice', 12, '2025-01-12T10:00:00+00:00', '2025-01-01T10:00:00+00:00')
+    """,
+    "INSERT INTO hall_of_fame VALUES (2, 'bob', '2024-12-31T10:00:00+00:00')",
+    "INSERT INTO user_repos VALUES (1, 'alice/cloud')",
+)
+
+
+def legacy_database(path) -> None:
+    conn = sqlite3.connect(path)
+    for statement in LEGACY_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+
+def test_partition_by_guild_reruns_after_crash(tmp_path, monkeypatch):
+    from bot.database import DatabaseManager
+    from bot.volume import NullVolumeBackend
+
+    path = str(tmp_path / "legacy.db")
+    legacy_database(path)
+    # Crash after user_streaks has been rebuilt, before hall_of_fame
+    rebuild = migrations._rebuild_with_guild
+
+    def crash_on_hall_of_fame(cursor, table, definition):
+        if table == "hall_of_fame":
+            raise RuntimeError("crash mid-partition")
+        rebuild(cursor, table, definition)
+
+    monkeypatch.setattr(migrations, "_rebuild_with_guild", crash_on_hall_of_fame)
+    db = DatabaseManager(path, volume_backend=NullVolumeBackend())
+    with pytest.raises(RuntimeError):
+        db.init_database()
+    db.close()
+    conn = sqlite3.connect(path)
+    assert user_version(conn) == migrations.MIGRATIONS.index(
+        migrations.partition_by_guild
+    )
+    assert "user_streaks_partitioned" not in tables(conn)
+    conn.close()
+
+    monkeypatch.setattr(migrations, "_rebuild_with_guild", rebuild)
+    db = DatabaseManager(path, volume_backend=NullVolumeBackend())
+    db.init_database()
+    db.close()
+    conn = sqlite3.connect(path)
+    assert user_version(conn) == migrations.SCHEMA_VERSION
+    assert conn.execute(
+        "SELECT guild_id, user_id, current_day FROM user_streaks"
+    ).fetchall() == [(migrations.LEGACY_GUILD_ID, 1, 12)]
+    assert conn.execute("SELECT guild_id, user_id FROM hall_of_fame").fetchall() == [
+        (migrations.LEGACY_GUILD_ID, 2)
+    ]
+    conn.close()
+
+
+def test_partition_by_guild_drops_leftover_table(tmp_path):
+    """Databases stuck by a crash under the old autocommit behaviour still
+    have an empty user_streaks_partitioned"""
+    path = str(tmp_path / "stuck.db")
+    legacy_database(path)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE user_streaks_partitioned (guild_id INTEGER)")
+    conn.commit()
+    migrations.apply_migrations(conn)
+    assert "user_streaks_partitioned" not in tables(conn)
+    assert user_version(conn) == migrations.SCHEMA_VERSION
+    conn.close()
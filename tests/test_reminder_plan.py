@@ -0,0 +1,80 @@
+# test_reminder_plan.py: the single-query plan buckets users like the old loop
+#
+# Usage: python -m pytest tests/test_reminder_plan.py
+import datetime
+
+import pytest
+
+from benchmarks.bench_reminder_plan import REMOVE_DAYS, TIERS, legacy_plan
+from bot.database import DatabaseManager
+from bot.reminders import ReminderPlan
+from bot.volume import NullVolumeBackend
+
+GUILD_ID = 1
+OTHER_GUILD_ID = 2
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(
+        str(tmp_path / "streaks.db"), volume_backend=NullVolumeBackend()
+    )
+    db.init_database()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows = []
+    user_id = 0
+    # Every day of inactivity up to past removal, at several times of day
+    # (clear of the day boundaries, so the test's two clocks agree)
+    for guild_id in (GUILD_ID, OTHER_GUILD_ID):
+        for days in range(REMOVE_DAYS + 4):
+            for minutes in (30, 600, 1410):
+                user_id += 1
+                last_post = now - datetime.timedelta(days=days, minutes=minutes)
+                active = user_id % 7 != 0
+                reminders = user_id % 5 != 0
+                rows.append(
+                    (guild_id, user_id, f"user{user_id}", last_post, active, reminders)
+                )
+    with db._pool.writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO user_streaks
+            (guild_id, user_id, username, current_day, last_post_timestamp,
+             created_at, is_active, reminders_enabled)
+            VALUES (?, ?, ?, 5, ?, ?, ?, ?)
+            """,
+            [
+                (g, u, name, last.isoformat(), now.isoformat(), active, reminders)
+                for g, u, name, last, active, reminders in rows
+            ],
+        )
+    yield db
+    db.close()
+
+
+def buckets(plan: ReminderPlan) -> dict:
+    names = [tier.name for tier in TIERS] + [ReminderPlan.REMOVE]
+    return {name: {u["user_id"] for u in plan.users(name)} for name in names}
+
+
+def test_plan_matches_per_tier_queries(db):
+    legacy = legacy_plan(db)
+    plan = buckets(db.get_reminder_plan(TIERS, REMOVE_DAYS, guild_id=GUILD_ID))
+    assert plan == {name: legacy.get(name, set()) for name in plan}
+    # Every tier and removal is exercised
+    assert all(plan.values())
+
+
+def test_plan_covers_every_guild(db):
+    plan = db.get_reminder_plan(TIERS, REMOVE_DAYS)
+    per_guild = [
+        buckets(db.get_reminder_plan(TIERS, REMOVE_DAYS, guild_id=guild_id))
+        for guild_id in (GUILD_ID, OTHER_GUILD_ID)
+    ]
+    assert buckets(plan) == {
+        name: per_guild[0][name] | per_guild[1][name] for name in buckets(plan)
+    }
+    rows = [user for name in buckets(plan) for user in plan.users(name)]
+    assert {user["guild_id"] for user in rows} == {GUILD_ID, OTHER_GUILD_ID}
+    # Users with reminders off stay in the plan; the job skips them
+    assert any(not user["reminders_enabled"] for user in rows)
@@ -0,0 +1,50 @@
+# test_reminder_routing.py: public reminders stay in the user's own guild
+#
+# Usage: python -m pytest tests/test_reminder_routing.py
+import asyncio
+
+from benchmarks.fake_gateway import FakeGateway, FakeUser
+from bot.config import ChannelConfig, ReminderConfig
+from bot.migrations import UNASSIGNED_GUILD_ID
+
+
+async def run(db_path: str) -> None:
+    gateway = FakeGateway(db_path, guilds=2)
+    await gateway.start()
+    bot = gateway.bot
+    try:
+        first, second = gateway.guilds
+        channels = ChannelConfig.logging_channels()
+        gateway.user(1, guild=second)
+        # Known to the client but a member of neither guild
+        stranger = FakeUser(gateway, 2, "user2")
+        bot._connection._users[2] = stranger
+
+        def user_data(guild_id, user_id):
+            return {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "current_day": 5,
+                "challenge_length": 30,
+            }
+
+        def channel_for(guild_id, user_id):
+            return bot._logging_channel_for(user_data(guild_id, user_id), channels)
+
+        assert channel_for(first.id, 2) is channels[first.id]
+        assert channel_for(UNASSIGNED_GUILD_ID, 1) is channels[second.id]
+        assert channel_for(UNASSIGNED_GUILD_ID, 2) is None
+
+        warning = next(tier for tier in ReminderConfig.tiers() if tier.public)
+        await bot.send_reminder(warning, user_data(UNASSIGNED_GUILD_ID, 2), None)
+        await bot.send_removal_notice(user_data(UNASSIGNED_GUILD_ID, 2), None, 30)
+        assert [kind for kind, *_ in gateway.sent] == ["dm", "dm"]
+        assert "day 5 of your 30-day challenge" in gateway.sent[0][2]
+        assert "removed from 30 Days of Code tracking" in gateway.sent[1][2]
+        assert "[1/30]" in gateway.sent[1][2]
+    finally:
+        await gateway.close()
+
+
+def test_user_in_no_known_guild_gets_dms_only(tmp_path):
+    asyncio.run(run(str(tmp_path / "streaks.db")))
@@ -0,0 +1,57 @@
+# test_user_resolver.py: prefetch asks each row's own guild for its members
+#
+# Usage: python -m pytest tests/test_user_resolver.py
+import asyncio
+from types import SimpleNamespace
+
+from bot.migrations import UNASSIGNED_GUILD_ID
+from bot.users import UserResolver
+
+
+class ChunkedGuild:
+    """Guild whose member cache starts empty; records member chunk requests"""
+
+    def __init__(self, guild_id: int, member_ids):
+        self.id = guild_id
+        self.member_ids = set(member_ids)
+        self.queried = []
+
+    def get_member(self, user_id: int):
+        return None
+
+    async def query_members(self, user_ids, limit, cache):
+        self.queried.extend(user_ids)
+        return [SimpleNamespace(id=uid) for uid in user_ids if uid in self.member_ids]
+
+
+class FakeClient:
+    def __init__(self, guilds):
+        self.guilds = guilds
+
+    def get_user(self, user_id: int):
+        return None
+
+    def get_guild(self, guild_id: int):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+
+def test_prefetch_queries_only_the_rows_guild():
+    first = ChunkedGuild(1, range(1, 201))
+    second = ChunkedGuild(2, range(201, 301))
+    third = ChunkedGuild(3, [301])
+    resolver = UserResolver(FakeClient([first, second, third]))
+    rows = [(1, uid) for uid in range(1, 201)] + [(2, uid) for uid in range(201, 301)]
+    # Unassigned rows are looked for guild by guild
+    rows += [(UNASSIGNED_GUILD_ID, 250), (UNASSIGNED_GUILD_ID, 301)]
+    # A guild the bot is no longer in is not substituted
+    rows.append((4, 400))
+
+    asyncio.run(resolver.prefetch(rows))
+
+    assert sorted(first.queried) == [*range(1, 201), 301]
+    assert sorted(second.queried) == [*range(201, 301), 301]
+    assert third.queried == [301]
+    # 2 chunks in guild 1, 1 in guild 2, then 301 in each guild until found
+    assert resolver.chunk_requests == 6
+    assert all(uid in resolver._cache for uid in [*range(1, 302)])
+    assert 400 not in resolver._cache
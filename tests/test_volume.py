@@ -0,0 +1,85 @@
+# test_volume.py: VolumeCommitScheduler retries failed commits on its own
+#
+# Usage: python -m pytest tests/test_volume.py
+import time
+
+import pytest
+
+from bot.database import DatabaseManager
+from bot.volume import NullVolumeBackend, VolumeBackend, VolumeCommitScheduler
+
+
+class FlakyBackend(NullVolumeBackend):
+    """Fails its first ``failures`` commits"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    def commit(self) -> None:
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise OSError("volume unavailable")
+        super().commit()
+
+
+def test_failed_commit_is_retried_without_another_write():
+    backend = FlakyBackend(failures=1)
+    scheduler = VolumeCommitScheduler(backend, window=0.02)
+    scheduler.mark_dirty()
+    deadline = time.monotonic() + 2
+    while backend.commits == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = scheduler.stats()
+    assert backend.attempts == 2 and backend.commits == 1
+    assert stats["failures"] == 1 and stats["pending"] == 0
+    scheduler.close()
+
+
+def test_retry_backs_off_up_to_the_cap():
+    backend = FlakyBackend(failures=5)
+    # A long window so no timer fires while the test drives flush() itself
+    scheduler = VolumeCommitScheduler(backend, window=10, max_backoff=60)
+    scheduler.mark_dirty()
+    delays = []
+    for _ in range(5):
+        assert scheduler.flush() is False
+        delays.append(scheduler._timer.interval)
+    assert delays == [10, 20, 40, 60, 60]
+    assert scheduler.stats()["pending"] == 1
+    assert scheduler.flush() is True
+    assert scheduler._timer is None
+    # Backoff starts over after a success
+    backend.failures = backend.attempts + 1
+    scheduler.mark_dirty()
+    assert scheduler.flush() is False
+    assert scheduler._timer.interval == 10
+    backend.failures = 0
+    scheduler.close()
+    assert scheduler._timer is None and scheduler.stats()["pending"] == 0
+
+
+def test_failed_commit_on_close_is_not_rescheduled():
+    scheduler = VolumeCommitScheduler(FlakyBackend(failures=1), window=10)
+    scheduler.mark_dirty()
+    scheduler.close()
+    assert scheduler._timer is None
+    assert scheduler.stats()["pending"] == 1
+
+
+def test_volume_backend_is_abstract():
+    with pytest.raises(TypeError):
+        VolumeBackend()
+
+
+def test_force_set_day_marks_the_volume_dirty(tmp_path):
+    db = DatabaseManager(
+        str(tmp_path / "streaks.db"), volume_backend=NullVolumeBackend()
+    )
+    db.init_database()
+    writes = db.volume.writes
+    assert db.force_set_day(1, 1, "alice", 12)
+    assert db.force_set_day(1, 1, "alice", 13)
+    assert db.volume.writes == writes + 2
+    db.close()
@@ -0,0 +1,84 @@
+# test_watchdog.py: LoopWatchdog reports injected stalls with their stack
+#
+# Usage: python -m pytest tests/test_watchdog.py
+import asyncio
+import logging
+import time
+
+import pytest
+
+from benchmarks.bench_watchdog import (
+    THRESHOLD,
+    blocking_handler,
+    settle,
+    synchronous_commit,
+)
+from bot.watchdog import LoopWatchdog
+
+STALL = 0.3
+
+
+@pytest.fixture(autouse=True)
+def quiet_asyncio():
+    # Stall reports are warnings; keep them out of the test output
+    logger = logging.getLogger("asyncio")
+    propagate, logger.propagate = logger.propagate, False
+    yield
+    logger.propagate = propagate
+
+
+@pytest.mark.parametrize("inject", [blocking_handler, synchronous_commit])
+def test_stall_is_reported_with_its_stack(inject):
+    async def run():
+        watchdog = LoopWatchdog(threshold=THRESHOLD, interval=0.02)
+        watchdog.start()
+        try:
+            await settle(watchdog)
+            await inject(STALL)
+            await settle(watchdog)
+        finally:
+            await watchdog.stop()
+        return watchdog
+
+    watchdog = asyncio.run(run())
+    assert watchdog.stalls == 1
+    report = watchdog.reports[-1]
+    assert report["lag_ms"] >= STALL * 1e3 * 0.9
+    assert report["samples"] > 0
+    assert inject.__name__ in "".join(report["stack"])
+    assert watchdog.stats()["max_lag_ms"] >= STALL * 1e3 * 0.9
+
+
+def test_blocks_under_the_threshold_are_not_reported():
+    async def run():
+        watchdog = LoopWatchdog(threshold=THRESHOLD, interval=0.02)
+        watchdog.start()
+        try:
+            for _ in range(10):
+                time.sleep(THRESHOLD / 5)
+                await asyncio.sleep(0)
+            await settle(watchdog)
+        finally:
+            await watchdog.stop()
+        return watchdog
+
+    assert asyncio.run(run()).stalls == 0
+
+
+def test_asyncio_debug_names_the_slow_callback():
+    async def run():
+        watchdog = LoopWatchdog(threshold=THRESHOLD, interval=0.02, asyncio_debug=True)
+        watchdog.start()
+        try:
+            await settle(watchdog)
+            asyncio.get_running_loop().call_soon(time.sleep, STALL)
+            await settle(watchdog)
+        finally:
+            await watchdog.stop()
+        assert not asyncio.get_running_loop().get_debug()
+        return watchdog
+
+    watchdog = asyncio.run(run())
+    assert watchdog.stalls == 1
+    slow = watchdog.reports[-1]["slow_callbacks"]
+    assert any("sleep" in message for message in slow), slow